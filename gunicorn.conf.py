@@ -0,0 +1,20 @@
+"""Gunicorn settings, read from the working directory by ``gunicorn wsgi:app``.
+
+The app is created once in the master (``preload_app``), which then loads
+the question bank before forking, so every worker starts with it and
+shares its pages instead of building its own copy.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+preload_app = True
+
+
+def on_starting(server):
+    """Runs in the master after the app is loaded and before the first fork."""
+    if server.cfg.preload_app:
+        from ml_app.database import preload
+        preload.prepare_fork(server.app.wsgi())
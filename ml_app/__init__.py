@@ -34,14 +34,30 @@ def create_app(test_config=None):
     except OSError:
         pass
         
-    if test_config is None:
-        # Load the instance config, if it exists, when not testing
-        app.config.from_mapping(
-            SECRET_KEY='dev',
-            DATABASE=os.path.join(app.instance_path, 'ml_app.sqlite'),
-        )
-    else:
-        # Load the test config if passed in
+    from .database import answer_writer, bank_files, content_hash, db, importer, payload_cache, question_index, replica, rollups, stats_snapshot, versions
+
+    # Defaults, overridden by the test config when one is passed in
+    app.config.from_mapping(
+        SECRET_KEY='dev',
+        DATABASE=os.path.join(app.instance_path, 'ml_app.sqlite'),
+        DATABASE_POOL_SIZE=8,  # idle connections kept for reuse
+        DATABASE_POOL_HEALTH_CHECK=30.0,  # seconds idle before a connection is re-checked
+        SQLITE_PRAGMAS=dict(db.PRODUCTION_PRAGMAS),  # {} keeps SQLite defaults
+        QUESTION_PAYLOAD_CACHE_SIZE=10000,  # questions kept pre-serialized in memory
+        ANSWER_DURABILITY='sync',  # 'sync' waits for the group commit, 'async' only for the enqueue
+        ANSWER_BATCH_SIZE=64,  # answers committed per group at most
+        ANSWER_FLUSH_INTERVAL=0.002,  # seconds a group stays open for more answers
+        ANSWER_QUEUE_SIZE=10000,  # answers queued before submitters are held back
+        ANSWER_QUEUE_TIMEOUT=1.0,  # seconds a submitter waits on a full queue before a 503
+        STATS_SNAPSHOT_INTERVAL=2.0,  # seconds between background stats recomputes
+        STATS_SNAPSHOT_MAX_AGE=10.0,  # oldest stats snapshot served before recomputing inline
+        CATALOG_VERSION_TTL=1.0,  # seconds catalog ETags may lag behind a bank or answer change
+        CATALOG_REPLICA=False,  # serve catalog reads from a per-worker in-memory copy
+        COMPRESSION_MIN_SIZE=1024,  # bytes; smaller responses are sent as they are
+        COMPRESSION_LEVEL=6,  # gzip/zstd level (brotli quality)
+        COMPRESSION_CACHE_SIZE=256,  # encoded bodies of ETagged responses kept in memory
+    )
+    if test_config is not None:
         app.config.update(test_config)
 
     # Error handlers
@@ -66,15 +82,30 @@ def create_app(test_config=None):
         }), 500
 
     # Initialize database
-    from .database import db
     db.init_app(app)
+    question_index.init_app(app)
+    payload_cache.init_app(app)
+    answer_writer.init_app(app)
+    rollups.init_app(app)
+    stats_snapshot.init_app(app)
+    versions.init_app(app)
+    replica.init_app(app)
+    content_hash.init_app(app)
+    bank_files.init_app(app)
+    importer.init_app(app)
+    
+    # Compress large responses
+    from . import compression
+    compression.init_app(app)
     
     # Register blueprints
-    from .api import questions, concepts, sessions, practice
+    from .api import questions, concepts, sessions, practice, stats, leaderboard
     app.register_blueprint(questions.bp)
     app.register_blueprint(concepts.bp)
     app.register_blueprint(sessions.bp)
     app.register_blueprint(practice.bp)
+    app.register_blueprint(stats.bp)
+    app.register_blueprint(leaderboard.bp)
 
     # Register main routes
     @app.route('/')
@@ -86,4 +117,10 @@ def create_app(test_config=None):
         with app.app_context():
             db.init_db()
 
+    # Report the effective SQLite settings and build the in-process
+    # question index up front when the bank is there
+    with app.app_context():
+        db.check_settings()
+        question_index.warm()
+
     return app
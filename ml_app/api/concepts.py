@@ -1,29 +1,54 @@
 from flask import Blueprint, jsonify, request, current_app
 from ..database.db import get_db
+from ..database.payload_cache import get_payloads, json_array, json_response
+from ..database.replica import get_catalog_db
+from .conditional import body_etag, body_versions, cached, catalog_etag, tagged
+from .pagination import iter_chunks, limit_clause, page_args, page_json, stream_array
 import json
 
 bp = Blueprint('concepts', __name__, url_prefix='/api/concepts')
 
 @bp.route('/')
 def get_concepts():
-    """Get list of all ML concepts"""
-    db = get_db()
+    """Get list of all ML concepts, whole, by keyset page or streamed"""
+    page = page_args()
+    etag = None if page.stream else catalog_etag(f'concepts-{page.key}')
+    ready = cached(etag) if etag else None
+    if ready:
+        return ready
+    
+    db = get_catalog_db()
     try:
-        concepts = db.execute(
+        versions = None if page.stream else body_versions(db)
+        limit_sql, limit_params = limit_clause(page)
+        cursor = db.execute(
             'SELECT c.id, c.name, c.description, '
-            'COUNT(DISTINCT q.id) as question_count '
+            '(SELECT COUNT(*) FROM questions q WHERE q.concept_id = c.id) as question_count '
             'FROM concepts c '
-            'LEFT JOIN questions q ON c.id = q.concept_id '
-            'GROUP BY c.id'
-        ).fetchall()
+            'WHERE c.id > ? '
+            'ORDER BY c.id' + limit_sql,
+            (page.after,) + limit_params
+        )
         
-        return jsonify([{
-            'id': row['id'],
-            'name': row['name'],
-            'description': row['description'],
-            'question_count': row['question_count'],
-            'status': 'Not started'  # Default status
-        } for row in concepts])
+        def encode(row):
+            return json.dumps({
+                'id': row['id'],
+                'name': row['name'],
+                'description': row['description'],
+                'question_count': row['question_count'],
+                'status': 'Not started'  # Default status
+            })
+        
+        if page.stream:
+            return stream_array(encode(row) for rows in iter_chunks(cursor) for row in rows)
+        
+        concepts = cursor.fetchall()
+        fragments = [encode(row) for row in concepts]
+        if page.paginated:
+            body = page_json('concepts', fragments, page.next_after([row['id'] for row in concepts]))
+        else:
+            body = json_array(fragments)
+        return tagged(json_response(body), body_etag(f'concepts-{page.key}', versions, db))
     except Exception as e:
         current_app.logger.error(f"Error getting concepts: {str(e)}")
         return jsonify({'error': 'Failed to get concepts'}), 500
@@ -31,8 +56,16 @@ def get_concepts():
 @bp.route('/<int:concept_id>')
 def get_concept_details(concept_id):
     """Get detailed information about a specific concept"""
+    # The stats below depend on the answers too
+    etag = catalog_etag(f'concept-{concept_id}', answers=True)
+    ready = cached(etag)
+    if ready:
+        return ready
+    
     db = get_db()
     try:
+        versions = body_versions(db, answers=True)
+        
         # Get concept details
         concept = db.execute(
             'SELECT c.* '
@@ -44,41 +77,32 @@ def get_concept_details(concept_id):
         if not concept:
             return jsonify({'error': 'Concept not found'}), 404
         
-        # Get performance statistics
-        stats = db.execute(
-            'SELECT COUNT(DISTINCT q.id) as total_questions, '
-            'AVG(CASE WHEN ua.is_correct THEN 100 ELSE 0 END) as avg_score, '
-            'AVG(ua.time_taken) as avg_time '
-            'FROM concepts c '
-            'JOIN questions q ON c.id = q.concept_id '
-            'LEFT JOIN user_answers ua ON q.id = ua.question_id '
-            'WHERE c.id = ? '
-            'GROUP BY c.id',
+        # Get performance statistics from the trigger-maintained counters
+        total_questions = db.execute(
+            'SELECT COUNT(*) as count FROM questions WHERE concept_id = ?',
             (concept_id,)
-        ).fetchone()
+        ).fetchone()['count']
+        attempts = concept['attempts']
         
         # Get recent questions
         recent_questions = db.execute(
-            'SELECT q.id, q.text, q.difficulty, '
-            'COUNT(ua.id) as attempts, '
-            'AVG(CASE WHEN ua.is_correct THEN 100 ELSE 0 END) as success_rate '
+            'SELECT q.id, q.text, q.difficulty, q.attempts, '
+            'CASE WHEN q.attempts > 0 THEN q.correct * 100.0 / q.attempts END as success_rate '
             'FROM questions q '
-            'LEFT JOIN user_answers ua ON q.id = ua.question_id '
             'WHERE q.concept_id = ? '
-            'GROUP BY q.id '
             'ORDER BY q.id DESC '
             'LIMIT 5',
             (concept_id,)
         ).fetchall()
         
-        return jsonify({
+        return tagged(jsonify({
             'id': concept['id'],
             'name': concept['name'],
             'description': concept['description'],
             'stats': {
-                'total_questions': stats['total_questions'] if stats else 0,
-                'avg_score': round(stats['avg_score'], 2) if stats and stats['avg_score'] is not None else 0,
-                'avg_time': round(stats['avg_time'], 2) if stats and stats['avg_time'] is not None else 0
+                'total_questions': total_questions,
+                'avg_score': round(concept['correct'] * 100.0 / attempts, 2) if attempts else 0,
+                'avg_time': round(concept['total_time'] / attempts, 2) if attempts else 0
             },
             'recent_questions': [{
                 'id': q['id'],
@@ -87,37 +111,58 @@ def get_concept_details(concept_id):
                 'attempts': q['attempts'],
                 'success_rate': round(q['success_rate'], 2) if q['success_rate'] is not None else 0
             } for q in recent_questions]
-        })
+        }), body_etag(f'concept-{concept_id}', versions, db, answers=True))
     except Exception as e:
         current_app.logger.error(f"Error getting concept details: {str(e)}")
         return jsonify({'error': 'Failed to get concept details'}), 500
 
+def listing_fragments(catalog, chunks):
+    """Encode question listing rows, a chunk of payload look-ups at a time"""
+    for rows in chunks:
+        payloads = get_payloads(catalog, [q['id'] for q in rows])
+        for q in rows:
+            if q['id'] in payloads:
+                yield payloads[q['id']].listing_json(
+                    q['attempts'],
+                    round(q['success_rate'], 2) if q['success_rate'] is not None else 0
+                )
+
 @bp.route('/<int:concept_id>/questions')
 def get_concept_questions(concept_id):
-    """Get all questions for a specific concept"""
+    """Get the questions of a concept, whole, by keyset page or streamed"""
+    page = page_args()
+    # Includes per-question answer stats, so the tag follows the answers too
+    etag = None if page.stream else catalog_etag(f'concept-{concept_id}-questions-{page.key}', answers=True)
+    ready = cached(etag) if etag else None
+    if ready:
+        return ready
+    
     db = get_db()
+    catalog = get_catalog_db()
     try:
-        questions = db.execute(
-            'SELECT q.*, '
-            'COUNT(ua.id) as attempts, '
-            'AVG(CASE WHEN ua.is_correct THEN 100 ELSE 0 END) as success_rate '
+        versions = None if page.stream else body_versions(catalog, answers=True)
+        limit_sql, limit_params = limit_clause(page)
+        cursor = db.execute(
+            'SELECT q.id, q.attempts, '
+            'CASE WHEN q.attempts > 0 THEN q.correct * 100.0 / q.attempts END as success_rate '
             'FROM questions q '
-            'LEFT JOIN user_answers ua ON q.id = ua.question_id '
-            'WHERE q.concept_id = ? '
-            'GROUP BY q.id '
-            'ORDER BY q.id',
-            (concept_id,)
-        ).fetchall()
+            'WHERE q.concept_id = ? AND q.id > ? '
+            'ORDER BY q.id' + limit_sql,
+            (concept_id, page.after) + limit_params
+        )
         
-        return jsonify([{
-            'id': q['id'],
-            'text': q['text'],
-            'options': json.loads(q['options']),
-            'difficulty': q['difficulty'],
-            'hint': q.get('hint', ''),
-            'attempts': q['attempts'],
-            'success_rate': round(q['success_rate'], 2) if q['success_rate'] is not None else 0
-        } for q in questions])
+        if page.stream:
+            return stream_array(listing_fragments(catalog, iter_chunks(cursor)))
+        
+        questions = cursor.fetchall()
+        fragments = listing_fragments(catalog, [questions])
+        if page.paginated:
+            body = page_json('questions', fragments, page.next_after([q['id'] for q in questions]))
+        else:
+            body = json_array(fragments)
+        return tagged(json_response(body), body_etag(
+            f'concept-{concept_id}-questions-{page.key}', versions, catalog, answers=True
+        ))
     except Exception as e:
         current_app.logger.error(f"Error getting concept questions: {str(e)}")
         return jsonify({'error': 'Failed to get concept questions'}), 500
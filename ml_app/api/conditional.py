@@ -0,0 +1,77 @@
+"""Strong ETags for catalog responses.
+
+Tags are derived from the version counters alone, so a matching
+``If-None-Match`` is answered with 304, and a body already encoded for
+the tag is served from the compression cache, before any query runs.
+Those checks use the clock's versions, up to ``CATALOG_VERSION_TTL`` old.
+
+A body that is built is tagged with the versions read straight from the
+database around its queries instead (``body_versions``/``body_etag``).
+If they moved while it was built, or the catalog replica lags the
+database, the body goes out untagged, so no client or cache ever holds
+bytes under a tag they do not match.
+"""
+from flask import Response, current_app, request
+
+from ..compression import encoded_etags
+from ..database.db import get_bank_version, get_db
+from ..database.versions import catalog_versions, read_versions
+
+
+def _format_etag(resource, bank_version, answers_version=None):
+    if answers_version is not None:
+        return f'{resource}-b{bank_version}-a{answers_version}'
+    return f'{resource}-b{bank_version}'
+
+
+def catalog_etag(resource, answers=False):
+    """ETag for a catalog resource; ``answers`` for ones that include answer stats."""
+    bank_version, answers_version = catalog_versions()
+    return _format_etag(resource, bank_version, answers_version if answers else None)
+
+
+def body_versions(catalog, answers=False):
+    """Read the versions a body is about to be built from, bypassing the clock.
+
+    ``catalog`` is the connection the body's catalog reads use.
+    """
+    db = get_db()
+    bank_version, answers_version = read_versions(db)
+    catalog_version = bank_version if catalog is db else get_bank_version(catalog)
+    return (bank_version, answers_version if answers else None, catalog_version)
+
+
+def body_etag(resource, before, catalog, answers=False):
+    """ETag for a body built since ``body_versions`` returned ``before``, or None.
+
+    None when the versions moved meanwhile or the catalog was not at the
+    database's bank version: the body is then not tied to one version.
+    """
+    bank_version, answers_version, catalog_version = before
+    if catalog_version != bank_version or body_versions(catalog, answers) != before:
+        return None
+    return _format_etag(resource, bank_version, answers_version)
+
+
+def not_modified(etag):
+    """Return a 304 response if the client already holds ``etag``, else None."""
+    for candidate in encoded_etags(etag):
+        if request.if_none_match.contains(candidate):
+            response = Response(status=304)
+            response.set_etag(candidate)
+            return response
+    return None
+
+
+def cached(etag):
+    """Return a 304 or a pre-compressed response for ``etag``, else None."""
+    return not_modified(etag) or current_app.extensions['compressor'].cached_response(
+        etag, request.accept_encodings
+    )
+
+
+def tagged(response, etag):
+    """Set ``etag`` on a successful response; a None tag leaves it untagged."""
+    if etag is not None:
+        response.set_etag(etag)
+    return response
@@ -0,0 +1,65 @@
+from flask import Blueprint, jsonify, request, current_app
+from ..database.db import get_db
+from ..database.leaderboard import ENTITIES, SPANS, current_period, entry_rank, top_entries
+
+bp = Blueprint('leaderboard', __name__, url_prefix='/api/leaderboard')
+
+# Upper bound on entries returned by one top-K request
+MAX_TOP = 100
+
+def board_args():
+    """Read the span, entity and period of the board a request asks for"""
+    span = request.args.get('window', 'all')
+    entity = request.args.get('by', 'user')
+    if span not in SPANS or entity not in ENTITIES:
+        return None
+    period = request.args.get('period') or current_period(span)
+    return span, entity, period
+
+@bp.route('/')
+def get_leaderboard():
+    """Get the top entries of a daily, weekly or all-time board"""
+    board = board_args()
+    if not board:
+        return jsonify({'error': f'window must be one of {SPANS} and by one of {ENTITIES}'}), 400
+    span, entity, period = board
+    limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_TOP)
+    
+    try:
+        return jsonify({
+            'window': span,
+            'period': period,
+            'by': entity,
+            'entries': top_entries(get_db(), span, entity, period, limit)
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error getting leaderboard: {str(e)}")
+        return jsonify({'error': 'Failed to get leaderboard'}), 500
+
+@bp.route('/me')
+def get_my_rank():
+    """Get the rank of the calling session, or of its user, on a board"""
+    session_id = request.headers.get('X-Session-ID')
+    if not session_id:
+        return jsonify({'error': 'No session ID provided'}), 400
+    
+    board = board_args()
+    if not board:
+        return jsonify({'error': f'window must be one of {SPANS} and by one of {ENTITIES}'}), 400
+    span, entity, period = board
+    
+    db = get_db()
+    try:
+        entity_id = session_id
+        if entity == 'user':
+            session = db.execute('SELECT user_name FROM sessions WHERE id = ?', (session_id,)).fetchone()
+            entity_id = session['user_name'] if session else None
+        
+        rank = entry_rank(db, span, entity, entity_id, period) if entity_id else None
+        if rank is None:
+            return jsonify({'error': 'Not on this leaderboard yet'}), 404
+        
+        return jsonify({'window': span, 'period': period, 'by': entity, 'id': entity_id, **rank})
+    except Exception as e:
+        current_app.logger.error(f"Error getting leaderboard rank: {str(e)}")
+        return jsonify({'error': 'Failed to get leaderboard rank'}), 500
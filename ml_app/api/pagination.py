@@ -0,0 +1,83 @@
+"""Keyset pagination and streamed JSON arrays for listing endpoints.
+
+Listings are walked in ``id`` order.  ``?after=<id>&limit=<n>`` returns the
+rows with ids above ``after``, so every page costs the same however deep it
+is, and the response names the ``next_after`` cursor for the following
+page (null on the last one).  ``?stream=1`` sends the listing as a JSON
+array produced row by row from the cursor instead of built in memory.
+"""
+import json
+
+from flask import Response, request, stream_with_context
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Rows taken from the cursor per step of a streamed listing
+STREAM_CHUNK = 200
+
+
+class Page:
+    """The keyset window a listing request asks for."""
+
+    __slots__ = ('after', 'limit', 'paginated', 'stream')
+
+    def __init__(self, after, limit, paginated, stream):
+        self.after = after
+        self.limit = limit
+        self.paginated = paginated
+        self.stream = stream
+
+    @property
+    def key(self):
+        """Part of the ETag that tells pages apart."""
+        return f'after{self.after}-limit{self.limit}' if self.paginated else 'all'
+
+    def next_after(self, ids):
+        """Cursor for the following page: the last id, if the page was full."""
+        return ids[-1] if self.limit is not None and len(ids) == self.limit else None
+
+
+def page_args():
+    """Read ``after``, ``limit`` and ``stream`` from the query string."""
+    after = max(request.args.get('after', 0, type=int), 0)
+    limit = request.args.get('limit', type=int)
+    paginated = 'after' in request.args or limit is not None
+    if paginated:
+        limit = min(max(limit or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+    stream = request.args.get('stream', '') in ('1', 'true')
+    return Page(after, limit, paginated, stream)
+
+
+def limit_clause(page):
+    """``LIMIT`` clause and parameters closing a keyset query."""
+    if page.limit is None:
+        return '', ()
+    return ' LIMIT ?', (page.limit,)
+
+
+def page_json(name, fragments, next_after):
+    """Wrap encoded items in a page object."""
+    return (f'{{"{name}":[{",".join(fragments)}],'
+            f'"next_after":{json.dumps(next_after)}}}')
+
+
+def iter_chunks(cursor, size=STREAM_CHUNK):
+    """Yield lists of rows from ``cursor`` without fetching them all."""
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield rows
+
+
+def stream_array(fragments):
+    """Stream encoded JSON values from an iterable as one array."""
+    def generate():
+        yield '['
+        first = True
+        for fragment in fragments:
+            yield fragment if first else ',' + fragment
+            first = False
+        yield ']'
+    return Response(stream_with_context(generate()), mimetype='application/json')
@@ -1,11 +1,21 @@
 from flask import Blueprint, jsonify, request, current_app
 from ml_app.database.db import get_db
-import json
+from ml_app.database.answer_writer import AnswerQueueFull, record_answer
+from ml_app.database.deck import deal_question_ids
+from ml_app.database.payload_cache import get_payloads, json_array, json_response
+from ml_app.database.replica import get_catalog_db
+import math
 import uuid
 from datetime import datetime
 
 bp = Blueprint('practice', __name__, url_prefix='/api')
 
+# Upper bound on questions dealt by one prefetch request
+MAX_PREFETCH = 20
+
+# Cards dealt per request before giving up on finding one that still exists
+MAX_DEAL_ATTEMPTS = 20
+
 @bp.route('/practice/start', methods=['POST'])
 def start_session():
     data = request.get_json()
@@ -30,45 +40,41 @@ def get_question():
     
     db = get_db()
     
-    # First, check if all questions have been answered
-    total_questions = db.execute('SELECT COUNT(*) as count FROM questions').fetchone()['count']
-    answered_questions = db.execute(
-        'SELECT COUNT(DISTINCT question_id) as count FROM user_answers WHERE session_id = ?',
-        (session_id,)
-    ).fetchone()['count']
+    # Deal the next card from this session's seeded permutation of the bank,
+    # passing over cards whose question is gone by the time it is fetched
+    for _ in range(MAX_DEAL_ATTEMPTS):
+        dealt = deal_question_ids(db, session_id)
+        if not dealt:
+            return jsonify({
+                'error': 'No more questions available',
+                'message': 'You have answered all available questions!'
+            }), 404
+        payload = get_payloads(get_catalog_db(), dealt).get(dealt[0])
+        if payload:
+            current_app.logger.info(f"Retrieved question {dealt[0]} for session {session_id}")
+            return json_response(payload.practice_json())
+        current_app.logger.info(f"Dealt question {dealt[0]} no longer exists, dealing another")
+    
+    return jsonify({'error': 'Could not deal a question, try again shortly'}), 503, {'Retry-After': '1'}
+
+@bp.route('/practice/questions', methods=['GET'])
+def get_questions():
+    """Deal the next batch of practice questions, without their answers"""
+    session_id = request.headers.get('X-Session-ID')
+    if not session_id:
+        return jsonify({'error': 'No session ID provided'}), 400
     
-    if answered_questions >= total_questions:
-        return jsonify({
-            'error': 'No more questions available',
-            'message': 'You have answered all available questions!'
-        }), 404
-    
-    # Get a random question that hasn't been answered in this session
-    question = db.execute('''
-        SELECT q.*, c.name as concept_name
-        FROM questions q
-        LEFT JOIN concepts c ON q.concept_id = c.id
-        WHERE q.id NOT IN (
-            SELECT DISTINCT question_id 
-            FROM user_answers 
-            WHERE session_id = ?
-        )
-        ORDER BY RANDOM()
-        LIMIT 1
-    ''', (session_id,)).fetchone()
+    count = min(max(request.args.get('count', 5, type=int), 1), MAX_PREFETCH)
     
-    if not question:
-        return jsonify({'error': 'No more questions available'}), 404
+    db = get_db()
+    dealt = deal_question_ids(db, session_id, count)
+    payloads = get_payloads(get_catalog_db(), dealt)
     
-    current_app.logger.info(f"Retrieved question {question['id']} for session {session_id}")
+    current_app.logger.info(f"Dealt {len(dealt)} questions for session {session_id}")
     
-    return jsonify({
-        'id': question['id'],
-        'text': question['text'],
-        'options': json.loads(question['options']),
-        'difficulty': question['difficulty'],
-        'concept': question['concept_name']
-    })
+    return json_response(json_array(
+        payloads[question_id].practice_json() for question_id in dealt if question_id in payloads
+    ))
 
 @bp.route('/practice/answer', methods=['POST'])
 def submit_answer():
@@ -81,9 +87,13 @@ def submit_answer():
     answer = data.get('answer')
     time_taken = data.get('timeTaken', 0)
     
-    if not question_id or not answer:
+    if not question_id or answer is None:
         return jsonify({'error': 'Question ID and answer are required'}), 400
     
+    if (isinstance(time_taken, bool) or not isinstance(time_taken, (int, float))
+            or not math.isfinite(time_taken) or time_taken < 0):
+        return jsonify({'error': 'timeTaken must be a non-negative number of seconds'}), 400
+    
     db = get_db()
     
     # Check if this question has already been answered in this session
@@ -96,7 +106,7 @@ def submit_answer():
         return jsonify({'error': 'Question already answered in this session'}), 400
     
     # Get correct answer
-    question = db.execute(
+    question = get_catalog_db().execute(
         'SELECT correct_answer, explanation FROM questions WHERE id = ?',
         (question_id,)
     ).fetchone()
@@ -107,12 +117,8 @@ def submit_answer():
     is_correct = answer == question['correct_answer']
     
     try:
-        # Record answer
-        db.execute('''
-            INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (session_id, question_id, answer, is_correct, time_taken))
-        db.commit()
+        # Record answer through the group-committing writer
+        record_answer(session_id, question_id, answer, is_correct, time_taken)
         
         current_app.logger.info(f"Recorded answer for question {question_id} in session {session_id}")
         
@@ -121,6 +127,9 @@ def submit_answer():
             'correctAnswer': question['correct_answer'],
             'explanation': question['explanation']
         })
+    except AnswerQueueFull as e:
+        current_app.logger.warning(f"Answer queue full for session {session_id}")
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         current_app.logger.error(f"Error recording answer: {str(e)}")
         return jsonify({'error': 'Failed to record answer'}), 500
@@ -133,67 +142,61 @@ def get_progress():
     
     db = get_db()
     
-    # Get overall stats
+    # Everything below reads the summaries the user_answers triggers maintain
     overall = db.execute('''
         SELECT 
-            COUNT(*) as total_questions,
-            SUM(CASE WHEN is_correct THEN 1 ELSE 0 END) as correct_answers,
-            ROUND(AVG(CASE WHEN is_correct THEN 100 ELSE 0 END), 2) as accuracy,
-            ROUND(AVG(time_taken), 2) as average_time
-        FROM user_answers
-        WHERE session_id = ?
+            total_questions,
+            correct_answers,
+            ROUND(correct_answers * 100.0 / total_questions, 2) as accuracy,
+            ROUND(total_time * 1.0 / total_questions, 2) as average_time
+        FROM session_stats
+        WHERE session_id = ? AND total_questions > 0
     ''', (session_id,)).fetchone()
     
     # Get concept mastery
     concepts = db.execute('''
         SELECT 
             c.name as concept,
-            COUNT(ua.id) as attempted,
-            SUM(CASE WHEN ua.is_correct THEN 1 ELSE 0 END) as correct,
-            ROUND(AVG(CASE WHEN ua.is_correct THEN 100 ELSE 0 END), 2) as accuracy
-        FROM concepts c
-        LEFT JOIN questions q ON q.concept_id = c.id
-        LEFT JOIN user_answers ua ON ua.question_id = q.id AND ua.session_id = ?
-        GROUP BY c.id, c.name
-        HAVING attempted > 0
+            scs.attempted,
+            scs.correct,
+            ROUND(scs.correct * 100.0 / scs.attempted, 2) as accuracy
+        FROM session_concept_stats scs
+        JOIN concepts c ON c.id = scs.concept_id
+        WHERE scs.session_id = ? AND scs.attempted > 0
         ORDER BY c.name
     ''', (session_id,)).fetchall()
     
     # Get difficulty breakdown
     difficulty = db.execute('''
         SELECT 
-            q.difficulty,
-            COUNT(ua.id) as attempted,
-            SUM(CASE WHEN ua.is_correct THEN 1 ELSE 0 END) as correct,
-            ROUND(AVG(CASE WHEN ua.is_correct THEN 100 ELSE 0 END), 2) as accuracy
-        FROM questions q
-        LEFT JOIN user_answers ua ON ua.question_id = q.id AND ua.session_id = ?
-        GROUP BY q.difficulty
-        HAVING attempted > 0
-        ORDER BY q.difficulty
+            difficulty,
+            attempted,
+            correct,
+            ROUND(correct * 100.0 / attempted, 2) as accuracy
+        FROM session_difficulty_stats
+        WHERE session_id = ? AND attempted > 0
+        ORDER BY difficulty
     ''', (session_id,)).fetchall()
     
     # Get session history
     history = db.execute('''
         SELECT 
-            s.id as session_id,
-            COUNT(ua.id) as total_questions,
-            SUM(CASE WHEN ua.is_correct THEN 1 ELSE 0 END) as correct_answers,
-            ROUND(AVG(CASE WHEN ua.is_correct THEN 100 ELSE 0 END), 2) as accuracy
-        FROM sessions s
-        LEFT JOIN user_answers ua ON ua.session_id = s.id
-        GROUP BY s.id
-        HAVING total_questions > 0
-        ORDER BY s.start_time DESC
+            session_id,
+            total_questions,
+            correct_answers,
+            ROUND(correct_answers * 100.0 / total_questions, 2) as accuracy
+        FROM session_stats
+        WHERE started_at IS NOT NULL AND total_questions > 0
+        ORDER BY started_at DESC
         LIMIT 10
     ''').fetchall()
     
     return jsonify({
         'overall': {
-            'totalQuestions': overall['total_questions'],
-            'correctAnswers': overall['correct_answers'],
-            'accuracy': overall['accuracy'] or 0,
-            'averageTime': overall['average_time'] or 0
+            'totalQuestions': overall['total_questions'] if overall else 0,
+            'correctAnswers': overall['correct_answers'] if overall else None,
+            'accuracy': overall['accuracy'] if overall else 0,
+            'averageTime': overall['average_time'] if overall else 0
         },
         'byConcept': [{
             'concept': row['concept'],
@@ -226,11 +229,11 @@ def end_session():
     # Get session stats
     stats = db.execute('''
         SELECT 
-            COUNT(*) as total_questions,
-            SUM(CASE WHEN is_correct THEN 1 ELSE 0 END) as correct_answers,
-            ROUND(AVG(CASE WHEN is_correct THEN 100 ELSE 0 END), 2) as accuracy
-        FROM user_answers
-        WHERE session_id = ?
+            total_questions,
+            correct_answers,
+            ROUND(correct_answers * 100.0 / total_questions, 2) as accuracy
+        FROM session_stats
+        WHERE session_id = ? AND total_questions > 0
     ''', (session_id,)).fetchone()
     
     # Update session end time
@@ -238,7 +241,7 @@ def end_session():
     db.commit()
     
     return jsonify({
-        'score': stats['accuracy'] or 0,
-        'totalQuestions': stats['total_questions'],
-        'correctAnswers': stats['correct_answers']
+        'score': stats['accuracy'] if stats else 0,
+        'totalQuestions': stats['total_questions'] if stats else 0,
+        'correctAnswers': stats['correct_answers'] if stats else None
     })
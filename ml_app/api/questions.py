@@ -1,5 +1,10 @@
 from flask import Blueprint, jsonify, request, current_app
 from ..database import db
+from ..database.answer_writer import AnswerQueueFull, record_answer
+from ..database.question_index import get_question_index
+from ..database.payload_cache import get_payloads, json_array, json_response
+from ..database.replica import get_catalog_db
+from .conditional import body_etag, body_versions, cached, catalog_etag, tagged
 import json
 
 bp = Blueprint('questions', __name__, url_prefix='/api/questions')
@@ -8,30 +13,20 @@ bp = Blueprint('questions', __name__, url_prefix='/api/questions')
 def get_question(question_id):
     """Get a specific question"""
     try:
-        db_conn = db.get_db()
-        question = db_conn.execute(
-            'SELECT q.*, c.name as concept_name '
-            'FROM questions q '
-            'LEFT JOIN concepts c ON q.concept_id = c.id '
-            'WHERE q.id = ?',
-            (question_id,)
-        ).fetchone()
+        etag = catalog_etag(f'question-{question_id}')
+        ready = cached(etag)
+        if ready:
+            return ready
         
-        if not question:
+        catalog = get_catalog_db()
+        versions = body_versions(catalog)
+        payload = get_payloads(catalog, [question_id]).get(question_id)
+        
+        if not payload:
             return jsonify({"error": "Question not found"}), 404
             
-        # Parse options from JSON string
-        options = json.loads(question['options'])
-        
-        return jsonify({
-            'id': question['id'],
-            'text': question['text'],
-            'options': options,
-            'explanation': question['explanation'],
-            'difficulty': question['difficulty'],
-            'hint': question.get('hint', ''),  # Use dict access with default
-            'concepts': [question['concept_name']] if question['concept_name'] else []
-        })
+        return tagged(json_response(payload.to_json()),
+                      body_etag(f'question-{question_id}', versions, catalog))
     except Exception as e:
         current_app.logger.error(f"Error getting question: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -47,28 +42,22 @@ def get_random_questions():
         current_app.logger.info(f"Getting random questions - concept_id: {concept_id}, count: {count}, session_id: {session_id}")
         
         db_conn = db.get_db()
+        catalog = get_catalog_db()
+        index = get_question_index(catalog)
         
-        # First, get total questions for this concept
-        total_query = '''
-            SELECT COUNT(DISTINCT q.id) as total
-            FROM questions q
-            WHERE q.concept_id = ?
-        '''
-        total_result = db_conn.execute(total_query, (concept_id,)).fetchone()
-        total_questions = total_result['total'] if total_result else 0
+        total_questions = len(index.ids(concept_id))
         current_app.logger.info(f"Total questions for concept {concept_id}: {total_questions}")
         
-        # Get answered questions for this session and concept
-        answered_count = 0
+        # Get answered questions for this session
+        answered = set()
+        if session_id:
+            answered = {row['question_id'] for row in db_conn.execute(
+                'SELECT DISTINCT question_id FROM user_answers WHERE session_id = ?',
+                (session_id,)
+            )}
+        
         if session_id and concept_id:
-            answered_query = '''
-                SELECT COUNT(DISTINCT ua.question_id) as answered
-                FROM user_answers ua
-                JOIN questions q ON ua.question_id = q.id
-                WHERE ua.session_id = ? AND q.concept_id = ?
-            '''
-            answered_result = db_conn.execute(answered_query, (session_id, concept_id)).fetchone()
-            answered_count = answered_result['answered'] if answered_result else 0
+            answered_count = sum(1 for qid in answered if index.contains(concept_id, qid))
             current_app.logger.info(f"Answered questions for session {session_id} and concept {concept_id}: {answered_count}")
             
             # If all questions are answered, clear the session progress for this concept
@@ -84,59 +73,16 @@ def get_random_questions():
                 ''', (session_id, concept_id))
                 db_conn.commit()
                 current_app.logger.info("Progress reset complete")
-                answered_count = 0
-        
-        # Build the main query for random questions
-        query = '''
-            WITH available_questions AS (
-                SELECT DISTINCT q.id, q.text, q.options, q.explanation, 
-                       q.difficulty, q.hint, c.name as concept_name
-                FROM questions q
-                LEFT JOIN concepts c ON q.concept_id = c.id
-                WHERE q.concept_id = ?
-                AND q.id NOT IN (
-                    SELECT DISTINCT ua.question_id
-                    FROM user_answers ua
-                    WHERE ua.session_id = ?
-                )
-            )
-            SELECT * FROM available_questions
-            ORDER BY RANDOM()
-            LIMIT ?
-        '''
-        
-        params = [concept_id, session_id if session_id else '', count]
-        current_app.logger.debug(f"Query parameters: {params}")
-        
-        questions = db_conn.execute(query, params).fetchall()
-        current_app.logger.info(f"Found {len(questions)} questions")
-        
-        # If no questions found and we have answered some questions, clear progress and try again
-        if len(questions) == 0 and answered_count > 0:
-            current_app.logger.info("No questions found but some were answered. Clearing progress and trying again...")
-            db_conn.execute('''
-                DELETE FROM user_answers 
-                WHERE session_id = ? AND question_id IN (
-                    SELECT q.id 
-                    FROM questions q
-                    WHERE q.concept_id = ?
-                )
-            ''', (session_id, concept_id))
-            db_conn.commit()
-            
-            # Try query again
-            questions = db_conn.execute(query, params).fetchall()
-            current_app.logger.info(f"Found {len(questions)} questions after reset")
-        
-        return jsonify([{
-            'id': q['id'],
-            'text': q['text'],
-            'options': json.loads(q['options']),
-            'explanation': q['explanation'],
-            'difficulty': q['difficulty'],
-            'hint': q['hint'] if 'hint' in q else '',  # Use dict access with default
-            'concepts': [q['concept_name']] if q['concept_name'] else []
-        } for q in questions])
+                answered = {qid for qid in answered if not index.contains(concept_id, qid)}
+        
+        # Sample ids in memory, then serve their pre-serialized payloads
+        picked = index.sample(concept_id, count, exclude=answered)
+        payloads = get_payloads(catalog, picked)
+        current_app.logger.info(f"Found {len(payloads)} questions")
+        
+        return json_response(json_array(
+            payloads[qid].to_json() for qid in picked if qid in payloads
+        ))
         
     except Exception as e:
         current_app.logger.error(f"Error getting random questions: {str(e)}")
@@ -155,13 +101,16 @@ def submit_answer(question_id):
             return jsonify({"error": "No session ID provided"}), 400
             
         answer = int(data['answer'])  # Convert to int since we store indices
-        time_taken = int(data.get('time_taken', 0))  # Time taken in seconds
-        
-        db_conn = db.get_db()
+        try:
+            time_taken = int(data.get('time_taken', 0))  # Time taken in seconds
+        except (TypeError, ValueError, OverflowError):
+            time_taken = -1
+        if time_taken < 0:
+            return jsonify({"error": "time_taken must be a non-negative number of seconds"}), 400
         
         # Get the question to check the answer
-        question = db_conn.execute(
-            'SELECT * FROM questions WHERE id = ?',
+        question = get_catalog_db().execute(
+            'SELECT correct_answer, options, explanation FROM questions WHERE id = ?',
             (question_id,)
         ).fetchone()
         
@@ -170,11 +119,7 @@ def submit_answer(question_id):
             
         # Record the answer
         is_correct = answer == int(question['correct_answer'])
-        db_conn.execute(
-            'INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken) VALUES (?, ?, ?, ?, ?)',
-            (session_id, question_id, answer, is_correct, time_taken)
-        )
-        db_conn.commit()
+        record_answer(session_id, question_id, answer, is_correct, time_taken)
         
         # Parse options from JSON string
         options = json.loads(question['options'])
@@ -188,6 +133,9 @@ def submit_answer(question_id):
         
         return jsonify(response)
         
+    except AnswerQueueFull as e:
+        current_app.logger.warning(f"Answer queue full, rejecting answer to question {question_id}")
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
     except Exception as e:
         current_app.logger.error(f"Error submitting answer: {str(e)}")
         return jsonify({"error": "Failed to submit answer"}), 500
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request, current_app
 from ..database.db import get_db
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 import json
 import uuid
 import random
@@ -50,14 +51,13 @@ def concepts():
 
 @bp.route('/concepts/<int:concept_id>/questions')
 def get_questions(concept_id):
-    """Get questions for a concept with pagination."""
+    """Get questions for a concept, a keyset page at a time."""
     try:
         db = get_db()
         
-        # Get pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        offset = (page - 1) * per_page
+        # Get pagination parameters: ids after the cursor, in id order
+        after = max(request.args.get('after', 0, type=int), 0)
+        per_page = min(max(request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
         
         # Get concept
         concept = db.execute(
@@ -74,13 +74,14 @@ def get_questions(concept_id):
             WHERE concept_id = ?
         ''', (concept_id,)).fetchone()['count']
         
-        # Get paginated questions
+        # Get the page of questions
         questions = db.execute('''
             SELECT q.* FROM questions q
             JOIN concept_questions cq ON q.id = cq.question_id
-            WHERE cq.concept_id = ?
-            LIMIT ? OFFSET ?
-        ''', (concept_id, per_page, offset)).fetchall()
+            WHERE cq.concept_id = ? AND q.id > ?
+            ORDER BY q.id
+            LIMIT ?
+        ''', (concept_id, after, per_page)).fetchall()
         
         return jsonify({
             'concept': {
@@ -98,9 +99,9 @@ def get_questions(concept_id):
             } for q in questions],
             'pagination': {
                 'total': total,
-                'page': page,
+                'after': after,
                 'per_page': per_page,
-                'total_pages': (total + per_page - 1) // per_page
+                'next_after': questions[-1]['id'] if len(questions) == per_page else None
             }
         })
     except Exception as e:
@@ -1,32 +1,30 @@
-from flask import Blueprint, jsonify, current_app
+from flask import Blueprint, jsonify, request, current_app
 from ..database.db import get_db
+from ..database.histograms import time_percentiles
+from ..database.stats_snapshot import get_stats_snapshot
 
 bp = Blueprint('stats', __name__, url_prefix='/api/stats')
 
+def snapshot_response(snapshot, body):
+    """Attach the snapshot version and time to a stats response"""
+    body['snapshot'] = {
+        'version': snapshot.version,
+        'generatedAt': snapshot.generated_at.isoformat()
+    }
+    response = jsonify(body)
+    response.headers['X-Stats-Version'] = str(snapshot.version)
+    return response
+
 @bp.route('/overview')
 def get_overview_stats():
     """Get overview statistics for the current user"""
-    db = get_db()
     try:
-        # Get total questions attempted
-        total_questions = db.execute(
-            'SELECT COUNT(*) as count FROM user_answers'
-        ).fetchone()['count']
-        
-        # Get average score
-        avg_score = db.execute(
-            'SELECT AVG(CASE WHEN is_correct THEN 100 ELSE 0 END) as avg_score '
-            'FROM user_answers'
-        ).fetchone()['avg_score'] or 0
+        snapshot = get_stats_snapshot()
+        answers, correct, total_time = snapshot.overview
         
-        # Get total time spent
-        total_time = db.execute(
-            'SELECT SUM(time_taken) as total_time FROM user_answers'
-        ).fetchone()['total_time'] or 0
-        
-        return jsonify({
-            'totalQuestions': total_questions,
-            'averageScore': round(avg_score, 2),
+        return snapshot_response(snapshot, {
+            'totalQuestions': answers,
+            'averageScore': round(correct * 100.0 / answers, 2) if answers else 0,
             'totalTime': round(total_time / 60)  # Convert to minutes
         })
     except Exception as e:
@@ -36,20 +34,12 @@ def get_overview_stats():
 @bp.route('/concepts')
 def get_concept_stats():
     """Get performance statistics by concept"""
-    db = get_db()
     try:
-        stats = db.execute(
-            'SELECT c.name as concept, '
-            'AVG(CASE WHEN ua.is_correct THEN 100 ELSE 0 END) as score '
-            'FROM concepts c '
-            'JOIN question_concepts qc ON c.id = qc.concept_id '
-            'JOIN user_answers ua ON qc.question_id = ua.question_id '
-            'GROUP BY c.id, c.name'
-        ).fetchall()
+        snapshot = get_stats_snapshot()
         
-        return jsonify({
-            'concepts': [row['concept'] for row in stats],
-            'scores': [round(row['score'], 2) for row in stats]
+        return snapshot_response(snapshot, {
+            'concepts': [name for _, name, _, _ in snapshot.concepts],
+            'scores': [round(correct * 100.0 / answers, 2) for _, _, answers, correct in snapshot.concepts]
         })
     except Exception as e:
         current_app.logger.error(f"Error getting concept stats: {str(e)}")
@@ -57,16 +47,26 @@ def get_concept_stats():
 
 @bp.route('/progress')
 def get_progress_stats():
-    """Get progress statistics over time"""
+    """Get progress statistics over time, optionally for one concept"""
     db = get_db()
+    concept_id = request.args.get('concept_id', type=int)
     try:
-        progress = db.execute(
-            'SELECT DATE(timestamp) as date, '
-            'AVG(CASE WHEN is_correct THEN 100 ELSE 0 END) as score '
-            'FROM user_answers '
-            'GROUP BY DATE(timestamp) '
-            'ORDER BY date'
-        ).fetchall()
+        # Read the per-day rollups the user_answers triggers maintain
+        if concept_id is None:
+            progress = db.execute(
+                'SELECT day as date, correct * 100.0 / answers as score '
+                'FROM daily_stats '
+                'WHERE answers > 0 '
+                'ORDER BY day'
+            ).fetchall()
+        else:
+            progress = db.execute(
+                'SELECT day as date, correct * 100.0 / answers as score '
+                'FROM daily_concept_stats '
+                'WHERE concept_id = ? AND answers > 0 '
+                'ORDER BY day',
+                (concept_id,)
+            ).fetchall()
         
         return jsonify({
             'dates': [row['date'] for row in progress],
@@ -76,6 +76,35 @@ def get_progress_stats():
         current_app.logger.error(f"Error getting progress stats: {str(e)}")
         return jsonify({'error': 'Failed to get progress statistics'}), 500
 
+def timing_response(kind, table, entity_id):
+    """Answer-time percentiles of one question or concept"""
+    db = get_db()
+    try:
+        if not db.execute(f'SELECT 1 FROM {table} WHERE id = ?', (entity_id,)).fetchone():
+            return jsonify({'error': f'{kind.capitalize()} not found'}), 404
+        
+        answers, (p50, p90, p99) = time_percentiles(kind, entity_id, db=db)
+        return jsonify({
+            'id': entity_id,
+            'answers': answers,
+            'p50': p50,  # seconds
+            'p90': p90,
+            'p99': p99
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error getting {kind} timing: {str(e)}")
+        return jsonify({'error': 'Failed to get timing statistics'}), 500
+
+@bp.route('/timing/questions/<int:question_id>')
+def get_question_timing(question_id):
+    """Get time_taken percentiles for a question"""
+    return timing_response('question', 'questions', question_id)
+
+@bp.route('/timing/concepts/<int:concept_id>')
+def get_concept_timing(concept_id):
+    """Get time_taken percentiles for a concept"""
+    return timing_response('concept', 'concepts', concept_id)
+
 @bp.route('/activity')
 def get_recent_activity():
     """Get recent user activity"""
@@ -0,0 +1,140 @@
+"""Negotiated compression of large responses.
+
+Responses of a compressible type and at least ``COMPRESSION_MIN_SIZE``
+bytes are encoded with the best coding the client accepts: ``br`` or
+``zstd`` when the ``brotli`` / ``zstandard`` packages are installed, and
+``gzip`` always.  Responses carrying a strong ETag are immutable for that
+tag, so their encoded bodies are kept in a bounded cache keyed by tag and
+coding and compressed only once.  An encoded response's ETag gets the
+coding appended, since its bytes differ from the identity response's.
+"""
+import gzip
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/html', 'text/css', 'text/plain',
+                      'text/javascript', 'application/javascript')
+
+
+def _codecs(level):
+    codecs = OrderedDict()
+    if brotli is not None:
+        codecs['br'] = lambda data: brotli.compress(data, quality=min(level, 11))
+    if zstandard is not None:
+        codecs['zstd'] = zstandard.ZstdCompressor(level=level).compress
+    # mtime=0 keeps the output, and so the cached bytes, reproducible
+    codecs['gzip'] = lambda data: gzip.compress(data, compresslevel=level, mtime=0)
+    return codecs
+
+
+def encoded_etags(etag):
+    """Every ETag a response tagged ``etag`` may have been served with."""
+    return [etag] + [f'{etag}-{coding}' for coding in ('br', 'zstd', 'gzip')]
+
+
+class EncodedCache:
+    """LRU cache of encoded bodies, keyed by ``(etag, coding)``."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Compressor:
+    """Compresses responses for one app."""
+
+    def __init__(self, min_size=1024, level=6, cache_size=256):
+        self.min_size = min_size
+        self.codecs = _codecs(level)
+        self.cache = EncodedCache(cache_size)
+
+    def negotiate(self, accept_encodings):
+        """Return the best coding the client accepts, or None for identity."""
+        return accept_encodings.best_match(list(self.codecs))
+
+    def _eligible(self, response):
+        return (response.status_code == 200
+                and not response.direct_passthrough
+                and not response.is_streamed
+                and 'Content-Encoding' not in response.headers
+                and response.mimetype in COMPRESSIBLE_TYPES
+                and (response.content_length or 0) >= self.min_size)
+
+    def cached_response(self, etag, accept_encodings, mimetype='application/json'):
+        """Return a ready response from the cache for ``etag``, or None."""
+        coding = self.negotiate(accept_encodings)
+        body = self.cache.get((etag, coding)) if coding else None
+        if body is None:
+            return None
+        response = Response(body, mimetype=mimetype)
+        response.headers['Content-Encoding'] = coding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(f'{etag}-{coding}')
+        return response
+
+    def compress(self, response, accept_encodings):
+        """Encode ``response`` in place if it is worth it and the client agrees."""
+        response.vary.add('Accept-Encoding')
+        if not self._eligible(response):
+            return response
+        coding = self.negotiate(accept_encodings)
+        if coding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        body = None
+        if etag and not weak:
+            body = self.cache.get((etag, coding))
+        if body is None:
+            body = self.codecs[coding](response.get_data())
+            if etag and not weak:
+                self.cache.put((etag, coding), body)
+
+        response.set_data(body)
+        response.headers['Content-Encoding'] = coding
+        if etag:
+            response.set_etag(f'{etag}-{coding}', weak)
+        return response
+
+
+def init_app(app):
+    """Compress the app's responses after each request."""
+    compressor = Compressor(
+        min_size=app.config['COMPRESSION_MIN_SIZE'],
+        level=app.config['COMPRESSION_LEVEL'],
+        cache_size=app.config['COMPRESSION_CACHE_SIZE'],
+    )
+    app.extensions['compressor'] = compressor
+
+    @app.after_request
+    def compress_response(response):
+        return compressor.compress(response, request.accept_encodings)
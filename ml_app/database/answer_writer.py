@@ -0,0 +1,242 @@
+"""Write-behind recording of user answers with group commit.
+
+Request handlers hand answers to a bounded in-process queue; one writer
+thread per worker drains it and commits the records in groups, either
+every ``ANSWER_BATCH_SIZE`` records or every ``ANSWER_FLUSH_INTERVAL``
+seconds, so one fsync covers many answers.  A group that fails to commit
+is retried one answer at a time, so only the answers that fail on their
+own are reported as failed; a writer thread that dies is restarted by the
+next submit.
+
+``ANSWER_DURABILITY`` selects what a handler waits for:
+
+- ``sync``: the commit of the group holding its answer (the default).
+- ``async``: only the enqueue; answers still queued are lost on a crash.
+
+When the queue is full, handlers wait up to ``ANSWER_QUEUE_TIMEOUT``
+seconds and then get ``AnswerQueueFull``.  Queued answers are flushed on
+interpreter shutdown.
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+
+from .pool import apply_pragmas
+
+DURABILITY_MODES = ('sync', 'async')
+
+# Longest a sync-mode handler waits for its group to be committed
+COMMIT_TIMEOUT = 30.0
+
+INSERT_ANSWER = (
+    'INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken) '
+    'VALUES (?, ?, ?, ?, ?)'
+)
+
+
+class AnswerQueueFull(Exception):
+    """Raised when the answer queue stays full past the enqueue timeout."""
+
+
+class AnswerWriteError(Exception):
+    """Raised to a waiting handler when its answer's group failed to commit."""
+
+
+class _Pending:
+    """An answer waiting in the queue, or a flush marker when ``values`` is None."""
+
+    __slots__ = ('values', 'done', 'error')
+
+    def __init__(self, values=None):
+        self.values = values
+        self.done = threading.Event()
+        self.error = None
+
+    def wait(self, timeout=None):
+        if not self.done.wait(timeout):
+            raise AnswerWriteError("Timed out waiting for the answer to be committed")
+        if self.error is not None:
+            raise AnswerWriteError(str(self.error))
+
+
+class AnswerWriter:
+    """A bounded queue of answers and the thread that commits them."""
+
+    def __init__(self, path, pragmas=None, durability='sync', batch_size=64,
+                 flush_interval=0.002, max_queue=10000, enqueue_timeout=1.0,
+                 logger=None):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown answer durability mode: {durability}")
+        self.path = path
+        self.pragmas = pragmas or {}
+        self.durability = durability
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.logger = logger
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _running(self):
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def _ensure_started(self):
+        # Started lazily, again after a fork (threads do not survive it) and
+        # again should the thread ever die; queued answers are kept
+        if self._running():
+            return
+        with self._lock:
+            if self._running():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._pid = os.getpid()
+                atexit.register(self.stop)
+            elif self._thread is not None and self.logger is not None:
+                self.logger.error("Answer writer thread died, restarting it")
+            self._thread = threading.Thread(
+                target=self._run, name='answer-writer', daemon=True
+            )
+            self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        apply_pragmas(conn, self.pragmas)
+        return conn
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and first.values is not None:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item.values is None:
+                break  # flush marker: commit what we have right away
+        return batch
+
+    def _commit(self, conn, batch):
+        items = [item for item in batch if item.values is not None]
+        if items:
+            try:
+                conn.executemany(INSERT_ANSWER, [item.values for item in items])
+                conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                if self.logger is not None:
+                    self.logger.warning(
+                        f"Failed to record a group of {len(items)} answers, retrying one by one: {str(e)}"
+                    )
+                self._commit_each(conn, items)
+        for item in batch:
+            item.done.set()
+
+    def _commit_each(self, conn, items):
+        # Only the answers that fail on their own are reported as failed
+        for item in items:
+            try:
+                conn.execute(INSERT_ANSWER, item.values)
+                conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                item.error = e
+                if self.logger is not None:
+                    self.logger.error(f"Failed to record answer {item.values}: {str(e)}")
+
+    def _run(self):
+        conn = None
+        try:
+            while True:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+                batch = self._collect(first)
+                stop = batch[-1] is _STOP
+                if stop:
+                    batch.pop()
+                try:
+                    if conn is None:
+                        conn = self._connect()
+                    self._commit(conn, batch)
+                except Exception as e:
+                    # One bad group must not take the writer down with it
+                    if self.logger is not None:
+                        self.logger.exception(f"Answer writer failed on a group of {len(batch)}: {str(e)}")
+                    if conn is not None and conn.in_transaction:
+                        conn.rollback()
+                    for item in batch:
+                        if not item.done.is_set():
+                            item.error = e
+                            item.done.set()
+                if stop:
+                    break
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def submit(self, session_id, question_id, answer, is_correct, time_taken):
+        """Queue an answer, waiting for its commit in ``sync`` mode."""
+        self._ensure_started()
+        pending = _Pending((session_id, question_id, answer, is_correct, time_taken))
+        try:
+            self._queue.put(pending, timeout=self.enqueue_timeout)
+        except queue.Full:
+            raise AnswerQueueFull("Answer queue is full, try again shortly")
+        if self.durability == 'sync':
+            pending.wait(COMMIT_TIMEOUT)
+
+    def flush(self, timeout=None):
+        """Block until every answer queued so far is committed."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        marker = _Pending()
+        self._queue.put(marker)
+        marker.wait(timeout)
+
+    def stop(self, timeout=5.0):
+        """Commit what is queued and stop the writer thread."""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid() or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    @property
+    def backlog(self):
+        """Number of answers waiting to be committed."""
+        return self._queue.qsize()
+
+
+_STOP = _Pending()
+
+
+def init_app(app):
+    """Attach an answer writer to the app; its thread starts on first use."""
+    app.extensions['answer_writer'] = AnswerWriter(
+        app.config['DATABASE'],
+        pragmas=app.config['SQLITE_PRAGMAS'],
+        durability=app.config['ANSWER_DURABILITY'],
+        batch_size=app.config['ANSWER_BATCH_SIZE'],
+        flush_interval=app.config['ANSWER_FLUSH_INTERVAL'],
+        max_queue=app.config['ANSWER_QUEUE_SIZE'],
+        enqueue_timeout=app.config['ANSWER_QUEUE_TIMEOUT'],
+        logger=app.logger,
+    )
+
+
+def record_answer(session_id, question_id, answer, is_correct, time_taken):
+    """Record an answer through the app's writer."""
+    current_app.extensions['answer_writer'].submit(
+        session_id, question_id, answer, is_correct, time_taken
+    )
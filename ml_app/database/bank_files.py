@@ -0,0 +1,325 @@
+"""Question bank files: streaming readers and the JSON Lines exporter.
+
+A bank file holds question records (``question``, ``options``, ``correct``
+as a letter, ``explanation``, ``difficulty``, ``concept``) in one of three
+shapes, told apart from the first bytes of the file:
+
+- JSON Lines, one record per line (``.jsonl``, what ``export-questions``
+  writes);
+- a flat JSON array of records (``data/ml_questions_large.json``);
+- a ``{"concepts": {name: {"name", "description", "questions": [...]}}}``
+  document (``data/ml_questions.json``), whose records take their concept
+  from the entry they are listed under.
+
+``iter_questions`` parses any of them incrementally, one record at a time,
+from a bounded read buffer, so reading a bank never holds more than the
+record being parsed; ``export_questions`` streams the database back out the
+same way.
+"""
+import json
+import sys
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+# Characters read from the file per refill of the parse buffer
+READ_CHUNK = 1 << 16
+
+# Largest single record accepted; a malformed file fails here instead of
+# being read whole while looking for the end of a value
+MAX_RECORD = 16 << 20
+
+# Rows fetched per step while exporting
+EXPORT_CHUNK = 1000
+
+SHAPES = ('jsonl', 'list', 'concepts')
+
+REQUIRED_FIELDS = ('question', 'options', 'correct', 'explanation')
+MIN_QUESTION_LENGTH = 15
+MIN_EXPLANATION_LENGTH = 50
+
+_WHITESPACE = ' \t\n\r'
+
+_EXPORT_QUERY = '''
+    SELECT q.id, q.text, q.options, q.correct_answer, q.explanation, q.hint,
+           q.difficulty, c.name AS concept_name
+    FROM questions q
+    LEFT JOIN concepts c ON c.id = q.concept_id
+    ORDER BY q.id
+'''
+
+
+class _Scanner:
+    """Reads JSON values one at a time from a text stream."""
+
+    def __init__(self, stream, chunk=READ_CHUNK):
+        self.stream = stream
+        self.chunk = chunk
+        self.buffer = ''
+        self.pos = 0
+        self.offset = 0  # characters dropped from the front of the buffer
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size):
+        data = self.stream.read(size)
+        if not data:
+            self.eof = True
+            return False
+        if self.pos > self.chunk:
+            self.offset += self.pos
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        self.buffer += data
+        return True
+
+    def error(self, message):
+        return ValueError(f"{message} at character {self.offset + self.pos}")
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it, '' at the end."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill(self.chunk):
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self.error(f"Expected {char!r}")
+        self.pos += 1
+
+    def value(self, advance=True):
+        """Decode the next complete value, reading more of the stream as needed."""
+        if not self.peek():
+            raise self.error("Unexpected end of file")
+        size = self.chunk
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                value, end = None, None
+            # A number or literal running into the end of the buffer may continue
+            if end is not None and (end < len(self.buffer) or self.eof):
+                break
+            if len(self.buffer) - self.pos > MAX_RECORD:
+                raise self.error("Malformed JSON value or record too large")
+            if not self._fill(size):
+                if end is not None:
+                    break
+                raise self.error("Malformed or truncated JSON value")
+            size *= 2
+        if advance:
+            self.pos = end
+        return value
+
+    def items(self):
+        """Consume a JSON array's ``[`` and yield a scanner position at each element."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            char = self.peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                self.pos -= 1
+                raise self.error("Expected ',' or ']'")
+
+    def members(self):
+        """Consume a JSON object's ``{`` and yield each key; the caller reads its value."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise self.error("Expected an object key")
+            self.expect(':')
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                self.pos -= 1
+                raise self.error("Expected ',' or '}'")
+
+
+def detect_shape(scanner):
+    """Tell the shape of a bank from its first bytes, without consuming them."""
+    char = scanner.peek()
+    if char == '[':
+        return 'list'
+    if char == '{':
+        start = scanner.offset + scanner.pos
+        scanner.pos += 1
+        first_key = scanner.value(advance=False) if scanner.peek() == '"' else None
+        scanner.pos = start - scanner.offset
+        return 'concepts' if first_key == 'concepts' else 'jsonl'
+    if not char:
+        return 'jsonl'
+    raise scanner.error("Not a question bank")
+
+
+def _iter_concepts(scanner):
+    for key in scanner.members():
+        if key != 'concepts':
+            scanner.value()
+            continue
+        for concept_key in scanner.members():
+            name = concept_key
+            for field in scanner.members():
+                if field == 'name':
+                    name = scanner.value() or concept_key
+                elif field == 'questions':
+                    for _ in scanner.items():
+                        question = scanner.value()
+                        if isinstance(question, dict):
+                            question.setdefault('concept', name)
+                        yield question
+                else:
+                    scanner.value()
+
+
+def _iter_list(scanner):
+    for _ in scanner.items():
+        yield scanner.value()
+
+
+def _iter_jsonl(scanner):
+    while scanner.peek():
+        yield scanner.value()
+
+
+_READERS = {'jsonl': _iter_jsonl, 'list': _iter_list, 'concepts': _iter_concepts}
+
+
+def iter_questions(source, chunk=READ_CHUNK):
+    """Yield the question records of a bank file (a path or a text stream), in order.
+
+    Raises ValueError on malformed input, after yielding the records before it.
+    """
+    if isinstance(source, str):
+        with open(source, encoding='utf8') as stream:
+            yield from iter_questions(stream, chunk)
+        return
+    scanner = _Scanner(source, chunk)
+    reader = _READERS[detect_shape(scanner)]
+    yield from reader(scanner)
+    if scanner.peek():
+        raise scanner.error("Unexpected data after the question bank")
+
+
+def bank_shape(path):
+    """Return which of ``SHAPES`` the bank file at ``path`` is in."""
+    with open(path, encoding='utf8') as stream:
+        return detect_shape(_Scanner(stream))
+
+
+def validate_question(data):
+    """Return why ``data`` is not a usable bank question, or None if it is.
+    
+    These are the rules the question generator accepts its output by.
+    """
+    if not isinstance(data, dict):
+        return "Record is not an object"
+    missing_fields = [field for field in REQUIRED_FIELDS if field not in data]
+    if missing_fields:
+        return f"Missing required fields: {missing_fields}"
+    if not isinstance(data['question'], str):
+        return "Question is not a string"
+    if len(data['question']) < MIN_QUESTION_LENGTH:
+        return "Question is too short"
+    if not isinstance(data['options'], list):
+        return "Options is not a list"
+    if len(data['options']) != 4:
+        return f"Wrong number of options: {len(data['options'])}"
+    empty_options = [i for i, opt in enumerate(data['options']) if not isinstance(opt, str) or len(opt.strip()) == 0]
+    if empty_options:
+        return f"Empty options at indices: {empty_options}"
+    if not isinstance(data['correct'], str):
+        return "Correct answer is not a string"
+    if data['correct'] not in ['A', 'B', 'C', 'D']:
+        return f"Invalid correct answer: {data['correct']}"
+    if not isinstance(data['explanation'], str):
+        return "Explanation is not a string"
+    if len(data['explanation']) < MIN_EXPLANATION_LENGTH:
+        return "Explanation is too short"
+    if not isinstance(data.get('hint', ''), (str, type(None))):
+        return "Hint is not a string"
+    return None
+
+
+def question_record(row):
+    """Return the bank record of a ``questions`` row joined with its concept name."""
+    options = json.loads(row['options'])
+    record = {
+        'question': row['text'],
+        'options': options,
+        'correct': chr(ord('A') + row['correct_answer']),
+        'explanation': row['explanation'] or '',
+        'difficulty': row['difficulty'],
+        'concept': row['concept_name'] or 'General',
+    }
+    if row['hint']:
+        record['hint'] = row['hint']
+    return record
+
+
+def write_jsonl(records, stream):
+    """Write records to ``stream`` one JSON object per line; return how many."""
+    count = 0
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False))
+        stream.write('\n')
+        count += 1
+    return count
+
+
+def export_questions(db, stream, chunk=EXPORT_CHUNK):
+    """Write every question to ``stream`` as JSON Lines; return how many.
+
+    Rows are fetched ``chunk`` at a time from one cursor, so memory use does
+    not grow with the bank.
+    """
+    cursor = db.execute(_EXPORT_QUERY)
+
+    def records():
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if not rows:
+                return
+            for row in rows:
+                yield question_record(row)
+
+    return write_jsonl(records(), stream)
+
+
+@click.command('export-questions')
+@click.argument('path', default='-')
+@with_appcontext
+def export_questions_command(path):
+    """Export the question bank as JSON Lines to PATH (stdout by default)."""
+    from .db import get_db
+
+    if path == '-':
+        count = export_questions(get_db(), sys.stdout)
+    else:
+        with open(path, 'w', encoding='utf8') as stream:
+            count = export_questions(get_db(), stream)
+    current_app.logger.info(f"Exported {count} questions to {path}")
+    if path != '-':
+        click.echo(f"Exported {count} questions to {path}.")
+
+
+def init_app(app):
+    """Register the export command with the app."""
+    app.cli.add_command(export_questions_command)
@@ -0,0 +1,87 @@
+"""Normalized content hashes of questions.
+
+Two questions are the same question when their text and their set of
+options match after case folding and collapsing runs of whitespace.  The
+hash of that normal form is stored in ``questions.content_hash`` under a
+UNIQUE index, so writers skip duplicates with ``ON CONFLICT DO NOTHING``
+instead of looking them up first.  Migration 0008 hashed the rows that
+existed before the column, and migration 0012 merged every row that
+duplicated an earlier question into it (answers and feedback included),
+recording the merges in ``question_hash_collisions``.
+"""
+import hashlib
+import json
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+# Name of the SQL function registered on connections by register()
+SQL_FUNCTION = 'question_content_hash'
+
+# The migration that merges duplicate questions
+MERGE_MIGRATION = 12
+
+
+def normalize(value):
+    """Case-fold ``value`` and collapse its whitespace."""
+    return ' '.join(str(value).split()).casefold()
+
+
+def content_hash(text, options):
+    """Return the hex content hash of a question's text and list of options."""
+    parts = [normalize(text)] + sorted(normalize(option) for option in options)
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf8'), digest_size=16).hexdigest()
+
+
+def _sql_content_hash(text, options):
+    try:
+        options = json.loads(options) if options else []
+    except ValueError:
+        options = [options]
+    if not isinstance(options, list):
+        options = [options]
+    return content_hash(text or '', options)
+
+
+def register(conn):
+    """Make ``question_content_hash(text, options_json)`` callable from SQL on ``conn``."""
+    conn.create_function(SQL_FUNCTION, 2, _sql_content_hash, deterministic=True)
+
+
+def hash_collisions(db):
+    """Return the questions merged into an earlier duplicate, with the kept question's text."""
+    return db.execute(
+        'SELECT c.question_id, c.duplicate_of, q.text '
+        'FROM question_hash_collisions c '
+        'LEFT JOIN questions q ON q.id = c.duplicate_of '
+        'ORDER BY c.duplicate_of, c.question_id'
+    ).fetchall()
+
+
+def merge_summary(db, applied):
+    """A line on the duplicates merged, if ``applied`` includes the merge migration, else None."""
+    if not any(version == MERGE_MIGRATION for version, _ in applied):
+        return None
+    merged = len(hash_collisions(db))
+    if not merged:
+        return None
+    return f"Merged {merged} duplicate questions into an earlier copy; see flask hash-collisions"
+
+
+@click.command('hash-collisions')
+@with_appcontext
+def hash_collisions_command():
+    """List questions that were merged into an earlier duplicate."""
+    from .db import get_db
+
+    collisions = hash_collisions(get_db())
+    for row in collisions:
+        click.echo(f"{row['question_id']} merged into {row['duplicate_of']}: {(row['text'] or '')[:60]}")
+    current_app.logger.info(f"{len(collisions)} questions were merged into an earlier duplicate")
+    click.echo(f"{len(collisions)} merged questions.")
+
+
+def init_app(app):
+    """Register the hash-collisions command with the app."""
+    app.cli.add_command(hash_collisions_command)
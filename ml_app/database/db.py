@@ -6,6 +6,22 @@ from flask.cli import with_appcontext
 import os
 import json
 
+from .content_hash import merge_summary
+from .migrate import db_upgrade_command, schema_version, upgrade
+from .pool import ConnectionPool, pragma_matches, read_pragmas
+
+# Tuning profile for production: WAL lets readers run alongside the answer
+# writer, and synchronous=NORMAL is durable across application crashes in
+# WAL mode while avoiding an fsync per commit.
+PRODUCTION_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": 5000,  # milliseconds
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -16000,  # in KiB when negative
+    "temp_store": "memory",
+}
+
 
 def adapt_datetime(dt):
     """Convert datetime to string."""
@@ -20,27 +36,37 @@ def convert_datetime(s):
         return None
 
 
-def dict_factory(cursor, row):
-    """Convert sqlite3.Row to dict with proper handling of missing fields."""
-    fields = [column[0] for column in cursor.description]
-    return {key: value for key, value in zip(fields, row)}
+class Row(sqlite3.Row):
+    """sqlite3.Row with the dict-style access the API modules rely on.
+
+    Rows are built in C and share the cursor's column description, so no
+    per-row field list or dict is allocated.  On top of ``row['col']``,
+    ``row[0]``, ``keys()`` and ``dict(row)``, rows support ``.get()`` and
+    ``'col' in row`` tests on column names.
+    """
+
+    __slots__ = ()
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except (IndexError, KeyError):
+            return default
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+
+def get_pool():
+    """Get the app's connection pool."""
+    return current_app.extensions["db_pool"]
 
 
 def get_db():
     """Get database connection."""
     if "db" not in g:
         try:
-            # Ensure the directory exists
-            db_path = current_app.config["DATABASE"]
-            os.makedirs(os.path.dirname(db_path), exist_ok=True)
-            
-            # Create database connection
-            g.db = sqlite3.connect(
-                db_path,
-                detect_types=sqlite3.PARSE_DECLTYPES
-            )
-            g.db.row_factory = dict_factory  # Use our custom dict factory
-            current_app.logger.debug(f"Connected to database at {db_path}")
+            g.db = get_pool().acquire()
         except Exception as e:
             current_app.logger.error(f"Error connecting to database: {str(e)}")
             raise
@@ -48,14 +74,21 @@ def get_db():
 
 
 def close_db(e=None):
-    """Close database connection."""
+    """Return the request's database connection to the pool."""
     try:
         db = g.pop("db", None)
         if db is not None:
-            db.close()
-            current_app.logger.debug("Database connection closed successfully")
+            get_pool().release(db)
     except Exception as e:
-        current_app.logger.error(f"Error closing database: {str(e)}")
+        current_app.logger.error(f"Error releasing database connection: {str(e)}")
+
+
+def get_bank_version(db=None):
+    """Return the question bank version, bumped by triggers on every change."""
+    if db is None:
+        db = get_db()
+    row = db.execute("SELECT version FROM bank_version WHERE id = 1").fetchone()
+    return row["version"] if row else 0
 
 
 def database_exists():
@@ -71,18 +104,16 @@ def database_exists():
 
 
 def init_db():
-    """Initialize the database."""
-    if database_exists():
-        current_app.logger.info("Database already exists")
-        return True
+    """Create the database tables, or bring an existing database up to date."""
     try:
         db = get_db()
-        
-        # Create database tables
-        with current_app.open_resource("database/schema.sql") as f:
-            db.executescript(f.read().decode("utf8"))
-        db.commit()
-        current_app.logger.info("Database tables created successfully")
+        applied = upgrade(db, logger=current_app.logger)
+        current_app.logger.info(
+            f"Database at schema version {schema_version(db)} ({len(applied)} migrations applied)"
+        )
+        merged = merge_summary(db, applied)
+        if merged:
+            current_app.logger.warning(merged)
         return True
     except Exception as e:
         current_app.logger.error(f"Error initializing database: {str(e)}")
@@ -94,15 +125,61 @@ def init_db():
 @click.command("init-db")
 @with_appcontext
 def init_db_command():
-    """Clear the existing data and create new tables."""
+    """Create the tables, applying any pending migrations."""
     init_db()
     click.echo("Initialized the database.")
 
 
+def effective_settings():
+    """Return ``{pragma: (wanted, effective)}`` for the configured profile."""
+    pragmas = current_app.config["SQLITE_PRAGMAS"]
+    effective = read_pragmas(get_db(), pragmas)
+    return {name: (pragmas[name], effective[name]) for name in pragmas}
+
+
+def check_settings():
+    """Log the effective SQLite settings, warning about any not applied."""
+    if not database_exists():
+        return {}
+    settings = effective_settings()
+    for name, (wanted, effective) in settings.items():
+        if pragma_matches(name, wanted, effective):
+            current_app.logger.info(f"SQLite {name} = {effective}")
+        else:
+            current_app.logger.warning(
+                f"SQLite {name} is {effective}, configured {wanted}"
+            )
+    return settings
+
+
+@click.command("db-settings")
+@with_appcontext
+def db_settings_command():
+    """Show the effective SQLite tuning settings."""
+    for name, (wanted, effective) in effective_settings().items():
+        marker = "" if pragma_matches(name, wanted, effective) else f"  (configured {wanted})"
+        click.echo(f"{name} = {effective}{marker}")
+
+
 def init_app(app):
     """Register database functions with the Flask app."""
+    # Ensure the directory exists, once, rather than on every connection
+    db_dir = os.path.dirname(app.config["DATABASE"])
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+
+    app.extensions["db_pool"] = ConnectionPool(
+        app.config["DATABASE"],
+        max_size=app.config["DATABASE_POOL_SIZE"],
+        health_check_interval=app.config["DATABASE_POOL_HEALTH_CHECK"],
+        row_factory=Row,
+        pragmas=app.config["SQLITE_PRAGMAS"],
+        logger=app.logger,
+    )
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
+    app.cli.add_command(db_settings_command)
+    app.cli.add_command(db_upgrade_command)
 
 
 def get_question(question_id):
@@ -176,6 +253,7 @@ def get_random_question():
     )
     question = cursor.fetchone()
     if question:
+        question = dict(question)
         question["concepts"] = (
             question["concepts"].split(",") if question["concepts"] else []
         )
@@ -255,7 +333,7 @@ def get_all_concepts():
         "LEFT JOIN topics t ON ct.topic_id = t.id "
         "GROUP BY c.id"
     )
-    concepts = cursor.fetchall()
+    concepts = [dict(concept) for concept in cursor.fetchall()]
     for concept in concepts:
         concept["topics"] = concept["topics"].split(",") if concept["topics"] else []
     return concepts
@@ -280,6 +358,7 @@ def get_concept(concept_id):
     )
     concept = cursor.fetchone()
     if concept:
+        concept = dict(concept)
         concept["topics"] = concept["topics"].split(",") if concept["topics"] else []
         concept["prerequisites"] = (
             concept["prerequisites"].split(",") if concept["prerequisites"] else []
@@ -0,0 +1,147 @@
+"""Seeded question decks for practice sessions.
+
+Every session walks its own pseudo-random permutation of the question id
+space.  The permutation is a keyed Feistel network, so the card at any
+position can be computed directly from the session seed: serving the next
+question needs no sort and no look-up of what the session already answered,
+only the cursor stored in ``session_decks``.  That holds for the first pass
+over the deck; later passes, which pick up questions added to the bank and
+cards that were dealt but not answered, skip the answered ones.
+"""
+import hashlib
+import hmac
+
+from flask import current_app
+
+from .question_index import get_question_index
+from .replica import get_catalog_db
+
+FEISTEL_ROUNDS = 4
+MAX_CURSOR_RETRIES = 5
+
+
+def session_seed(secret_key, session_id):
+    """Derive the deck seed for a session from the app secret."""
+    if isinstance(secret_key, str):
+        secret_key = secret_key.encode('utf8')
+    return hmac.new(secret_key, str(session_id).encode('utf8'), hashlib.sha256).digest()
+
+
+def domain_bits(max_id):
+    """Return the (even) bit width of the smallest domain covering ids 1..max_id."""
+    bits = max(2, (max_id - 1).bit_length())
+    return bits + (bits % 2)
+
+
+class Deck:
+    """A keyed permutation of the integers ``0 .. 2**bits - 1``.
+
+    Position ``p`` of the deck holds question id ``card(p) + 1``.  Positions
+    whose id is past the end of the bank, or was deleted, are simply skipped
+    by the caller, which keeps the order of earlier cards stable while the
+    bank grows.
+    """
+
+    def __init__(self, seed, bits):
+        if bits % 2:
+            raise ValueError("Deck width must be an even number of bits")
+        self.bits = bits
+        self.size = 1 << bits
+        self._half = bits // 2
+        self._mask = (1 << self._half) - 1
+        self._round_keys = [
+            hashlib.blake2b(seed + bytes([r]), digest_size=16).digest()
+            for r in range(FEISTEL_ROUNDS)
+        ]
+
+    def _round(self, key, value):
+        digest = hashlib.blake2b(value.to_bytes(8, 'little'), key=key, digest_size=8).digest()
+        return int.from_bytes(digest, 'little') & self._mask
+
+    def card(self, position):
+        """Return the value at ``position`` of the permutation."""
+        if not 0 <= position < self.size:
+            raise IndexError(f"Deck position {position} out of range")
+        left, right = position >> self._half, position & self._mask
+        for key in self._round_keys:
+            left, right = right, left ^ self._round(key, right)
+        return (left << self._half) | right
+
+
+def _load_cursor(db, session_id, max_id):
+    """Return ``(bits, cursor, deal_pass)`` for a session, creating its deck on first use."""
+    db.execute(
+        'INSERT OR IGNORE INTO session_decks (session_id, domain_bits) VALUES (?, ?)',
+        (session_id, domain_bits(max_id))
+    )
+    row = db.execute(
+        'SELECT domain_bits, cursor, deal_pass FROM session_decks WHERE session_id = ?',
+        (session_id,)
+    ).fetchone()
+    return row['domain_bits'], row['cursor'], row['deal_pass']
+
+
+def _answered(db, session_id):
+    """Ids of the questions a session has answered."""
+    return {row['question_id'] for row in db.execute(
+        'SELECT question_id FROM user_answers WHERE session_id = ?', (session_id,)
+    )}
+
+
+def deal_question_ids(db, session_id, count=1):
+    """Deal the ids of the next ``count`` questions of a session's deck.
+
+    Ids are returned in deck order; the list is shorter than ``count`` at
+    the end of a pass, and empty once every question of the bank has been
+    answered in the session.  The first
+    pass over the deck only touches the session's cursor, with existence
+    checked against the in-process question index.  When a pass runs dry,
+    the deck is re-sized to the current bank and a new pass starts that
+    skips the questions the session has answered, so questions added since
+    and cards dealt but never answered come round again.
+    """
+    index = get_question_index(get_catalog_db())
+    bank = index.ids()
+    if not bank:
+        return []
+    max_id = bank[-1]
+
+    seed = session_seed(current_app.config['SECRET_KEY'], session_id)
+    for _ in range(MAX_CURSOR_RETRIES):
+        bits, cursor, deal_pass = loaded = _load_cursor(db, session_id, max_id)
+        answered = _answered(db, session_id) if deal_pass else None
+        deck = Deck(seed, bits)
+
+        dealt = []
+        position = cursor
+        while len(dealt) < count:
+            if position >= deck.size:
+                # The pass ran dry.  A deal that already got cards from it
+                # stops there, so it hands out no card twice; otherwise start
+                # another pass if anything is left unanswered.
+                if dealt:
+                    break
+                if answered is None:
+                    answered = _answered(db, session_id)
+                if all(qid in answered for qid in bank):
+                    break
+                bits, position, deal_pass = domain_bits(max_id), 0, deal_pass + 1
+                deck = Deck(seed, bits)
+            question_id = deck.card(position) + 1
+            position += 1
+            if (question_id <= max_id and index.contains(None, question_id)
+                    and not (deal_pass and question_id in answered)):
+                dealt.append(question_id)
+
+        # Only move the deck on if no concurrent request moved it meanwhile
+        updated = db.execute(
+            'UPDATE session_decks SET domain_bits = ?, cursor = ?, deal_pass = ? '
+            'WHERE session_id = ? AND domain_bits = ? AND cursor = ? AND deal_pass = ?',
+            (bits, position, deal_pass, session_id) + loaded
+        )
+        db.commit()
+        if updated.rowcount:
+            return dealt
+
+    current_app.logger.warning(f"Deck cursor for session {session_id} kept moving, giving up")
+    return []
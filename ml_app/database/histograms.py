@@ -0,0 +1,77 @@
+"""Percentiles of answer times from the time_taken histograms.
+
+Triggers on ``user_answers`` count every answer's ``time_taken`` into the
+fixed log-scale buckets of ``time_buckets``, per question and per concept.
+A percentile is read from those few dozen counters, interpolating linearly
+inside the bucket it falls in, so it costs the same however many answers
+there are.  Its error is bounded by the bucket width, about a quarter of
+the value.
+"""
+import threading
+
+from .db import get_db
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+_HISTOGRAM_QUERIES = {
+    'question': 'SELECT bucket, count FROM question_time_histogram '
+                'WHERE question_id = ? AND count > 0 ORDER BY bucket',
+    'concept': 'SELECT bucket, count FROM concept_time_histogram '
+               'WHERE concept_id = ? AND count > 0 ORDER BY bucket',
+}
+
+_bounds = None
+_bounds_lock = threading.Lock()
+
+
+def bucket_bounds(db):
+    """Return ``[(lower, upper)]`` by bucket; ``upper`` is None for the open bucket.
+
+    The bounds are fixed by the migration, so they are read once per process.
+    """
+    global _bounds
+    if _bounds is None:
+        with _bounds_lock:
+            if _bounds is None:
+                rows = db.execute('SELECT upper FROM time_buckets ORDER BY bucket').fetchall()
+                uppers = [row['upper'] for row in rows]
+                bounds = []
+                for i, upper in enumerate(uppers):
+                    lower = uppers[i - 1] if i else upper
+                    bounds.append((lower, upper if i < len(uppers) - 1 else None))
+                _bounds = bounds
+    return _bounds
+
+
+def percentiles(counts, bounds, quantiles=DEFAULT_QUANTILES):
+    """Estimate quantiles from ``[(bucket, count)]`` in bucket order.
+
+    Returns ``(total, [value or None per quantile])``.
+    """
+    total = sum(count for _, count in counts)
+    if not total:
+        return 0, [None for _ in quantiles]
+    values = []
+    for quantile in quantiles:
+        rank = quantile * total
+        seen = 0
+        for bucket, count in counts:
+            if seen + count >= rank:
+                lower, upper = bounds[bucket]
+                if upper is None:
+                    value = lower  # open bucket: only its lower bound is known
+                else:
+                    value = lower + (upper - lower) * (rank - seen) / count
+                values.append(round(value, 2))
+                break
+            seen += count
+    return total, values
+
+
+def time_percentiles(kind, entity_id, quantiles=DEFAULT_QUANTILES, db=None):
+    """Percentiles of ``time_taken`` for a ``'question'`` or ``'concept'``."""
+    if db is None:
+        db = get_db()
+    counts = [(row['bucket'], row['count'])
+              for row in db.execute(_HISTOGRAM_QUERIES[kind], (entity_id,))]
+    return percentiles(counts, bucket_bounds(db), quantiles)
@@ -0,0 +1,365 @@
+"""Parallel, incremental import of question bank files.
+
+Each file is parsed and validated in a worker process (``validate_question``,
+the generator's rules, then the checks the schema needs) and its rows are
+normalized there, content hash included.  Workers send rows in batches over
+a bounded queue to the importing process, which is the only writer: every
+batch goes through one ``QuestionWriter`` transaction, so parsing uses the
+available cores while SQLite sees a single connection writing large
+batches.  An import that fails (a worker or a write raising) rolls back
+and leaves the bank as it was.  A file that cannot be parsed to the end
+is not a failure: its error is reported, the questions before it are
+kept, and as its manifest entry is not updated it is read in full again
+next time.
+
+The ``import_files`` and ``import_file_questions`` tables are the import
+manifest.  A file whose size and mtime match its manifest entry is skipped
+without being opened, and one whose content hash matches is skipped without
+being parsed.  A changed file is applied as a diff against the questions
+it listed last time: new questions are inserted, questions whose wording,
+option order, answer, explanation, hint, difficulty or concept changed are
+updated in place, and questions it no longer lists are removed unless
+another file still lists them or they have been answered.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import queue as queues
+import time
+from collections import Counter, namedtuple
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .bank_files import iter_questions, validate_question
+from .setup_db import QuestionWriter, question_row
+
+# Rows a worker sends to the writer per message
+IMPORT_BATCH = 2000
+
+# Batches queued per worker before the workers wait for the writer
+QUEUE_BATCHES_PER_WORKER = 4
+
+# Seconds the writer waits on the queue before checking on the workers
+_POLL_INTERVAL = 0.5
+
+# Bytes read per step while hashing a file
+_HASH_CHUNK = 1 << 20
+
+_UPSERT_MANIFEST_QUESTION = '''
+    INSERT INTO import_file_questions (path, content_hash, record_hash, import_run)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (path, content_hash) DO UPDATE SET
+        record_hash = excluded.record_hash,
+        import_run = excluded.import_run
+'''
+
+_UPSERT_MANIFEST_FILE = '''
+    INSERT INTO import_files (path, size, mtime, file_hash, questions)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (path) DO UPDATE SET
+        size = excluded.size,
+        mtime = excluded.mtime,
+        file_hash = excluded.file_hash,
+        questions = excluded.questions,
+        imported_at = CURRENT_TIMESTAMP
+'''
+
+_UPDATE_QUESTION = '''
+    UPDATE questions SET
+        text = ?,
+        options = ?,
+        correct_answer = ?,
+        explanation = ?,
+        hint = ?,
+        difficulty = ?,
+        concept_id = (SELECT id FROM concepts WHERE name = ?)
+    WHERE content_hash = ?
+'''
+
+# Removed only once no file lists it, and never once it has answers
+_REMOVE_QUESTION = '''
+    DELETE FROM questions
+    WHERE content_hash = ?
+      AND NOT EXISTS (SELECT 1 FROM import_file_questions m WHERE m.content_hash = questions.content_hash)
+      AND NOT EXISTS (SELECT 1 FROM user_answers a WHERE a.question_id = questions.id)
+'''
+
+_queue = None
+
+# What a worker reports once it is through with a file
+ParseResult = namedtuple(
+    'ParseResult', 'read rejections seconds error size mtime file_hash unchanged'
+)
+
+
+class FileReport:
+    """What importing one bank file read, wrote and rejected."""
+
+    __slots__ = ('path', 'read', 'inserted', 'duplicates', 'updated', 'removed', 'rejections',
+                 'parse_seconds', 'error', 'unchanged')
+
+    def __init__(self, path):
+        self.path = path
+        self.read = self.inserted = self.duplicates = self.updated = self.removed = 0
+        self.rejections = Counter()
+        self.parse_seconds = 0.0
+        self.error = None
+        self.unchanged = False
+
+    @property
+    def rejected(self):
+        return sum(self.rejections.values())
+
+    @property
+    def rows_per_sec(self):
+        return self.read / self.parse_seconds if self.parse_seconds else 0.0
+
+    def __str__(self):
+        if self.unchanged:
+            return "unchanged, skipped"
+        summary = (f"read {self.read}, inserted {self.inserted}, duplicates {self.duplicates}, "
+                   f"updated {self.updated}, removed {self.removed}, "
+                   f"rejected {self.rejected}, parsed in {self.parse_seconds:.2f}s "
+                   f"({self.rows_per_sec:,.0f} rows/sec)")
+        if self.error:
+            summary += f"; stopped early: {self.error}"
+        return summary
+
+
+def file_hash(path):
+    """Return the hex hash of a file's bytes."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def record_hash(concept, values):
+    """Hash a ``question_row`` as the file wrote it.
+
+    The content hash folds case and whitespace and sorts the options, so
+    the raw text and options are hashed too: reordered options, or case
+    and spacing edits, are changes to write.
+    """
+    text, options, correct_answer, explanation, hint, difficulty, _ = values
+    data = json.dumps([concept, text, options, correct_answer, explanation, hint, difficulty])
+    return hashlib.blake2b(data.encode('utf8'), digest_size=16).hexdigest()
+
+
+def manifest_key(path):
+    """The manifest's name for a file: its resolved absolute path."""
+    return os.path.realpath(path)
+
+
+def _init_worker(queue):
+    global _queue
+    _queue = queue
+
+
+def parse_file(path, batch_size=IMPORT_BATCH, known_hash=None, send=None):
+    """Parse and validate one bank file, sending ``('rows', path, rows, record_hashes)`` batches.
+
+    Ends with a ``('done', path, ParseResult)`` message.  A file whose
+    content hash is ``known_hash`` is reported unchanged without being
+    parsed.  A file that cannot be read or parsed to the end reports the
+    error; the rows before it are still sent.
+    """
+    send = send or _queue.put
+    started = time.perf_counter()
+    read, rejections, batch, hashes, error = 0, Counter(), [], [], None
+    size = mtime = digest = None
+    try:
+        stat = os.stat(path)
+        size, mtime = stat.st_size, stat.st_mtime
+        digest = file_hash(path)
+        if digest == known_hash:
+            send(('done', path, ParseResult(0, {}, time.perf_counter() - started, None,
+                                            size, mtime, digest, True)))
+            return
+        for record in iter_questions(path):
+            read += 1
+            if isinstance(record, dict) and isinstance(record.get('correct'), str):
+                # Banks also write the answer as 'B) option text'
+                record['correct'] = record['correct'].strip()[:1].upper()
+            problem = validate_question(record)
+            row = None if problem else question_row(record)
+            if row is None:
+                # Group by the kind of problem, not the offending value
+                rejections[(problem or 'Invalid difficulty').split(':')[0]] += 1
+                continue
+            batch.append(row)
+            hashes.append(record_hash(*row))
+            if len(batch) >= batch_size:
+                send(('rows', path, batch, hashes))
+                batch, hashes = [], []
+    except (OSError, ValueError) as e:
+        error = str(e)
+    if batch:
+        send(('rows', path, batch, hashes))
+    send(('done', path, ParseResult(read, dict(rejections), time.perf_counter() - started, error,
+                                    size, mtime, digest, False)))
+
+
+def _manifest(db, keys):
+    entries = {}
+    keys = list(keys)
+    for start in range(0, len(keys), 500):
+        part = keys[start:start + 500]
+        placeholders = ','.join('?' * len(part))
+        entries.update((row['path'], row) for row in db.execute(
+            f'SELECT path, size, mtime, file_hash FROM import_files WHERE path IN ({placeholders})',
+            part
+        ))
+    return entries
+
+
+def import_files(db, paths, workers=None, batch_size=IMPORT_BATCH, defer=None, full=False,
+                 progress=None):
+    """Import bank files in parallel; return their ``FileReport``s in the order given.
+
+    Files the manifest shows unchanged are skipped, unless ``full`` asks
+    for every file to be read and compared again.  ``workers`` defaults to
+    one process per CPU, and is never more than the number of files to
+    read.  ``defer`` (by default, when no file has been imported before)
+    drops the question triggers and indexes for the load; re-imports keep
+    them, as rebuilding them would cost more than a small diff.
+    ``progress`` is called with each file's report once it is written.
+    """
+    paths = list(dict.fromkeys(paths))
+    reports = {path: FileReport(path) for path in paths}
+    keys = {path: manifest_key(path) for path in paths}
+    manifest = _manifest(db, keys.values())
+
+    tasks = []
+    for path in paths:
+        entry = manifest.get(keys[path])
+        if entry is not None and not full:
+            stat = os.stat(path)
+            if entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                reports[path].unchanged = True
+                if progress is not None:
+                    progress(reports[path])
+                continue
+        tasks.append((path, batch_size, entry['file_hash'] if entry is not None and not full else None))
+    if not tasks:
+        return [reports[path] for path in paths]
+
+    if defer is None:
+        defer = not any(keys[path] in manifest for path, _, _ in tasks)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    context = multiprocessing.get_context()
+    queue = context.Queue(maxsize=workers * QUEUE_BATCHES_PER_WORKER)
+
+    with context.Pool(workers, initializer=_init_worker, initargs=(queue,)) as pool, \
+            QuestionWriter(db, defer) as writer:
+        run = db.execute('SELECT COALESCE(MAX(import_run), 0) + 1 FROM import_file_questions').fetchone()[0]
+        changed = []  # (path, row) of questions whose record changed
+        removed = []  # (path, content_hash) of questions a file no longer lists
+        parsing = pool.starmap_async(parse_file, tasks)
+        pending = len(tasks)
+        while pending:
+            try:
+                message = queue.get(timeout=_POLL_INTERVAL)
+            except queues.Empty:
+                if parsing.ready() and not parsing.successful():
+                    parsing.get()  # re-raises the worker's error
+                continue
+            path, report, key = message[1], reports[message[1]], keys[message[1]]
+            if message[0] == 'rows':
+                rows, hashes = message[2], message[3]
+                inserted = writer.write(rows)
+                report.inserted += inserted
+                report.duplicates += len(rows) - inserted
+                if key in manifest:
+                    placeholders = ','.join('?' * len(rows))
+                    previous = dict(db.execute(
+                        'SELECT content_hash, record_hash FROM import_file_questions '
+                        f'WHERE path = ? AND content_hash IN ({placeholders})',
+                        [key] + [values[6] for _, values in rows]
+                    ).fetchall())
+                    changed.extend(
+                        (path, row) for row, new in zip(rows, hashes)
+                        if previous.get(row[1][6], new) != new
+                    )
+                db.executemany(_UPSERT_MANIFEST_QUESTION, [
+                    (key, values[6], new, run) for (_, values), new in zip(rows, hashes)
+                ])
+                continue
+
+            result = message[2]
+            report.read, report.parse_seconds, report.error = result.read, result.seconds, result.error
+            report.rejections.update(result.rejections)
+            report.unchanged = result.unchanged
+            if result.unchanged:
+                db.execute('UPDATE import_files SET size = ?, mtime = ? WHERE path = ?',
+                           (result.size, result.mtime, key))
+            elif result.error is None:
+                # Whatever the file listed before and not in this run is gone
+                gone = [row[0] for row in db.execute(
+                    'SELECT content_hash FROM import_file_questions WHERE path = ? AND import_run <> ?',
+                    (key, run)
+                )]
+                db.execute('DELETE FROM import_file_questions WHERE path = ? AND import_run <> ?',
+                           (key, run))
+                removed.extend((path, content_hash) for content_hash in gone)
+                listed = db.execute('SELECT COUNT(*) FROM import_file_questions WHERE path = ?',
+                                    (key,)).fetchone()[0]
+                db.execute(_UPSERT_MANIFEST_FILE,
+                           (key, result.size, result.mtime, result.file_hash, listed))
+            pending -= 1
+
+        # Edits and removals go through the live triggers, so counters and
+        # versions follow them
+        writer.restore()
+        for path, (concept, values) in changed:
+            reports[path].updated += db.execute(
+                _UPDATE_QUESTION, (*values[:6], concept, values[6])
+            ).rowcount
+        for path, content_hash in removed:
+            reports[path].removed += db.execute(_REMOVE_QUESTION, (content_hash,)).rowcount
+
+    if progress is not None:
+        for path, _, _ in tasks:
+            progress(reports[path])
+    return [reports[path] for path in paths]
+
+
+@click.command('import-questions')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--workers', type=int, default=None,
+              help='Parsing processes (default: one per CPU, at most one per file).')
+@click.option('--batch-size', default=IMPORT_BATCH, show_default=True,
+              help='Rows per batch sent to the writer.')
+@click.option('--full', is_flag=True,
+              help='Read every file, even those the manifest shows unchanged.')
+@with_appcontext
+def import_questions_command(paths, workers, batch_size, full):
+    """Import question bank files (JSON list, concepts map or JSON Lines)."""
+    from .db import get_db
+
+    def report(file_report):
+        click.echo(f"{file_report.path}: {file_report}")
+        for reason, count in file_report.rejections.most_common():
+            click.echo(f"  rejected {count}: {reason}")
+
+    started = time.perf_counter()
+    reports = import_files(get_db(), paths, workers, batch_size, full=full, progress=report)
+    seconds = time.perf_counter() - started
+    read = sum(r.read for r in reports)
+    inserted = sum(r.inserted for r in reports)
+    rejected = sum(r.rejected for r in reports)
+    rate = read / seconds if seconds else 0.0
+    current_app.logger.info(
+        f"Imported {inserted} of {read} questions from {len(reports)} files in {seconds:.2f}s"
+    )
+    click.echo(f"Imported {inserted} new questions of {read} read ({rejected} rejected) "
+               f"from {len(reports)} files in {seconds:.2f}s ({rate:,.0f} rows/sec).")
+
+
+def init_app(app):
+    """Register the import command with the app."""
+    app.cli.add_command(import_questions_command)
@@ -0,0 +1,84 @@
+"""Leaderboard queries.
+
+Scores live in the trigger-maintained ``leaderboard`` table, one row per
+session and per named user for each span: the day and the week an answer
+was given in, and all time.  Weeks are ISO 8601 weeks (``YYYY-Www``,
+Monday to Sunday).  The top of a board is an index range scan in rank
+order; a single entry's rank is one plus the number of entries with a
+higher score, summed from ``leaderboard_score_counts``.  Ties share a rank.
+
+That sum reads one row per distinct score above the entry, so a rank costs
+time linear in the number of distinct scores, not logarithmic in the
+number of entries.  Scores are counts of correct answers in the period,
+so even a board of millions of entries spans a few hundred distinct
+scores.  A Fenwick tree over scores would make it logarithmic, at the
+cost of that many extra writes on every answer.
+"""
+from datetime import datetime, timezone
+
+SPANS = ('day', 'week', 'all')
+ENTITIES = ('session', 'user')
+
+
+def current_period(span, now=None):
+    """The period key of ``span`` that ``now`` (UTC) falls in, as the triggers write it."""
+    if span not in SPANS:
+        raise ValueError(f"Unknown leaderboard span: {span}")
+    now = now or datetime.now(timezone.utc)
+    if span == 'day':
+        return now.strftime('%Y-%m-%d')
+    if span == 'week':
+        year, week, _ = now.isocalendar()
+        return f'{year}-W{week:02d}'
+    return ''
+
+
+def top_entries(db, span, entity, period, limit=10):
+    """Return the first ``limit`` entries of a board as dicts with their rank."""
+    rows = db.execute(
+        'SELECT entity_id, score, answered, total_time FROM leaderboard '
+        'WHERE span = ? AND period = ? AND entity = ? AND answered > 0 '
+        'ORDER BY score DESC, total_time, entity_id '
+        'LIMIT ?',
+        (span, period, entity, limit)
+    ).fetchall()
+
+    entries = []
+    for position, row in enumerate(rows, start=1):
+        # Competition ranking: an entry tied with the one above shares its rank
+        if entries and entries[-1]['score'] == row['score']:
+            rank = entries[-1]['rank']
+        else:
+            rank = position
+        entries.append({
+            'rank': rank,
+            'id': row['entity_id'],
+            'score': row['score'],
+            'answered': row['answered'],
+            'totalTime': row['total_time'],
+        })
+    return entries
+
+
+def entry_rank(db, span, entity, entity_id, period):
+    """Return ``{'rank', 'score', 'answered', 'entries'}`` for one entry, or None."""
+    row = db.execute(
+        'SELECT score, answered FROM leaderboard '
+        'WHERE span = ? AND period = ? AND entity = ? AND entity_id = ?',
+        (span, period, entity, entity_id)
+    ).fetchone()
+    if row is None or not row['answered']:
+        return None
+    counts = db.execute(
+        'SELECT COALESCE(SUM(CASE WHEN score > ? THEN entries ELSE 0 END), 0) AS above, '
+        'COALESCE(SUM(entries), 0) AS entries '
+        'FROM leaderboard_score_counts '
+        'WHERE span = ? AND period = ? AND entity = ?',
+        (row['score'], span, period, entity)
+    ).fetchone()
+    return {
+        'rank': counts['above'] + 1,
+        'score': row['score'],
+        'answered': row['answered'],
+        'entries': counts['entries'],
+    }
@@ -0,0 +1,127 @@
+"""Numbered schema migrations.
+
+Migrations are the SQL files in ``migrations/``, named ``NNNN_name.sql``
+and applied in order.  Each one runs in its own write transaction together
+with its row in ``schema_version``, so a database is always at a whole
+migration, and several workers starting at once apply each migration once.
+Migrations only ever add to the schema or move data forward; existing
+data is kept.
+"""
+import os
+import re
+import sqlite3
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from . import content_hash
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+
+_MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+
+def available_migrations(directory=MIGRATIONS_DIR):
+    """Return ``[(version, name, path)]`` for the migration files, in order."""
+    migrations = {}
+    for filename in os.listdir(directory):
+        match = _MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Duplicate migration number {version:04d}")
+        migrations[version] = (version, match.group(2), os.path.join(directory, filename))
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def split_statements(sql):
+    """Split a script into complete statements, keeping trigger bodies whole."""
+    statements, pending = [], ""
+    for line in sql.splitlines(keepends=True):
+        pending += line
+        if sqlite3.complete_statement(pending):
+            statements.append(pending.strip())
+            pending = ""
+    leftover = [
+        line for line in pending.splitlines()
+        if line.strip() and not line.strip().startswith("--")
+    ]
+    if leftover:
+        raise ValueError("Migration ends with an incomplete statement")
+    return statements
+
+
+def ensure_version_table(db):
+    """Create the ``schema_version`` table if the database has none yet."""
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, "
+        "name TEXT NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    )
+    db.commit()
+
+
+def schema_version(db):
+    """Return the number of the last migration applied, 0 for none."""
+    ensure_version_table(db)
+    row = db.execute("SELECT MAX(version) AS version FROM schema_version").fetchone()
+    return row["version"] or 0
+
+
+def upgrade(db, target=None, directory=MIGRATIONS_DIR, logger=None):
+    """Apply the pending migrations up to ``target``; return ``[(version, name)]`` applied."""
+    ensure_version_table(db)
+    # SQL functions the migrations' backfills call
+    content_hash.register(db)
+    done = {row["version"] for row in db.execute("SELECT version FROM schema_version")}
+    applied = []
+    for version, name, path in available_migrations(directory):
+        if target is not None and version > target:
+            break
+        if version in done:
+            continue
+        with open(path, encoding="utf8") as f:
+            statements = split_statements(f.read())
+
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have applied it while we waited for the lock
+            if db.execute(
+                "SELECT 1 FROM schema_version WHERE version = ?", (version,)
+            ).fetchone():
+                db.rollback()
+                continue
+            for statement in statements:
+                db.execute(statement)
+            db.execute(
+                "INSERT INTO schema_version (version, name) VALUES (?, ?)", (version, name)
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        applied.append((version, name))
+        if logger is not None:
+            logger.info(f"Applied migration {version:04d}_{name}")
+    return applied
+
+
+@click.command("db-upgrade")
+@click.option("--target", type=int, default=None, help="Stop after this migration number.")
+@with_appcontext
+def db_upgrade_command(target):
+    """Apply pending schema migrations."""
+    from .db import get_db
+
+    db = get_db()
+    applied = upgrade(db, target, logger=current_app.logger)
+    for version, name in applied:
+        click.echo(f"Applied {version:04d}_{name}")
+    merged = content_hash.merge_summary(db, applied)
+    if merged:
+        click.echo(f"{merged}.")
+    click.echo(f"Database is at schema version {schema_version(db)}.")
+
@@ -0,0 +1,259 @@
+-- 0001: baseline schema
+--
+-- Creates whatever is missing, so it applies both to an empty database and
+-- to one created by the old schema.sql, whose answers are then summed into
+-- the summary tables the triggers maintain from here on.
+
+-- Create concepts table
+CREATE TABLE IF NOT EXISTS concepts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    description TEXT
+);
+
+-- Create questions table
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text TEXT NOT NULL,
+    options TEXT NOT NULL,  -- JSON array of options
+    correct_answer INTEGER NOT NULL,  -- Index of correct option (0-3)
+    explanation TEXT,
+    hint TEXT,
+    difficulty TEXT CHECK(difficulty IN ('easy', 'medium', 'hard')) NOT NULL,
+    concept_id INTEGER,
+    FOREIGN KEY (concept_id) REFERENCES concepts (id)
+);
+
+-- Create bank_version table (single row, bumped on every question change)
+CREATE TABLE IF NOT EXISTS bank_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO bank_version (id, version) VALUES (1, 0);
+
+-- Create sessions table
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    user_name TEXT NOT NULL,
+    start_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    end_time TIMESTAMP
+);
+
+-- Create user_answers table
+CREATE TABLE IF NOT EXISTS user_answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    answer INTEGER NOT NULL,  -- Index of selected option (0-3)
+    is_correct BOOLEAN NOT NULL,
+    time_taken INTEGER NOT NULL,  -- in seconds
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (session_id) REFERENCES sessions (id),
+    FOREIGN KEY (question_id) REFERENCES questions (id)
+);
+
+-- Create session_decks table (cursor into each session's question permutation)
+CREATE TABLE IF NOT EXISTS session_decks (
+    session_id TEXT PRIMARY KEY,
+    domain_bits INTEGER NOT NULL,  -- width of the permuted id space
+    cursor INTEGER NOT NULL DEFAULT 0  -- next deck position to deal
+);
+
+-- Per-session progress summaries, maintained by triggers on user_answers
+CREATE TABLE IF NOT EXISTS session_stats (
+    session_id TEXT PRIMARY KEY,
+    total_questions INTEGER NOT NULL DEFAULT 0,
+    correct_answers INTEGER NOT NULL DEFAULT 0,
+    total_time INTEGER NOT NULL DEFAULT 0,  -- in seconds
+    started_at TIMESTAMP  -- start_time of the matching sessions row, if any
+);
+
+CREATE TABLE IF NOT EXISTS session_concept_stats (
+    session_id TEXT NOT NULL,
+    concept_id INTEGER NOT NULL,
+    attempted INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, concept_id),
+    FOREIGN KEY (concept_id) REFERENCES concepts (id)
+);
+
+CREATE TABLE IF NOT EXISTS session_difficulty_stats (
+    session_id TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    attempted INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, difficulty)
+);
+
+-- Daily answer rollups, maintained by triggers on user_answers
+CREATE TABLE IF NOT EXISTS daily_stats (
+    day TEXT PRIMARY KEY,  -- YYYY-MM-DD, from user_answers.timestamp
+    answers INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    total_time INTEGER NOT NULL DEFAULT 0  -- in seconds
+);
+
+CREATE TABLE IF NOT EXISTS daily_concept_stats (
+    day TEXT NOT NULL,
+    concept_id INTEGER NOT NULL,
+    answers INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    total_time INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (concept_id, day),
+    FOREIGN KEY (concept_id) REFERENCES concepts (id)
+);
+
+-- Create question_feedback table
+CREATE TABLE IF NOT EXISTS question_feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    question_id INTEGER NOT NULL,
+    feedback TEXT NOT NULL,
+    type TEXT DEFAULT 'general' CHECK(type IN ('general', 'error', 'improvement', 'flag')),
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (question_id) REFERENCES questions (id)
+);
+
+-- Create indexes
+CREATE INDEX IF NOT EXISTS idx_user_answers_session ON user_answers(session_id);
+CREATE INDEX IF NOT EXISTS idx_user_answers_question ON user_answers(question_id);
+CREATE INDEX IF NOT EXISTS idx_questions_concept ON questions(concept_id);
+CREATE INDEX IF NOT EXISTS idx_feedback_question ON question_feedback(question_id);
+CREATE INDEX IF NOT EXISTS idx_session_stats_started ON session_stats(started_at);
+
+-- Bump the bank version whenever the question bank changes
+CREATE TRIGGER IF NOT EXISTS trg_questions_insert_version AFTER INSERT ON questions
+BEGIN
+    UPDATE bank_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_questions_update_version AFTER UPDATE ON questions
+BEGIN
+    UPDATE bank_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_questions_delete_version AFTER DELETE ON questions
+BEGIN
+    UPDATE bank_version SET version = version + 1 WHERE id = 1;
+END;
+
+-- Keep the per-session summaries in step with user_answers
+CREATE TRIGGER IF NOT EXISTS trg_user_answers_insert_session_stats AFTER INSERT ON user_answers
+BEGIN
+    INSERT INTO session_stats (session_id, total_questions, correct_answers, total_time, started_at)
+    VALUES (
+        NEW.session_id, 1, CASE WHEN NEW.is_correct THEN 1 ELSE 0 END, NEW.time_taken,
+        (SELECT start_time FROM sessions WHERE id = NEW.session_id)
+    )
+    ON CONFLICT (session_id) DO UPDATE SET
+        total_questions = total_questions + 1,
+        correct_answers = correct_answers + excluded.correct_answers,
+        total_time = total_time + excluded.total_time;
+
+    INSERT INTO session_concept_stats (session_id, concept_id, attempted, correct)
+    SELECT NEW.session_id, q.concept_id, 1, CASE WHEN NEW.is_correct THEN 1 ELSE 0 END
+    FROM questions q
+    WHERE q.id = NEW.question_id AND q.concept_id IS NOT NULL
+    ON CONFLICT (session_id, concept_id) DO UPDATE SET
+        attempted = attempted + 1,
+        correct = correct + excluded.correct;
+
+    INSERT INTO session_difficulty_stats (session_id, difficulty, attempted, correct)
+    SELECT NEW.session_id, q.difficulty, 1, CASE WHEN NEW.is_correct THEN 1 ELSE 0 END
+    FROM questions q
+    WHERE q.id = NEW.question_id
+    ON CONFLICT (session_id, difficulty) DO UPDATE SET
+        attempted = attempted + 1,
+        correct = correct + excluded.correct;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_answers_delete_session_stats AFTER DELETE ON user_answers
+BEGIN
+    UPDATE session_stats SET
+        total_questions = total_questions - 1,
+        correct_answers = correct_answers - CASE WHEN OLD.is_correct THEN 1 ELSE 0 END,
+        total_time = total_time - OLD.time_taken
+    WHERE session_id = OLD.session_id;
+
+    UPDATE session_concept_stats SET
+        attempted = attempted - 1,
+        correct = correct - CASE WHEN OLD.is_correct THEN 1 ELSE 0 END
+    WHERE session_id = OLD.session_id
+      AND concept_id = (SELECT concept_id FROM questions WHERE id = OLD.question_id);
+
+    UPDATE session_difficulty_stats SET
+        attempted = attempted - 1,
+        correct = correct - CASE WHEN OLD.is_correct THEN 1 ELSE 0 END
+    WHERE session_id = OLD.session_id
+      AND difficulty = (SELECT difficulty FROM questions WHERE id = OLD.question_id);
+END;
+
+-- Keep the daily rollups in step with user_answers
+CREATE TRIGGER IF NOT EXISTS trg_user_answers_insert_daily_stats AFTER INSERT ON user_answers
+BEGIN
+    INSERT INTO daily_stats (day, answers, correct, total_time)
+    VALUES (DATE(NEW.timestamp), 1, CASE WHEN NEW.is_correct THEN 1 ELSE 0 END, NEW.time_taken)
+    ON CONFLICT (day) DO UPDATE SET
+        answers = answers + 1,
+        correct = correct + excluded.correct,
+        total_time = total_time + excluded.total_time;
+
+    INSERT INTO daily_concept_stats (day, concept_id, answers, correct, total_time)
+    SELECT DATE(NEW.timestamp), q.concept_id, 1, CASE WHEN NEW.is_correct THEN 1 ELSE 0 END, NEW.time_taken
+    FROM questions q
+    WHERE q.id = NEW.question_id AND q.concept_id IS NOT NULL
+    ON CONFLICT (concept_id, day) DO UPDATE SET
+        answers = answers + 1,
+        correct = correct + excluded.correct,
+        total_time = total_time + excluded.total_time;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_answers_delete_daily_stats AFTER DELETE ON user_answers
+BEGIN
+    UPDATE daily_stats SET
+        answers = answers - 1,
+        correct = correct - CASE WHEN OLD.is_correct THEN 1 ELSE 0 END,
+        total_time = total_time - OLD.time_taken
+    WHERE day = DATE(OLD.timestamp);
+
+    UPDATE daily_concept_stats SET
+        answers = answers - 1,
+        correct = correct - CASE WHEN OLD.is_correct THEN 1 ELSE 0 END,
+        total_time = total_time - OLD.time_taken
+    WHERE day = DATE(OLD.timestamp)
+      AND concept_id = (SELECT concept_id FROM questions WHERE id = OLD.question_id);
+END;
+
+
+-- Fill the summaries for answers recorded before their triggers existed;
+-- rows already maintained by the triggers are left as they are
+INSERT OR IGNORE INTO session_stats (session_id, total_questions, correct_answers, total_time, started_at)
+SELECT ua.session_id, COUNT(*), SUM(CASE WHEN ua.is_correct THEN 1 ELSE 0 END), SUM(ua.time_taken),
+       (SELECT start_time FROM sessions WHERE id = ua.session_id)
+FROM user_answers ua
+GROUP BY ua.session_id;
+
+INSERT OR IGNORE INTO session_concept_stats (session_id, concept_id, attempted, correct)
+SELECT ua.session_id, q.concept_id, COUNT(*), SUM(CASE WHEN ua.is_correct THEN 1 ELSE 0 END)
+FROM user_answers ua
+JOIN questions q ON q.id = ua.question_id
+WHERE q.concept_id IS NOT NULL
+GROUP BY ua.session_id, q.concept_id;
+
+INSERT OR IGNORE INTO session_difficulty_stats (session_id, difficulty, attempted, correct)
+SELECT ua.session_id, q.difficulty, COUNT(*), SUM(CASE WHEN ua.is_correct THEN 1 ELSE 0 END)
+FROM user_answers ua
+JOIN questions q ON q.id = ua.question_id
+GROUP BY ua.session_id, q.difficulty;
+
+INSERT OR IGNORE INTO daily_stats (day, answers, correct, total_time)
+SELECT DATE(timestamp), COUNT(*), SUM(CASE WHEN is_correct THEN 1 ELSE 0 END), SUM(time_taken)
+FROM user_answers
+GROUP BY DATE(timestamp);
+
+INSERT OR IGNORE INTO daily_concept_stats (day, concept_id, answers, correct, total_time)
+SELECT DATE(ua.timestamp), q.concept_id, COUNT(*), SUM(CASE WHEN ua.is_correct THEN 1 ELSE 0 END),
+       SUM(ua.time_taken)
+FROM user_answers ua
+JOIN questions q ON q.id = ua.question_id
+WHERE q.concept_id IS NOT NULL
+GROUP BY DATE(ua.timestamp), q.concept_id;
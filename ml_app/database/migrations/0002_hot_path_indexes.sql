@@ -0,0 +1,18 @@
+-- 0002: composite indexes for the hot queries
+--
+-- Each replaces a single-column index that is a prefix of it.
+
+-- Duplicate-answer checks and the answered-set look-ups of a session
+CREATE INDEX IF NOT EXISTS idx_user_answers_session_question ON user_answers(session_id, question_id);
+DROP INDEX IF EXISTS idx_user_answers_session;
+
+-- Recent activity and date-range reads
+CREATE INDEX IF NOT EXISTS idx_user_answers_timestamp ON user_answers(timestamp);
+
+-- Per-question attempt and success-rate aggregates, answered from the index
+CREATE INDEX IF NOT EXISTS idx_user_answers_question_correct ON user_answers(question_id, is_correct);
+DROP INDEX IF EXISTS idx_user_answers_question;
+
+-- Concept listings, filtered by difficulty and walked in id order
+CREATE INDEX IF NOT EXISTS idx_questions_concept_difficulty ON questions(concept_id, difficulty, id);
+DROP INDEX IF EXISTS idx_questions_concept;
@@ -0,0 +1,37 @@
+-- 0003: version counters for conditional requests
+--
+-- bank_version now also moves when concepts change, and answers_version
+-- moves with every recorded or deleted answer, so catalog responses can
+-- carry ETags that change exactly when their content can.
+
+CREATE TRIGGER IF NOT EXISTS trg_concepts_insert_version AFTER INSERT ON concepts
+BEGIN
+    UPDATE bank_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_concepts_update_version AFTER UPDATE ON concepts
+BEGIN
+    UPDATE bank_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_concepts_delete_version AFTER DELETE ON concepts
+BEGIN
+    UPDATE bank_version SET version = version + 1 WHERE id = 1;
+END;
+
+-- Create answers_version table (single row, bumped on every answer change)
+CREATE TABLE IF NOT EXISTS answers_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO answers_version (id, version) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS trg_user_answers_insert_version AFTER INSERT ON user_answers
+BEGIN
+    UPDATE answers_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_answers_delete_version AFTER DELETE ON user_answers
+BEGIN
+    UPDATE answers_version SET version = version + 1 WHERE id = 1;
+END;
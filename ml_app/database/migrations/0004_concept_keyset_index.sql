@@ -0,0 +1,5 @@
+-- 0004: index for keyset pages of a concept's questions
+--
+-- Concept listings are walked with concept_id = ? AND id > ? ORDER BY id;
+-- (concept_id, difficulty, id) cannot serve that order, so give it its own.
+CREATE INDEX IF NOT EXISTS idx_questions_concept_id ON questions(concept_id, id);
@@ -0,0 +1,86 @@
+-- 0005: attempt counters on questions and concepts
+--
+-- attempts, correct and total_time are kept current by triggers on
+-- user_answers, so the concept pages read them instead of aggregating
+-- the answer log.  flask repair-counters recomputes them.
+
+ALTER TABLE questions ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE questions ADD COLUMN correct INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE questions ADD COLUMN total_time INTEGER NOT NULL DEFAULT 0;  -- in seconds
+
+ALTER TABLE concepts ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE concepts ADD COLUMN correct INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE concepts ADD COLUMN total_time INTEGER NOT NULL DEFAULT 0;  -- in seconds
+
+-- Counter updates are not catalog changes: only bump the bank version
+-- when a column the catalog shows changes
+DROP TRIGGER IF EXISTS trg_questions_update_version;
+CREATE TRIGGER trg_questions_update_version
+AFTER UPDATE OF text, options, correct_answer, explanation, hint, difficulty, concept_id ON questions
+BEGIN
+    UPDATE bank_version SET version = version + 1 WHERE id = 1;
+END;
+
+DROP TRIGGER IF EXISTS trg_concepts_update_version;
+CREATE TRIGGER trg_concepts_update_version AFTER UPDATE OF name, description ON concepts
+BEGIN
+    UPDATE bank_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER trg_user_answers_insert_counters AFTER INSERT ON user_answers
+BEGIN
+    UPDATE questions SET
+        attempts = attempts + 1,
+        correct = correct + CASE WHEN NEW.is_correct THEN 1 ELSE 0 END,
+        total_time = total_time + NEW.time_taken
+    WHERE id = NEW.question_id;
+
+    UPDATE concepts SET
+        attempts = attempts + 1,
+        correct = correct + CASE WHEN NEW.is_correct THEN 1 ELSE 0 END,
+        total_time = total_time + NEW.time_taken
+    WHERE id = (SELECT concept_id FROM questions WHERE id = NEW.question_id);
+END;
+
+CREATE TRIGGER trg_user_answers_delete_counters AFTER DELETE ON user_answers
+BEGIN
+    UPDATE questions SET
+        attempts = attempts - 1,
+        correct = correct - CASE WHEN OLD.is_correct THEN 1 ELSE 0 END,
+        total_time = total_time - OLD.time_taken
+    WHERE id = OLD.question_id;
+
+    UPDATE concepts SET
+        attempts = attempts - 1,
+        correct = correct - CASE WHEN OLD.is_correct THEN 1 ELSE 0 END,
+        total_time = total_time - OLD.time_taken
+    WHERE id = (SELECT concept_id FROM questions WHERE id = OLD.question_id);
+END;
+
+-- A question moved to another concept takes its answers along
+CREATE TRIGGER trg_questions_move_counters AFTER UPDATE OF concept_id ON questions
+WHEN OLD.concept_id IS NOT NEW.concept_id
+BEGIN
+    UPDATE concepts SET
+        attempts = attempts - OLD.attempts,
+        correct = correct - OLD.correct,
+        total_time = total_time - OLD.total_time
+    WHERE id = OLD.concept_id;
+
+    UPDATE concepts SET
+        attempts = attempts + NEW.attempts,
+        correct = correct + NEW.correct,
+        total_time = total_time + NEW.total_time
+    WHERE id = NEW.concept_id;
+END;
+
+-- Count the answers recorded so far
+UPDATE questions SET
+    attempts = (SELECT COUNT(*) FROM user_answers WHERE question_id = questions.id),
+    correct = (SELECT COUNT(*) FROM user_answers WHERE question_id = questions.id AND is_correct),
+    total_time = (SELECT COALESCE(SUM(time_taken), 0) FROM user_answers WHERE question_id = questions.id);
+
+UPDATE concepts SET
+    attempts = (SELECT COALESCE(SUM(attempts), 0) FROM questions WHERE concept_id = concepts.id),
+    correct = (SELECT COALESCE(SUM(correct), 0) FROM questions WHERE concept_id = concepts.id),
+    total_time = (SELECT COALESCE(SUM(total_time), 0) FROM questions WHERE concept_id = concepts.id);
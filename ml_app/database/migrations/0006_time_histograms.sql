@@ -0,0 +1,80 @@
+-- 0006: log-scale histograms of time_taken
+--
+-- Answer times are counted into fixed buckets per question and per concept,
+-- so percentiles come from a few dozen counters instead of a scan of the
+-- answers.  Bucket bounds grow by about a quarter each step: 1 second wide
+-- at the bottom, twenty minutes wide at two hours, then one open bucket.
+
+-- Create time_buckets table (bucket b holds times in (upper of b - 1, upper])
+CREATE TABLE IF NOT EXISTS time_buckets (
+    bucket INTEGER PRIMARY KEY,
+    upper INTEGER NOT NULL UNIQUE  -- in seconds, inclusive
+);
+INSERT OR IGNORE INTO time_buckets (bucket, upper) VALUES
+    (0, 0), (1, 1), (2, 2), (3, 3), (4, 4), (5, 5), (6, 6), (7, 7),
+    (8, 8), (9, 10), (10, 12), (11, 15), (12, 18), (13, 22), (14, 27), (15, 33),
+    (16, 40), (17, 50), (18, 60), (19, 75), (20, 90), (21, 110), (22, 135), (23, 165),
+    (24, 200), (25, 250), (26, 300), (27, 370), (28, 450), (29, 550), (30, 670), (31, 820),
+    (32, 1000), (33, 1200), (34, 1500), (35, 1800), (36, 2200), (37, 2700), (38, 3300), (39, 4000),
+    (40, 5000), (41, 6000), (42, 7200), (43, 9223372036854775807);
+
+CREATE TABLE IF NOT EXISTS question_time_histogram (
+    question_id INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (question_id, bucket)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS concept_time_histogram (
+    concept_id INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (concept_id, bucket)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_answers_insert_time_histogram AFTER INSERT ON user_answers
+BEGIN
+    INSERT INTO question_time_histogram (question_id, bucket, count)
+    VALUES (
+        NEW.question_id,
+        (SELECT bucket FROM time_buckets WHERE upper >= NEW.time_taken ORDER BY upper LIMIT 1),
+        1
+    )
+    ON CONFLICT (question_id, bucket) DO UPDATE SET count = count + 1;
+
+    INSERT INTO concept_time_histogram (concept_id, bucket, count)
+    SELECT q.concept_id,
+           (SELECT bucket FROM time_buckets WHERE upper >= NEW.time_taken ORDER BY upper LIMIT 1),
+           1
+    FROM questions q
+    WHERE q.id = NEW.question_id AND q.concept_id IS NOT NULL
+    ON CONFLICT (concept_id, bucket) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_answers_delete_time_histogram AFTER DELETE ON user_answers
+BEGIN
+    UPDATE question_time_histogram SET count = count - 1
+    WHERE question_id = OLD.question_id
+      AND bucket = (SELECT bucket FROM time_buckets WHERE upper >= OLD.time_taken ORDER BY upper LIMIT 1);
+
+    UPDATE concept_time_histogram SET count = count - 1
+    WHERE concept_id = (SELECT concept_id FROM questions WHERE id = OLD.question_id)
+      AND bucket = (SELECT bucket FROM time_buckets WHERE upper >= OLD.time_taken ORDER BY upper LIMIT 1);
+END;
+
+-- Count the answers recorded so far
+INSERT OR IGNORE INTO question_time_histogram (question_id, bucket, count)
+SELECT question_id, bucket, COUNT(*)
+FROM (
+    SELECT ua.question_id,
+           (SELECT bucket FROM time_buckets WHERE upper >= ua.time_taken ORDER BY upper LIMIT 1) AS bucket
+    FROM user_answers ua
+)
+GROUP BY question_id, bucket;
+
+INSERT OR IGNORE INTO concept_time_histogram (concept_id, bucket, count)
+SELECT q.concept_id, h.bucket, SUM(h.count)
+FROM question_time_histogram h
+JOIN questions q ON q.id = h.question_id
+WHERE q.concept_id IS NOT NULL
+GROUP BY q.concept_id, h.bucket;
@@ -0,0 +1,110 @@
+-- 0007: leaderboard
+--
+-- leaderboard holds the score (correct answers) of every session and every
+-- named user per span: the day and week of the answer, and all time.
+-- Triggers on user_answers keep it current, and triggers on leaderboard
+-- keep leaderboard_score_counts, the number of entries at each score, so
+-- a rank is the sum of the few counts above it rather than a count of the
+-- entries.
+
+CREATE TABLE IF NOT EXISTS leaderboard (
+    span TEXT NOT NULL CHECK(span IN ('day', 'week', 'all')),
+    period TEXT NOT NULL,  -- YYYY-MM-DD, YYYY-Www (Monday weeks) or '' for all time
+    entity TEXT NOT NULL CHECK(entity IN ('session', 'user')),
+    entity_id TEXT NOT NULL,  -- session id or user name
+    score INTEGER NOT NULL DEFAULT 0,
+    answered INTEGER NOT NULL DEFAULT 0,
+    total_time INTEGER NOT NULL DEFAULT 0,  -- in seconds, breaks ties
+    PRIMARY KEY (span, period, entity, entity_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_leaderboard_rank
+ON leaderboard(span, period, entity, score DESC, total_time, entity_id);
+
+CREATE TABLE IF NOT EXISTS leaderboard_score_counts (
+    span TEXT NOT NULL,
+    period TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    entries INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (span, period, entity, score)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_leaderboard_insert_counts AFTER INSERT ON leaderboard
+BEGIN
+    INSERT INTO leaderboard_score_counts (span, period, entity, score, entries)
+    VALUES (NEW.span, NEW.period, NEW.entity, NEW.score, 1)
+    ON CONFLICT (span, period, entity, score) DO UPDATE SET entries = entries + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_leaderboard_update_counts AFTER UPDATE OF score ON leaderboard
+WHEN OLD.score != NEW.score
+BEGIN
+    UPDATE leaderboard_score_counts SET entries = entries - 1
+    WHERE span = OLD.span AND period = OLD.period AND entity = OLD.entity AND score = OLD.score;
+
+    INSERT INTO leaderboard_score_counts (span, period, entity, score, entries)
+    VALUES (NEW.span, NEW.period, NEW.entity, NEW.score, 1)
+    ON CONFLICT (span, period, entity, score) DO UPDATE SET entries = entries + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_leaderboard_delete_counts AFTER DELETE ON leaderboard
+BEGIN
+    UPDATE leaderboard_score_counts SET entries = entries - 1
+    WHERE span = OLD.span AND period = OLD.period AND entity = OLD.entity AND score = OLD.score;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_answers_insert_leaderboard AFTER INSERT ON user_answers
+BEGIN
+    INSERT INTO leaderboard (span, period, entity, entity_id, score, answered, total_time)
+    SELECT spans.span, spans.period, entities.entity, entities.entity_id,
+           CASE WHEN NEW.is_correct THEN 1 ELSE 0 END, 1, NEW.time_taken
+    FROM (
+        SELECT 'day' AS span, DATE(NEW.timestamp) AS period
+        UNION ALL SELECT 'week', strftime('%Y-W%W', NEW.timestamp)
+        UNION ALL SELECT 'all', ''
+    ) spans, (
+        SELECT 'session' AS entity, NEW.session_id AS entity_id
+        UNION ALL
+        SELECT 'user', user_name FROM sessions
+        WHERE id = NEW.session_id AND user_name != 'Anonymous'
+    ) entities
+    WHERE true
+    ON CONFLICT (span, period, entity, entity_id) DO UPDATE SET
+        score = score + excluded.score,
+        answered = answered + 1,
+        total_time = total_time + excluded.total_time;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_answers_delete_leaderboard AFTER DELETE ON user_answers
+BEGIN
+    UPDATE leaderboard SET
+        score = score - CASE WHEN OLD.is_correct THEN 1 ELSE 0 END,
+        answered = answered - 1,
+        total_time = total_time - OLD.time_taken
+    WHERE (span, period) IN (
+        VALUES ('day', DATE(OLD.timestamp)), ('week', strftime('%Y-W%W', OLD.timestamp)), ('all', '')
+    )
+    AND (
+        (entity = 'session' AND entity_id = OLD.session_id)
+        OR (entity = 'user' AND entity_id = (SELECT user_name FROM sessions WHERE id = OLD.session_id))
+    );
+END;
+
+-- Score the answers recorded so far
+INSERT OR IGNORE INTO leaderboard (span, period, entity, entity_id, score, answered, total_time)
+SELECT spans.span,
+       CASE spans.span
+           WHEN 'day' THEN DATE(ua.timestamp)
+           WHEN 'week' THEN strftime('%Y-W%W', ua.timestamp)
+           ELSE ''
+       END AS period,
+       entities.entity,
+       CASE entities.entity WHEN 'session' THEN ua.session_id ELSE s.user_name END AS entity_id,
+       SUM(CASE WHEN ua.is_correct THEN 1 ELSE 0 END), COUNT(*), SUM(ua.time_taken)
+FROM user_answers ua
+LEFT JOIN sessions s ON s.id = ua.session_id
+CROSS JOIN (SELECT 'day' AS span UNION ALL SELECT 'week' UNION ALL SELECT 'all') spans
+CROSS JOIN (SELECT 'session' AS entity UNION ALL SELECT 'user') entities
+WHERE entities.entity = 'session' OR (s.user_name IS NOT NULL AND s.user_name != 'Anonymous')
+GROUP BY 1, 2, 3, 4;
@@ -0,0 +1,36 @@
+-- 0008: normalized content hash of questions
+--
+-- content_hash covers the case-folded, whitespace-collapsed text and the
+-- sorted options (see content_hash.py), and is UNIQUE so writers skip
+-- duplicates with ON CONFLICT DO NOTHING.  Existing rows are hashed here;
+-- a row whose hash an earlier row already has keeps a NULL hash and is
+-- listed in question_hash_collisions (flask hash-collisions) for review.
+-- The hash is not a catalog column, so filling it leaves the bank version.
+
+ALTER TABLE questions ADD COLUMN content_hash TEXT;
+
+CREATE TABLE question_hash_collisions (
+    question_id INTEGER PRIMARY KEY,
+    duplicate_of INTEGER NOT NULL,
+    content_hash TEXT NOT NULL
+);
+
+CREATE TEMP TABLE question_hashes (id INTEGER PRIMARY KEY, content_hash TEXT NOT NULL);
+INSERT INTO question_hashes (id, content_hash)
+SELECT id, question_content_hash(text, options) FROM questions;
+
+INSERT INTO question_hash_collisions (question_id, duplicate_of, content_hash)
+SELECT id, first_id, content_hash FROM (
+    SELECT id, content_hash, MIN(id) OVER (PARTITION BY content_hash) AS first_id
+    FROM question_hashes
+)
+WHERE id <> first_id;
+
+UPDATE questions SET content_hash = (
+    SELECT h.content_hash FROM question_hashes h WHERE h.id = questions.id
+)
+WHERE id NOT IN (SELECT question_id FROM question_hash_collisions);
+
+DROP TABLE temp.question_hashes;
+
+CREATE UNIQUE INDEX idx_questions_content_hash ON questions(content_hash);
@@ -0,0 +1,29 @@
+-- 0009: import manifest
+--
+-- import_files records each bank file flask import-questions has read:
+-- its size, mtime and content hash, so an unchanged file is skipped without
+-- parsing it.  import_file_questions lists the questions a file held, by
+-- content hash, with a hash of the rest of the record (answer, explanation,
+-- difficulty, concept), so a changed file is applied as a diff: new
+-- questions inserted, edited ones updated, dropped ones removed.
+-- import_run is the run that last saw the question in the file.
+
+CREATE TABLE IF NOT EXISTS import_files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    file_hash TEXT NOT NULL,
+    questions INTEGER NOT NULL DEFAULT 0,
+    imported_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS import_file_questions (
+    path TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    record_hash TEXT NOT NULL,
+    import_run INTEGER NOT NULL,
+    PRIMARY KEY (path, content_hash)
+) WITHOUT ROWID;
+
+-- Whether another file still lists a question about to be removed
+CREATE INDEX IF NOT EXISTS idx_import_file_questions_hash ON import_file_questions(content_hash);
@@ -0,0 +1,8 @@
+-- 0010: deck passes
+--
+-- A session's deck is dealt in passes.  When a pass runs dry the deck is
+-- re-sized to the bank as it is then, so questions added since the session
+-- started are dealt too, and a new pass deals whatever the session has not
+-- answered yet, such as prefetched cards that were never answered.
+
+ALTER TABLE session_decks ADD COLUMN deal_pass INTEGER NOT NULL DEFAULT 0;
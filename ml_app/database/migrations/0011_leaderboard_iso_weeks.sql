@@ -0,0 +1,73 @@
+-- 0011: ISO weeks for the weekly leaderboards
+--
+-- 0007 keyed weeks with strftime('%Y-W%W'), which puts the days before a
+-- year's first Monday in a week "00" of their own, so weekly boards reset
+-- mid-week at New Year.  Weeks are now ISO 8601 weeks, YYYY-Www: Monday to
+-- Sunday, numbered within the year their Thursday falls in.  That Thursday
+-- is DATE(ts, '-3 days', 'weekday 4'), which older SQLite versions without
+-- %G/%V can compute.  The weekly rows scored so far are re-keyed.
+
+DROP TRIGGER IF EXISTS trg_user_answers_insert_leaderboard;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_answers_insert_leaderboard AFTER INSERT ON user_answers
+BEGIN
+    INSERT INTO leaderboard (span, period, entity, entity_id, score, answered, total_time)
+    SELECT spans.span, spans.period, entities.entity, entities.entity_id,
+           CASE WHEN NEW.is_correct THEN 1 ELSE 0 END, 1, NEW.time_taken
+    FROM (
+        SELECT 'day' AS span, DATE(NEW.timestamp) AS period
+        UNION ALL SELECT 'week', printf('%s-W%02d',
+            strftime('%Y', NEW.timestamp, '-3 days', 'weekday 4'),
+            (CAST(strftime('%j', NEW.timestamp, '-3 days', 'weekday 4') AS INTEGER) + 6) / 7)
+        UNION ALL SELECT 'all', ''
+    ) spans, (
+        SELECT 'session' AS entity, NEW.session_id AS entity_id
+        UNION ALL
+        SELECT 'user', user_name FROM sessions
+        WHERE id = NEW.session_id AND user_name != 'Anonymous'
+    ) entities
+    WHERE true
+    ON CONFLICT (span, period, entity, entity_id) DO UPDATE SET
+        score = score + excluded.score,
+        answered = answered + 1,
+        total_time = total_time + excluded.total_time;
+END;
+
+DROP TRIGGER IF EXISTS trg_user_answers_delete_leaderboard;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_answers_delete_leaderboard AFTER DELETE ON user_answers
+BEGIN
+    UPDATE leaderboard SET
+        score = score - CASE WHEN OLD.is_correct THEN 1 ELSE 0 END,
+        answered = answered - 1,
+        total_time = total_time - OLD.time_taken
+    WHERE (span, period) IN (
+        VALUES ('day', DATE(OLD.timestamp)),
+               ('week', printf('%s-W%02d',
+                   strftime('%Y', OLD.timestamp, '-3 days', 'weekday 4'),
+                   (CAST(strftime('%j', OLD.timestamp, '-3 days', 'weekday 4') AS INTEGER) + 6) / 7)),
+               ('all', '')
+    )
+    AND (
+        (entity = 'session' AND entity_id = OLD.session_id)
+        OR (entity = 'user' AND entity_id = (SELECT user_name FROM sessions WHERE id = OLD.session_id))
+    );
+END;
+
+-- Re-score the weekly boards under the new keys
+DELETE FROM leaderboard WHERE span = 'week';
+DELETE FROM leaderboard_score_counts WHERE span = 'week';
+
+INSERT INTO leaderboard (span, period, entity, entity_id, score, answered, total_time)
+SELECT 'week',
+       printf('%s-W%02d',
+           strftime('%Y', ua.timestamp, '-3 days', 'weekday 4'),
+           (CAST(strftime('%j', ua.timestamp, '-3 days', 'weekday 4') AS INTEGER) + 6) / 7) AS period,
+       entities.entity,
+       CASE entities.entity WHEN 'session' THEN ua.session_id ELSE s.user_name END AS entity_id,
+       SUM(CASE WHEN ua.is_correct THEN 1 ELSE 0 END), COUNT(*), SUM(ua.time_taken)
+FROM user_answers ua
+LEFT JOIN sessions s ON s.id = ua.session_id
+CROSS JOIN (SELECT 'session' AS entity UNION ALL SELECT 'user') entities
+WHERE entities.entity = 'session' OR (s.user_name IS NOT NULL AND s.user_name != 'Anonymous')
+GROUP BY 1, 2, 3, 4;
@@ -0,0 +1,64 @@
+-- 0012: merge duplicate questions
+--
+-- 0008 left questions that duplicated an earlier one with a NULL
+-- content_hash, and NULLs never conflict on the UNIQUE index, so writers
+-- could not dedup against them.  Every question still without a hash is
+-- hashed now.  The question that already holds its hash, or else the
+-- lowest id among those sharing it, keeps the hash; every other one is
+-- merged into it.  Its answers are moved by deleting and re-inserting
+-- them, so the triggers move the counters, histograms and boards with
+-- them; its feedback is re-pointed, and the question is deleted.
+-- question_hash_collisions becomes the record of these merges.
+
+CREATE TEMP TABLE question_merges (
+    question_id INTEGER PRIMARY KEY,
+    keep_id INTEGER NOT NULL,
+    content_hash TEXT NOT NULL
+);
+
+INSERT INTO question_merges (question_id, keep_id, content_hash)
+SELECT id,
+       COALESCE(
+           (SELECT q.id FROM questions q WHERE q.content_hash = h.content_hash),
+           MIN(id) OVER (PARTITION BY content_hash)
+       ),
+       content_hash
+FROM (
+    SELECT id, question_content_hash(text, options) AS content_hash
+    FROM questions
+    WHERE content_hash IS NULL
+) h;
+
+-- Questions that keep their hash
+UPDATE questions SET content_hash = (
+    SELECT m.content_hash FROM question_merges m WHERE m.question_id = questions.id
+)
+WHERE id IN (SELECT question_id FROM question_merges WHERE question_id = keep_id);
+
+DELETE FROM question_merges WHERE question_id = keep_id;
+
+CREATE TEMP TABLE moved_answers AS
+SELECT ua.id, ua.session_id, m.keep_id AS question_id, ua.answer, ua.is_correct, ua.time_taken, ua.timestamp
+FROM user_answers ua
+JOIN question_merges m ON m.question_id = ua.question_id;
+
+DELETE FROM user_answers WHERE question_id IN (SELECT question_id FROM question_merges);
+
+INSERT INTO user_answers (id, session_id, question_id, answer, is_correct, time_taken, timestamp)
+SELECT id, session_id, question_id, answer, is_correct, time_taken, timestamp FROM moved_answers;
+
+UPDATE question_feedback SET question_id = (
+    SELECT m.keep_id FROM question_merges m WHERE m.question_id = question_feedback.question_id
+)
+WHERE question_id IN (SELECT question_id FROM question_merges);
+
+DELETE FROM question_time_histogram WHERE question_id IN (SELECT question_id FROM question_merges);
+
+DELETE FROM questions WHERE id IN (SELECT question_id FROM question_merges);
+
+DELETE FROM question_hash_collisions;
+INSERT INTO question_hash_collisions (question_id, duplicate_of, content_hash)
+SELECT question_id, keep_id, content_hash FROM question_merges;
+
+DROP TABLE temp.moved_answers;
+DROP TABLE temp.question_merges;
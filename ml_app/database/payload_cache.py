@@ -0,0 +1,143 @@
+"""Pre-serialized public JSON for questions.
+
+Each question's public fields are encoded to JSON once and kept in a
+bounded in-memory cache keyed by question id, so the question endpoints
+assemble responses by joining cached fragments instead of running
+``json.loads`` on the options and re-encoding every row per request.
+The cache is dropped whenever ``bank_version`` moves, i.e. on any edit to
+the question bank.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+from flask import Response, current_app
+
+from .db import get_bank_version
+
+# Stay well below SQLite's limit on bound parameters per statement
+FETCH_CHUNK = 500
+
+
+class QuestionPayload:
+    """JSON fragments for one question.
+
+    ``core`` holds the ``id``, ``text``, ``options`` and ``difficulty``
+    members without braces; the other attributes are encoded JSON values.
+    Answer-bearing fields are kept apart so the practice views can leave
+    them out.
+    """
+
+    __slots__ = ('core', 'hint', 'explanation', 'concept')
+
+    def __init__(self, row):
+        self.core = (
+            f'"id":{row["id"]},'
+            f'"text":{json.dumps(row["text"])},'
+            f'"options":{json.dumps(json.loads(row["options"]))},'
+            f'"difficulty":{json.dumps(row["difficulty"])}'
+        )
+        self.hint = json.dumps(row['hint'])
+        self.explanation = json.dumps(row['explanation'])
+        self.concept = json.dumps(row['concept_name'])
+
+    @classmethod
+    def from_fragments(cls, core, hint, explanation, concept):
+        """Rebuild a payload from its already encoded fragments."""
+        payload = cls.__new__(cls)
+        payload.core, payload.hint, payload.explanation, payload.concept = core, hint, explanation, concept
+        return payload
+
+    def to_json(self):
+        """Full question, as served by the question endpoints."""
+        concepts = f'[{self.concept}]' if self.concept != 'null' else '[]'
+        return (f'{{{self.core},"hint":{self.hint},'
+                f'"explanation":{self.explanation},"concepts":{concepts}}}')
+
+    def practice_json(self):
+        """Question without hint or explanation, for practice decks."""
+        return f'{{{self.core},"concept":{self.concept}}}'
+
+    def listing_json(self, attempts, success_rate):
+        """Question with its answer statistics, for concept listings."""
+        return (f'{{{self.core},"hint":{self.hint},'
+                f'"attempts":{json.dumps(attempts)},"success_rate":{json.dumps(success_rate)}}}')
+
+
+class PayloadCache:
+    """LRU cache of ``QuestionPayload`` objects tied to one bank version.
+
+    ``preloaded`` is an optional ``PreloadedBank``; while the bank version
+    matches it, payloads come straight from it and the LRU is left alone.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.preloaded = None
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = OrderedDict()
+
+    def get_many(self, db, question_ids):
+        """Return ``{id: QuestionPayload}`` for the ids that exist."""
+        version = get_bank_version(db)
+        preloaded = self.preloaded
+        if preloaded is not None and preloaded.version == version:
+            payloads = ((question_id, preloaded.payload(question_id)) for question_id in question_ids)
+            return {question_id: payload for question_id, payload in payloads if payload is not None}
+
+        found, missing = {}, []
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            for question_id in question_ids:
+                payload = self._entries.get(question_id)
+                if payload is None:
+                    missing.append(question_id)
+                else:
+                    self._entries.move_to_end(question_id)
+                    found[question_id] = payload
+
+        for start in range(0, len(missing), FETCH_CHUNK):
+            chunk = missing[start:start + FETCH_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            rows = db.execute(
+                'SELECT q.id, q.text, q.options, q.explanation, q.difficulty, q.hint, '
+                'c.name as concept_name '
+                'FROM questions q '
+                'LEFT JOIN concepts c ON q.concept_id = c.id '
+                f'WHERE q.id IN ({placeholders})',
+                chunk
+            ).fetchall()
+            built = {row['id']: QuestionPayload(row) for row in rows}
+            found.update(built)
+            with self._lock:
+                if self._version == version:
+                    self._entries.update(built)
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+        return found
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def init_app(app):
+    """Attach an empty payload cache to the app."""
+    app.extensions['payload_cache'] = PayloadCache(app.config['QUESTION_PAYLOAD_CACHE_SIZE'])
+
+
+def get_payloads(db, question_ids):
+    """Return cached payloads for the given question ids."""
+    return current_app.extensions['payload_cache'].get_many(db, question_ids)
+
+
+def json_response(body, status=200):
+    """Wrap an already encoded JSON body in a response."""
+    return Response(body, status=status, mimetype='application/json')
+
+
+def json_array(fragments):
+    """Join encoded JSON values into an array."""
+    return '[' + ','.join(fragments) + ']'
@@ -0,0 +1,145 @@
+"""Long-lived SQLite connections shared across requests.
+
+Instead of opening and closing a connection per request, a request borrows
+an idle connection and hands it back at teardown, so each busy worker
+thread effectively keeps one warm connection.  At most ``max_size`` idle
+connections are kept; extra ones are closed when they are released.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+# PRAGMAs a tuning profile may set, with the symbolic values SQLite reports
+# back as integers
+TUNABLE_PRAGMAS = {
+    "journal_mode": None,
+    "synchronous": {"off": 0, "normal": 1, "full": 2, "extra": 3},
+    "busy_timeout": None,
+    "mmap_size": None,
+    "cache_size": None,
+    "temp_store": {"default": 0, "file": 1, "memory": 2},
+}
+
+
+def apply_pragmas(conn, pragmas):
+    """Apply a tuning profile to a fresh connection."""
+    for name, value in pragmas.items():
+        if name not in TUNABLE_PRAGMAS:
+            raise ValueError(f"Unsupported SQLite pragma: {name}")
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def read_pragmas(conn, names):
+    """Return the effective value of each pragma on a connection."""
+    cursor = conn.cursor()
+    cursor.row_factory = None  # plain tuples, whatever the connection uses
+    return {name: cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in names}
+
+
+def pragma_matches(name, wanted, effective):
+    """Check whether an effective pragma value is the one asked for."""
+    symbols = TUNABLE_PRAGMAS.get(name)
+    if isinstance(wanted, str):
+        wanted = wanted.lower()
+        if symbols:
+            wanted = symbols.get(wanted, wanted)
+    if isinstance(effective, str):
+        effective = effective.lower()
+    return str(wanted) == str(effective)
+
+
+class ConnectionPool:
+    """Bounded pool of reusable SQLite connections with health checks."""
+
+    def __init__(self, path, max_size=8, health_check_interval=30.0,
+                 row_factory=None, pragmas=None, logger=None):
+        self.path = path
+        self.pragmas = pragmas or {}
+        self.max_size = max_size
+        self.health_check_interval = health_check_interval
+        self.row_factory = row_factory
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._orphans = []
+        self._pid = os.getpid()
+        self._idle = deque()  # (connection, released_at), most recent last
+
+    def _log(self, message):
+        if self.logger is not None:
+            self.logger.debug(message)
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,  # handed between request threads
+        )
+        apply_pragmas(conn, self.pragmas)
+        if self.row_factory is not None:
+            conn.row_factory = self.row_factory
+        self._log(f"Connected to database at {self.path}")
+        return conn
+
+    def _check_fork(self):
+        # Connections must never be used across fork(); the child starts
+        # over.  Inherited handles are kept referenced, never closed.
+        if os.getpid() != self._pid:
+            with self._lock:
+                if os.getpid() != self._pid:
+                    self._orphans.extend(conn for conn, _ in self._idle)
+                    self._idle = deque()
+                    self._pid = os.getpid()
+
+    def _healthy(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def acquire(self):
+        """Borrow a connection, opening a new one if none is idle."""
+        self._check_fork()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, released_at = self._idle.pop()
+            idle_for = time.monotonic() - released_at
+            if idle_for <= self.health_check_interval or self._healthy(conn):
+                return conn
+            self._log("Discarding unhealthy pooled connection")
+            self._close(conn)
+        return self._connect()
+
+    def release(self, conn):
+        """Hand a connection back at the end of a request."""
+        self._check_fork()
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((conn, time.monotonic()))
+                return
+        self._close(conn)
+
+    def close_all(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for conn, _ in idle:
+            self._close(conn)
+
+    @property
+    def size(self):
+        """Number of idle connections currently pooled."""
+        return len(self._idle)
@@ -0,0 +1,121 @@
+"""Question bank loaded once in the gunicorn master and shared with its workers.
+
+With ``preload_app`` on, gunicorn.conf.py calls ``prepare_fork`` in the
+master after the app is created and before any worker is forked.  It reads
+the whole bank into a ``PreloadedBank``: the sorted id and concept arrays
+plus every question's pre-serialized JSON fragments packed into one bytes
+blob.  The question index and payload cache serve from it for as long as
+``bank_version`` has not moved, so a fresh worker answers its first
+requests without scanning the bank.
+
+The bank is a handful of large objects rather than one object per question,
+and ``gc.freeze()`` moves everything allocated so far out of the collector's
+reach, so the workers' reference counting and garbage collection do not
+write to those pages and they stay shared copy-on-write.  Once the bank
+changes, each worker falls back to building its own state lazily.
+"""
+import gc
+import sqlite3
+from array import array
+from bisect import bisect_left
+
+from .db import get_bank_version, get_db, get_pool
+from .payload_cache import QuestionPayload
+
+# Fragments stored per question, in QuestionPayload's attribute order
+FRAGMENTS = 4
+
+
+class PreloadedBank:
+    """Immutable snapshot of the question bank at one ``bank_version``."""
+
+    def __init__(self, version, ids, concept_ids, offsets, blob):
+        self.version = version
+        self.ids = ids
+        self.concept_ids = concept_ids
+        self._offsets = offsets
+        self._blob = blob
+
+    @classmethod
+    def load(cls, db):
+        """Read every question, in one read transaction, into a new bank."""
+        ids, concept_ids, offsets = array('q'), array('q'), array('Q', [0])
+        parts = []
+        size = 0
+        db.execute('BEGIN')
+        try:
+            version = get_bank_version(db)
+            for row in db.execute(
+                'SELECT q.id, q.text, q.options, q.explanation, q.difficulty, q.hint, q.concept_id, '
+                'c.name as concept_name '
+                'FROM questions q '
+                'LEFT JOIN concepts c ON q.concept_id = c.id '
+                'ORDER BY q.id'
+            ):
+                ids.append(row['id'])
+                concept_ids.append(row['concept_id'] if row['concept_id'] is not None else -1)
+                payload = QuestionPayload(row)
+                for fragment in (payload.core, payload.hint, payload.explanation, payload.concept):
+                    encoded = fragment.encode('utf8')
+                    parts.append(encoded)
+                    size += len(encoded)
+                    offsets.append(size)
+        finally:
+            db.rollback()
+        return cls(version, ids, concept_ids, offsets, b''.join(parts))
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the bank's arrays and blob."""
+        return (len(self._blob) + self.ids.itemsize * len(self.ids)
+                + self.concept_ids.itemsize * len(self.concept_ids)
+                + self._offsets.itemsize * len(self._offsets))
+
+    def payload(self, question_id):
+        """Return the question's ``QuestionPayload``, or None if it is not in the bank."""
+        pos = bisect_left(self.ids, question_id)
+        if pos == len(self.ids) or self.ids[pos] != question_id:
+            return None
+        start = pos * FRAGMENTS
+        blob, offsets = self._blob, self._offsets
+        return QuestionPayload.from_fragments(*(
+            blob[offsets[i]:offsets[i + 1]].decode('utf8') for i in range(start, start + FRAGMENTS)
+        ))
+
+    def by_concept(self):
+        """Return ``{concept_id: sorted id array}``, as the question index keeps it."""
+        by_concept = {}
+        for question_id, concept_id in zip(self.ids, self.concept_ids):
+            by_concept.setdefault(concept_id if concept_id != -1 else None, array('q')).append(question_id)
+        return by_concept
+
+
+def preload(app):
+    """Load the bank and hand it to the app's question index and payload cache.
+
+    Returns the bank, or None if the database is not initialized yet.
+    """
+    with app.app_context():
+        try:
+            bank = PreloadedBank.load(get_db())
+        except sqlite3.Error as e:
+            app.logger.warning(f"Question bank not preloaded: {str(e)}")
+            return None
+        app.extensions['question_index'].adopt(bank.version, bank.ids, bank.by_concept())
+        app.extensions['payload_cache'].preloaded = bank
+    app.logger.info(f"Preloaded {len(bank)} questions ({bank.nbytes} bytes) at bank version {bank.version}")
+    return bank
+
+
+def prepare_fork(app):
+    """Preload the bank in the master and get the process ready to fork workers."""
+    bank = preload(app)
+    # Workers open their own connections; the master's are of no use to them
+    with app.app_context():
+        get_pool().close_all()
+    gc.collect()
+    gc.freeze()
+    return bank
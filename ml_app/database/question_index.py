@@ -0,0 +1,105 @@
+"""In-process index of question ids per concept.
+
+Each worker keeps one sorted integer array per concept (plus one for the
+whole bank), so random selection is in-memory sampling followed by a
+primary-key fetch.  The index is rebuilt whenever ``bank_version`` moves,
+which the triggers on ``questions`` bump on every insert, update or delete.
+"""
+import random
+import sqlite3
+import threading
+from array import array
+from bisect import bisect_left
+
+from flask import current_app
+
+from .db import get_bank_version, get_db
+
+
+class QuestionIndex:
+    """Sorted question-id arrays keyed by concept id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._all = array('q')
+        self._by_concept = {}
+
+    def refresh(self, db):
+        """Rebuild the index if the bank changed since it was last built."""
+        version = get_bank_version(db)
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            by_concept = {}
+            all_ids = array('q')
+            for row in db.execute('SELECT id, concept_id FROM questions ORDER BY id'):
+                all_ids.append(row['id'])
+                by_concept.setdefault(row['concept_id'], array('q')).append(row['id'])
+            self._all, self._by_concept = all_ids, by_concept
+            self._version = version
+            current_app.logger.debug(
+                f"Question index rebuilt: {len(all_ids)} questions in {len(by_concept)} concepts"
+            )
+
+    def adopt(self, version, all_ids, by_concept):
+        """Take over arrays already built for ``version``, e.g. by the preloaded bank."""
+        with self._lock:
+            self._all, self._by_concept = all_ids, by_concept
+            self._version = version
+
+    def ids(self, concept_id=None):
+        """Return the sorted id array for a concept, or the whole bank."""
+        if concept_id is None:
+            return self._all
+        return self._by_concept.get(concept_id, array('q'))
+
+    def contains(self, concept_id, question_id):
+        """Check whether a question belongs to a concept (or the bank)."""
+        ids = self.ids(concept_id)
+        pos = bisect_left(ids, question_id)
+        return pos < len(ids) and ids[pos] == question_id
+
+    def sample(self, concept_id, count, exclude=()):
+        """Pick up to ``count`` distinct ids of a concept not in ``exclude``."""
+        ids = self.ids(concept_id)
+        excluded = {qid for qid in exclude if self.contains(concept_id, qid)}
+        available = len(ids) - len(excluded)
+        count = min(count, available)
+        if count <= 0:
+            return []
+
+        # Sparse draws use rejection sampling, dense ones filter the array once
+        if count * 2 <= available:
+            picked = []
+            seen = set(excluded)
+            while len(picked) < count:
+                qid = ids[random.randrange(len(ids))]
+                if qid not in seen:
+                    seen.add(qid)
+                    picked.append(qid)
+            return picked
+        candidates = [qid for qid in ids if qid not in excluded]
+        return random.sample(candidates, count)
+
+
+def init_app(app):
+    """Attach an empty question index to the app."""
+    app.extensions['question_index'] = QuestionIndex()
+
+
+def warm():
+    """Build the index at startup, if the database is already initialized."""
+    try:
+        current_app.extensions['question_index'].refresh(get_db())
+    except sqlite3.Error as e:
+        current_app.logger.debug(f"Question index not built at startup: {str(e)}")
+
+
+def get_question_index(db):
+    """Return the app's question index, refreshed against the bank version."""
+    index = current_app.extensions['question_index']
+    index.refresh(db)
+    return index
@@ -0,0 +1,157 @@
+"""Per-worker in-memory replica of the question catalog.
+
+With ``CATALOG_REPLICA`` on, each worker process copies ``concepts``,
+``questions`` and ``bank_version`` into a shared-cache ``:memory:``
+database, and ``get_catalog_db`` hands catalog reads a connection to it
+instead of one to the database file.  Those reads then never wait on, or
+hold up, the answer writer.
+
+The copy takes the tables' ``CREATE TABLE`` and ``CREATE INDEX``
+statements from the file's own schema, so it has every column and index
+the file has, and fills the tables with ``INSERT ... SELECT`` from the
+file attached, in one read transaction so it is a single consistent
+snapshot.  It does not use ``Connection.backup()``: that copies the whole
+database, the answer log, histograms and leaderboards included, into the
+memory of every worker, where only the catalog is read.  Triggers are not
+copied: the replica is read-only, and they only maintain other tables.
+
+The copy is rebuilt when ``bank_version`` moves past it; requests wait for
+a rebuild rather than read a catalog older than the version their ETags
+are built from.  The answer counters on questions and concepts change
+without moving the bank version, so in the replica they are stale:
+queries that need them stay on ``get_db``.  Each rebuild is a new
+in-memory database; a thread moves to it on its next read and the old one
+is freed once no thread uses it.
+"""
+import itertools
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+
+from flask import current_app
+
+from .db import Row, get_db
+from .versions import catalog_versions
+
+# The tables copied into the replica, with their indexes
+REPLICA_TABLES = ('concepts', 'questions', 'bank_version')
+
+# One built copy: its URI, the bank version it holds and the connection keeping it alive
+Snapshot = namedtuple('Snapshot', 'uri version keeper')
+
+_names = itertools.count(1)
+
+
+class CatalogReplica:
+    """A worker's in-memory copy of the catalog, rebuilt as the bank changes."""
+
+    def __init__(self, path, logger=None):
+        self.path = path
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._snapshot = None
+        self._orphans = []
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        # A shared in-memory database cannot be used across fork(); the
+        # child builds its own.  The inherited keeper is never closed.
+        if os.getpid() != self._pid:
+            with self._lock:
+                if os.getpid() != self._pid:
+                    if self._snapshot is not None:
+                        self._orphans.append(self._snapshot.keeper)
+                    self._snapshot = None
+                    self._local = threading.local()
+                    self._pid = os.getpid()
+
+    def _build(self):
+        uri = f'file:catalog-replica-{os.getpid()}-{next(_names)}?mode=memory&cache=shared'
+        keeper = sqlite3.connect(uri, uri=True, check_same_thread=False, isolation_level=None)
+        try:
+            keeper.execute('ATTACH DATABASE ? AS disk', (self.path,))
+            # One read transaction, so the copy is a single consistent snapshot
+            keeper.execute('BEGIN')
+            placeholders = ','.join('?' * len(REPLICA_TABLES))
+            schema = keeper.execute(
+                f"SELECT type, sql FROM disk.sqlite_master "
+                f"WHERE tbl_name IN ({placeholders}) AND type IN ('table', 'index') AND sql IS NOT NULL",
+                REPLICA_TABLES
+            ).fetchall()
+            for kind, sql in schema:
+                if kind == 'table':
+                    keeper.execute(sql)
+            for table in REPLICA_TABLES:
+                keeper.execute(f'INSERT INTO main.{table} SELECT * FROM disk.{table}')
+            # Indexes are built once the rows are in
+            for kind, sql in schema:
+                if kind == 'index':
+                    keeper.execute(sql)
+            version = keeper.execute('SELECT version FROM main.bank_version WHERE id = 1').fetchone()
+            keeper.execute('COMMIT')
+            keeper.execute('DETACH DATABASE disk')
+        except Exception:
+            keeper.close()
+            raise
+        snapshot = Snapshot(uri, version[0] if version else 0, keeper)
+        if self.logger is not None:
+            count = keeper.execute('SELECT COUNT(*) FROM questions').fetchone()[0]
+            self.logger.debug(f"Catalog replica built at bank version {snapshot.version}: {count} questions")
+        return snapshot
+
+    def refresh(self, version):
+        """Return a snapshot holding at least bank ``version``, rebuilding if needed."""
+        self._check_fork()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version >= version:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version < version:
+                replaced, snapshot = snapshot, self._build()
+                self._snapshot = snapshot
+                if replaced is not None:
+                    replaced.keeper.close()
+            return snapshot
+
+    def connection(self, version):
+        """Return this thread's connection to a snapshot at or past bank ``version``."""
+        snapshot = self.refresh(version)
+        local = self._local
+        if getattr(local, 'uri', None) != snapshot.uri:
+            # The previous connection closes once no cursor still reads from it
+            conn = sqlite3.connect(snapshot.uri, uri=True)
+            conn.row_factory = Row
+            conn.execute('PRAGMA query_only = ON')
+            local.conn, local.uri = conn, snapshot.uri
+        return local.conn
+
+    @property
+    def version(self):
+        """Bank version of the current snapshot, None before the first build."""
+        snapshot = self._snapshot
+        return snapshot.version if snapshot is not None else None
+
+
+def init_app(app):
+    """Attach a catalog replica to the app when ``CATALOG_REPLICA`` is set."""
+    if app.config['CATALOG_REPLICA']:
+        app.extensions['catalog_replica'] = CatalogReplica(app.config['DATABASE'], app.logger)
+
+
+def get_catalog_db():
+    """Connection for reads of the catalog columns of questions and concepts.
+
+    The worker's in-memory replica when ``CATALOG_REPLICA`` is on, the
+    request's database connection otherwise, or if the replica cannot be
+    built (say, before the database is initialized).
+    """
+    replica = current_app.extensions.get('catalog_replica')
+    if replica is not None:
+        try:
+            return replica.connection(catalog_versions()[0])
+        except sqlite3.Error as e:
+            current_app.logger.warning(f"Catalog replica unavailable, reading the database: {str(e)}")
+    return get_db()
@@ -0,0 +1,140 @@
+"""Daily answer rollups and per-question counters.
+
+``daily_stats`` and ``daily_concept_stats`` hold the number of answers,
+correct answers and time spent per day (and per concept and day), and the
+``attempts``, ``correct`` and ``total_time`` columns of ``questions`` and
+``concepts`` the same totals overall.  Triggers on ``user_answers`` keep
+them current; the ``backfill-rollups`` and ``repair-counters`` commands
+rebuild them from the raw answers.
+"""
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .db import get_db
+
+# Answers aggregated per statement while backfilling
+BACKFILL_CHUNK = 100000
+
+_ROLLUP_DAILY = '''
+    INSERT INTO daily_stats (day, answers, correct, total_time)
+    SELECT DATE(timestamp), COUNT(*), SUM(CASE WHEN is_correct THEN 1 ELSE 0 END),
+           COALESCE(SUM(time_taken), 0)
+    FROM user_answers
+    WHERE id > ? AND id <= ?
+    GROUP BY DATE(timestamp)
+    ON CONFLICT (day) DO UPDATE SET
+        answers = answers + excluded.answers,
+        correct = correct + excluded.correct,
+        total_time = total_time + excluded.total_time
+'''
+
+_ROLLUP_DAILY_CONCEPT = '''
+    INSERT INTO daily_concept_stats (day, concept_id, answers, correct, total_time)
+    SELECT DATE(ua.timestamp), q.concept_id, COUNT(*),
+           SUM(CASE WHEN ua.is_correct THEN 1 ELSE 0 END), COALESCE(SUM(ua.time_taken), 0)
+    FROM user_answers ua
+    JOIN questions q ON q.id = ua.question_id
+    WHERE ua.id > ? AND ua.id <= ? AND q.concept_id IS NOT NULL
+    GROUP BY DATE(ua.timestamp), q.concept_id
+    ON CONFLICT (concept_id, day) DO UPDATE SET
+        answers = answers + excluded.answers,
+        correct = correct + excluded.correct,
+        total_time = total_time + excluded.total_time
+'''
+
+
+def backfill_rollups(db, chunk=BACKFILL_CHUNK, progress=None):
+    """Rebuild the daily rollups from ``user_answers``; return the answers counted.
+
+    The rebuild runs in one write transaction, so answers recorded
+    meanwhile wait for it rather than being counted twice.  Answers are
+    walked in ``id`` ranges of ``chunk`` rows; ``progress`` is called with
+    the running count after each range.
+    """
+    db.execute('BEGIN IMMEDIATE')
+    try:
+        db.execute('DELETE FROM daily_stats')
+        db.execute('DELETE FROM daily_concept_stats')
+        bounds = db.execute('SELECT MIN(id) AS low, MAX(id) AS high FROM user_answers').fetchone()
+        counted = 0
+        if bounds['high'] is not None:
+            start = bounds['low'] - 1
+            while start < bounds['high']:
+                end = start + chunk
+                db.execute(_ROLLUP_DAILY, (start, end))
+                db.execute(_ROLLUP_DAILY_CONCEPT, (start, end))
+                counted += db.execute(
+                    'SELECT COUNT(*) AS count FROM user_answers WHERE id > ? AND id <= ?',
+                    (start, end)
+                ).fetchone()['count']
+                if progress is not None:
+                    progress(counted)
+                start = end
+        db.execute('COMMIT')
+    except Exception:
+        db.execute('ROLLBACK')
+        raise
+    return counted
+
+
+@click.command('backfill-rollups')
+@click.option('--chunk', default=BACKFILL_CHUNK, show_default=True,
+              help='Answers aggregated per statement.')
+@with_appcontext
+def backfill_rollups_command(chunk):
+    """Rebuild the daily answer rollups from user_answers."""
+    counted = backfill_rollups(
+        get_db(), chunk, progress=lambda n: click.echo(f"  {n} answers rolled up")
+    )
+    current_app.logger.info(f"Rebuilt daily rollups from {counted} answers")
+    click.echo(f"Rebuilt daily rollups from {counted} answers.")
+
+
+_REPAIR_QUESTION_COUNTERS = '''
+    UPDATE questions SET
+        attempts = (SELECT COUNT(*) FROM user_answers WHERE question_id = questions.id),
+        correct = (SELECT COUNT(*) FROM user_answers WHERE question_id = questions.id AND is_correct),
+        total_time = (SELECT COALESCE(SUM(time_taken), 0) FROM user_answers WHERE question_id = questions.id)
+'''
+
+_REPAIR_CONCEPT_COUNTERS = '''
+    UPDATE concepts SET
+        attempts = (SELECT COALESCE(SUM(attempts), 0) FROM questions WHERE concept_id = concepts.id),
+        correct = (SELECT COALESCE(SUM(correct), 0) FROM questions WHERE concept_id = concepts.id),
+        total_time = (SELECT COALESCE(SUM(total_time), 0) FROM questions WHERE concept_id = concepts.id)
+'''
+
+
+def repair_counters(db):
+    """Recompute the question and concept counters; return how many rows were off."""
+    db.execute('BEGIN IMMEDIATE')
+    try:
+        before = db.execute(
+            'SELECT id, attempts, correct, total_time FROM questions'
+        ).fetchall()
+        db.execute(_REPAIR_QUESTION_COUNTERS)
+        after = db.execute(
+            'SELECT id, attempts, correct, total_time FROM questions'
+        ).fetchall()
+        db.execute(_REPAIR_CONCEPT_COUNTERS)
+        db.execute('COMMIT')
+    except Exception:
+        db.execute('ROLLBACK')
+        raise
+    return sum(1 for old, new in zip(before, after) if tuple(old) != tuple(new))
+
+
+@click.command('repair-counters')
+@with_appcontext
+def repair_counters_command():
+    """Recompute the answer counters on questions and concepts."""
+    fixed = repair_counters(get_db())
+    current_app.logger.info(f"Repaired answer counters of {fixed} questions")
+    click.echo(f"Repaired answer counters of {fixed} questions.")
+
+
+def init_app(app):
+    """Register the rollup commands with the app."""
+    app.cli.add_command(backfill_rollups_command)
+    app.cli.add_command(repair_counters_command)
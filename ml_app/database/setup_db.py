@@ -1,7 +1,10 @@
 import json
 import sqlite3
 import os
+import time
 from flask import current_app
+from ml_app.database.bank_files import bank_shape, iter_questions
+from ml_app.database.content_hash import content_hash
 from ml_app.database.db import get_db, init_db
 
 def database_exists():
@@ -40,74 +43,187 @@ def get_concept_id(db, concept_name, concept_map):
     return concept_map[concept_name]
 
 def letter_to_index(letter):
-    """Convert letter answer (A, B, C, D) to index (0, 1, 2, 3)."""
-    return ord(letter.upper()) - ord('A')
+    """Convert letter answer (A, B, C, D, or 'B) option text') to index (0, 1, 2, 3)."""
+    return ord(letter.strip()[:1].upper()) - ord('A')
+
+# Bank files setup_database imports, in order
+DEFAULT_BANKS = ('data/ml_questions_large.json', 'data/ml_questions_new.json')
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+# Questions inserted per executemany call
+BULK_BATCH_SIZE = 5000
+
+INSERT_QUESTION = (
+    'INSERT INTO questions (text, options, correct_answer, explanation, hint, difficulty, content_hash, '
+    'concept_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (content_hash) DO NOTHING'
+)
+
+class LoadStats:
+    """What a bulk load read, inserted and skipped, and how long it took."""
+    
+    __slots__ = ('read', 'inserted', 'duplicates', 'rejected', 'seconds')
+    
+    def __init__(self):
+        self.read = self.inserted = self.duplicates = self.rejected = 0
+        self.seconds = 0.0
+    
+    @property
+    def rows_per_sec(self):
+        return self.read / self.seconds if self.seconds else 0.0
+    
+    def __str__(self):
+        return (f"read {self.read}, inserted {self.inserted}, duplicates {self.duplicates}, "
+                f"rejected {self.rejected} in {self.seconds:.2f}s ({self.rows_per_sec:,.0f} rows/sec)")
+
+def question_row(question):
+    """Return ``(concept_name, values)`` for a question record, or None if it is invalid."""
+    try:
+        text = question['question']
+        correct_index = letter_to_index(question['correct'])
+        options = question['options']
+    except (KeyError, TypeError, AttributeError):
+        return None
+    difficulty = question.get('difficulty', 'medium')
+    hint = question.get('hint') or None
+    if not text or not isinstance(options, list) or not 0 <= correct_index < len(options) \
+            or difficulty not in DIFFICULTIES or not isinstance(hint, (str, type(None))):
+        return None
+    return question.get('concept', 'General'), (
+        text, json.dumps(options), correct_index, question.get('explanation', ''), hint, difficulty,
+        content_hash(text, options)
+    )
+
+def deferred_schema(db, table):
+    """Return the ``(type, name, sql)`` of the triggers and non-unique indexes on ``table``."""
+    return [(row[0], row[1], row[2]) for row in db.execute(
+        "SELECT type, name, sql FROM sqlite_master "
+        "WHERE tbl_name = ? AND sql IS NOT NULL "
+        "AND (type = 'trigger' OR (type = 'index' AND sql NOT LIKE 'CREATE UNIQUE%'))",
+        (table,)
+    )]
+
+class QuestionWriter:
+    """Writes prepared question rows to ``questions`` in one transaction.
+    
+    Used as a context manager: entering starts the write transaction,
+    leaving commits it, or rolls it back if the block raised.  Rows are
+    ``(concept_name, values)`` pairs from ``question_row``; questions whose
+    content hash is already in the table, or earlier in the transaction,
+    are skipped by the UNIQUE index on ``content_hash``.  Concepts are
+    resolved as they are met, new ones created a batch at a time.  With
+    ``defer``, the triggers and secondary indexes of ``questions`` are
+    dropped on entry and re-created once before the commit, and the bank
+    version is bumped once instead of per row.
+    """
+    
+    def __init__(self, db, defer=True):
+        self.db = db
+        self.defer = defer
+        self.inserted = 0
+        self._concepts = {}
+        self._deferred = []
+    
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            self._concepts = {row[1]: row[0] for row in self.db.execute('SELECT id, name FROM concepts')}
+            self._deferred = deferred_schema(self.db, 'questions') if self.defer else []
+            for kind, name, _ in self._deferred:
+                self.db.execute(f'DROP {kind.upper()} IF EXISTS "{name}"')
+        except Exception:
+            self.db.rollback()
+            raise
+        return self
+    
+    def write(self, rows):
+        """Insert a batch of rows; return how many were new."""
+        new_concepts = {concept for concept, _ in rows if concept not in self._concepts}
+        if new_concepts:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO concepts (name, description) VALUES (?, '')",
+                [(name,) for name in new_concepts]
+            )
+            placeholders = ','.join('?' * len(new_concepts))
+            self._concepts.update((row[1], row[0]) for row in self.db.execute(
+                f'SELECT id, name FROM concepts WHERE name IN ({placeholders})',
+                list(new_concepts)
+            ))
+        inserted = self.db.executemany(
+            INSERT_QUESTION, [values + (self._concepts[concept],) for concept, values in rows]
+        ).rowcount
+        self.inserted += inserted
+        return inserted
+    
+    def restore(self):
+        """Re-create the deferred triggers and indexes ahead of the commit."""
+        for _, _, sql in self._deferred:
+            self.db.execute(sql)
+        if self._deferred and self.inserted:
+            self.db.execute('UPDATE bank_version SET version = version + 1 WHERE id = 1')
+        self._deferred = []
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.db.rollback()
+            return False
+        try:
+            self.restore()
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return False
+
+def bulk_load_questions(db, questions, batch_size=BULK_BATCH_SIZE, defer=True):
+    """Insert question records in one transaction; return ``LoadStats``.
+    
+    Records are checked with ``question_row`` and written ``batch_size`` at
+    a time through a ``QuestionWriter``.
+    """
+    stats = LoadStats()
+    started = time.perf_counter()
+    
+    with QuestionWriter(db, defer) as writer:
+        batch = []
+        
+        def flush():
+            inserted = writer.write(batch)
+            stats.inserted += inserted
+            stats.duplicates += len(batch) - inserted
+            batch.clear()
+        
+        for question in questions:
+            stats.read += 1
+            row = question_row(question)
+            if row is None:
+                stats.rejected += 1
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    
+    stats.seconds = time.perf_counter() - started
+    return stats
 
 def load_questions(json_path=None):
-    """Load questions from JSON file into database."""
+    """Load questions from a bank file (JSON list, concepts map or JSON Lines) into database."""
     if not json_path:
         json_path = 'data/ml_questions_large.json'
     
     current_app.logger.info(f"Loading questions from {json_path}...")
     
     try:
-        # Read questions from JSON file
-        with open(json_path, 'r') as f:
-            questions = json.load(f)
-        
-        current_app.logger.info(f"Found {len(questions)} questions in JSON file")
+        current_app.logger.info(f"Bank file is in {bank_shape(json_path)} form")
         
         # Get database connection
         db = get_db()
         
-        # First, load existing concepts into our map
-        concept_map = {}
-        cursor = db.execute('SELECT id, name FROM concepts')
-        for row in cursor.fetchall():
-            concept_map[row[1]] = row[0]
-        
-        question_count = 0
-        for question in questions:
-            # Get or create concept
-            concept_name = question.get('concept', 'General')
-            concept_id = get_concept_id(db, concept_name, concept_map)
-            
-            # Convert letter answer to index
-            correct_index = letter_to_index(question['correct'])
-            
-            # Convert options to JSON string
-            options_json = json.dumps(question['options'])
-            
-            # Insert question
-            try:
-                cursor = db.execute('SELECT id FROM questions WHERE text = ?', (question['question'],))
-                existing_question = cursor.fetchone()
-                if not existing_question:
-                    cursor = db.execute('''
-                        INSERT INTO questions 
-                        (text, options, correct_answer, explanation, difficulty, concept_id)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        question['question'],
-                        options_json,
-                        correct_index,
-                        question.get('explanation', ''),
-                        question.get('difficulty', 'medium'),
-                        concept_id
-                    ))
-                    question_count += 1
-                
-                if question_count % 10 == 0:
-                    current_app.logger.debug(f"Loaded {question_count} questions...")
-            except sqlite3.IntegrityError as e:
-                current_app.logger.warning(f"Skipping duplicate question: {question['question'][:50]}... ({str(e)})")
-                continue
-            except Exception as e:
-                current_app.logger.error(f"Error loading question: {str(e)}")
-                continue
-        
-        # Commit all changes
-        db.commit()
+        # Records are parsed from the file as the load consumes them
+        stats = bulk_load_questions(db, iter_questions(json_path))
+        current_app.logger.info(f"Loaded {json_path}: {stats}")
         
         # Verify the data was loaded
         cursor = db.execute('SELECT COUNT(*) FROM concepts')
@@ -124,7 +240,6 @@ def load_questions(json_path=None):
         
     except Exception as e:
         current_app.logger.error(f"Error loading data: {str(e)}")
-        db.rollback()
         return False
 
 def setup_database(force=False):
@@ -140,14 +255,16 @@ def setup_database(force=False):
         if not init_db():
             return False
             
-        # Load questions
-        if load_questions():
-            current_app.logger.info("Successfully loaded questions into database")
-            load_questions('data/ml_questions_new.json')
-            return True
-        else:
+        # Load questions; files unchanged since the last import are skipped
+        from ml_app.database.importer import import_files
+        reports = import_files(get_db(), DEFAULT_BANKS)
+        for report in reports:
+            current_app.logger.info(f"{report.path}: {report}")
+        if any(report.error for report in reports):
             current_app.logger.error("Failed to load questions into database")
             return False
+        current_app.logger.info("Successfully loaded questions into database")
+        return True
             
     except Exception as e:
         current_app.logger.error(f"Error setting up database: {str(e)}")
@@ -0,0 +1,161 @@
+"""Versioned in-memory snapshots of the answer statistics.
+
+The overview and per-concept numbers behind ``/api/stats`` are computed
+together from the daily rollups and published as one immutable
+``StatsSnapshot``.  A background thread per worker recomputes them every
+``STATS_SNAPSHOT_INTERVAL`` seconds; reads are served from memory, and a
+read that finds the snapshot older than ``STATS_SNAPSHOT_MAX_AGE``
+seconds recomputes it first, and a refresh thread that died is restarted
+by the next read.  The version only moves when the numbers
+do, so clients can tell whether anything changed.
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from flask import current_app
+
+from .pool import apply_pragmas
+
+StatsSnapshot = namedtuple('StatsSnapshot', 'version generated_at taken_at overview concepts')
+StatsSnapshot.__doc__ = """One published set of statistics.
+
+``overview`` is ``(answers, correct, total_time)``; ``concepts`` is a tuple
+of ``(concept_id, name, answers, correct)`` ordered by concept id.
+``taken_at`` is a ``time.monotonic()`` reading, used for the age check.
+"""
+
+
+def compute_stats(conn):
+    """Return ``(overview, concepts)`` from the rollups, read in one transaction."""
+    conn.execute('BEGIN')
+    try:
+        overview = conn.execute(
+            'SELECT COALESCE(SUM(answers), 0), COALESCE(SUM(correct), 0), '
+            'COALESCE(SUM(total_time), 0) FROM daily_stats'
+        ).fetchone()
+        concepts = conn.execute(
+            'SELECT c.id, c.name, SUM(dcs.answers), SUM(dcs.correct) '
+            'FROM daily_concept_stats dcs '
+            'JOIN concepts c ON c.id = dcs.concept_id '
+            'GROUP BY c.id '
+            'HAVING SUM(dcs.answers) > 0 '
+            'ORDER BY c.id'
+        ).fetchall()
+    finally:
+        conn.execute('ROLLBACK')
+    return tuple(overview), tuple(tuple(row) for row in concepts)
+
+
+class StatsSnapshotService:
+    """Keeps a recent ``StatsSnapshot`` and the thread that refreshes it."""
+
+    def __init__(self, path, pragmas=None, interval=2.0, max_age=10.0, logger=None):
+        self.path = path
+        self.pragmas = pragmas or {}
+        self.interval = interval
+        self.max_age = max_age
+        self.logger = logger
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._conn = None
+        self._thread = None
+        self._stopping = threading.Event()
+        self._pid = None
+
+    def _running(self):
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def _ensure_started(self):
+        # Started lazily, again after a fork (threads do not survive it) and
+        # again should the thread ever die
+        if self._running():
+            return
+        with self._lock:
+            if self._running():
+                return
+            if self._pid != os.getpid():
+                # A connection inherited across a fork is left alone, never reused
+                self._conn = None
+                self._pid = os.getpid()
+                atexit.register(self.stop)
+            elif self._thread is not None and self.logger is not None:
+                self.logger.error("Stats snapshot thread died, restarting it")
+            self._stopping = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, name='stats-snapshot', daemon=True
+            )
+            self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        apply_pragmas(conn, self.pragmas)
+        return conn
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                self.refresh()
+            except sqlite3.Error as e:
+                if self.logger is not None:
+                    self.logger.error(f"Failed to refresh stats snapshot: {str(e)}")
+            except Exception as e:
+                # Anything else must not end the refreshes for good either
+                if self.logger is not None:
+                    self.logger.exception(f"Stats snapshot refresh failed: {str(e)}")
+
+    def refresh(self, max_age=None):
+        """Recompute and publish a snapshot, unless one younger than ``max_age`` exists."""
+        with self._lock:
+            current = self._snapshot
+            if (max_age is not None and current is not None
+                    and time.monotonic() - current.taken_at <= max_age):
+                return current
+            if self._conn is None:
+                self._conn = self._connect()
+            overview, concepts = compute_stats(self._conn)
+            if current is not None and (overview, concepts) == (current.overview, current.concepts):
+                version = current.version
+            else:
+                version = current.version + 1 if current is not None else 1
+            self._snapshot = StatsSnapshot(
+                version, datetime.now(timezone.utc), time.monotonic(), overview, concepts
+            )
+            return self._snapshot
+
+    def current(self):
+        """Return a snapshot no older than ``max_age`` seconds."""
+        self._ensure_started()
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - snapshot.taken_at > self.max_age:
+            snapshot = self.refresh(self.max_age)
+        return snapshot
+
+    def stop(self, timeout=5.0):
+        """Stop the refresh thread."""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid() or not thread.is_alive():
+            return
+        self._stopping.set()
+        thread.join(timeout)
+        self._thread = None
+
+
+def init_app(app):
+    """Attach a stats snapshot service to the app; its thread starts on first use."""
+    app.extensions['stats_snapshot'] = StatsSnapshotService(
+        app.config['DATABASE'],
+        pragmas=app.config['SQLITE_PRAGMAS'],
+        interval=app.config['STATS_SNAPSHOT_INTERVAL'],
+        max_age=app.config['STATS_SNAPSHOT_MAX_AGE'],
+        logger=app.logger,
+    )
+
+
+def get_stats_snapshot():
+    """Return the app's current stats snapshot."""
+    return current_app.extensions['stats_snapshot'].current()
@@ -0,0 +1,55 @@
+"""In-process clock of the catalog version counters.
+
+``bank_version`` moves on any change to questions or concepts and
+``answers_version`` on any recorded or deleted answer.  The clock reads
+both at most once every ``CATALOG_VERSION_TTL`` seconds per worker, so a
+conditional request can be answered from memory; a change becomes visible
+to it within that interval.
+"""
+import threading
+import time
+
+from flask import current_app
+
+from .db import get_db
+
+
+class VersionClock:
+    """The last read ``(bank_version, answers_version)`` and when it was read."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._versions = None
+        self._read_at = 0.0
+
+    def read(self, db=None):
+        """Return ``(bank_version, answers_version)``, at most ``ttl`` seconds old."""
+        if self._versions is not None and time.monotonic() - self._read_at <= self.ttl:
+            return self._versions
+        with self._lock:
+            if self._versions is None or time.monotonic() - self._read_at > self.ttl:
+                self._versions = read_versions(db)
+                self._read_at = time.monotonic()
+            return self._versions
+
+
+def read_versions(db=None):
+    """Read ``(bank_version, answers_version)`` from the database, uncached."""
+    if db is None:
+        db = get_db()
+    row = db.execute(
+        'SELECT (SELECT version FROM bank_version WHERE id = 1) AS bank, '
+        '(SELECT version FROM answers_version WHERE id = 1) AS answers'
+    ).fetchone()
+    return (row['bank'] or 0, row['answers'] or 0)
+
+
+def init_app(app):
+    """Attach a version clock to the app."""
+    app.extensions['version_clock'] = VersionClock(app.config['CATALOG_VERSION_TTL'])
+
+
+def catalog_versions():
+    """Return the app's current ``(bank_version, answers_version)``."""
+    return current_app.extensions['version_clock'].read()
@@ -10,6 +10,8 @@ import difflib
 import logging
 from pathlib import Path
 
+from ml_app.database.bank_files import iter_questions, validate_question, write_jsonl
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -205,49 +207,9 @@ async def generate_complete_questions(concept: str, num_questions: int, querier:
 def validate_question_data(data: Dict[str, Any], config: Config) -> bool:
     """Validate question data against schema requirements."""
     try:
-        # Check required fields
-        required_fields = ['question', 'options', 'correct', 'explanation']
-        missing_fields = [field for field in required_fields if field not in data]
-        if missing_fields:
-            logger.debug(f"Missing required fields: {missing_fields}")
-            return False
-        
-        # Validate question
-        if not isinstance(data['question'], str):
-            logger.debug("Question is not a string")
-            return False
-        if len(data['question']) < 15:
-            logger.debug("Question is too short")
-            return False
-        
-        # Validate options
-        if not isinstance(data['options'], list):
-            logger.debug("Options is not a list")
-            return False
-        if len(data['options']) != 4:
-            logger.debug(f"Wrong number of options: {len(data['options'])}")
-            return False
-        
-        # Validate each option is non-empty
-        empty_options = [i for i, opt in enumerate(data['options']) if not isinstance(opt, str) or len(opt.strip()) == 0]
-        if empty_options:
-            logger.debug(f"Empty options at indices: {empty_options}")
-            return False
-        
-        # Validate correct answer
-        if not isinstance(data['correct'], str):
-            logger.debug("Correct answer is not a string")
-            return False
-        if data['correct'] not in ['A', 'B', 'C', 'D']:
-            logger.debug(f"Invalid correct answer: {data['correct']}")
-            return False
-        
-        # Validate explanation
-        if not isinstance(data['explanation'], str):
-            logger.debug("Explanation is not a string")
-            return False
-        if len(data['explanation']) < 50:
-            logger.debug("Explanation is too short")
+        problem = validate_question(data)
+        if problem:
+            logger.debug(problem)
             return False
         
         return True
@@ -337,12 +299,11 @@ async def _generate_mcq_internal(concept: str, num_questions: int, querier: Olla
     return all_questions[:num_questions]
 
 def load_existing_questions(filepath: str) -> List[Dict]:
-    """Load existing questions from a JSON file."""
+    """Load existing questions from a bank file (JSON list, concepts map or JSON Lines)."""
     try:
         if os.path.exists(filepath):
-            with open(filepath, 'r') as f:
-                return json.load(f)
-    except json.JSONDecodeError as e:
+            return list(iter_questions(filepath))
+    except ValueError as e:
         logger.error(f"Error loading existing questions: {str(e)}")
     except Exception as e:
         logger.error(f"Unexpected error loading questions: {str(e)}")
@@ -431,9 +392,12 @@ def main():
             # Create output directory if it doesn't exist
             os.makedirs(os.path.dirname(args.output), exist_ok=True)
             
-            # Save all questions to file
+            # Save all questions to file; a .jsonl output is written one question per line
             with open(args.output, 'w') as f:
-                json.dump(all_questions, f, indent=2)
+                if args.output.endswith('.jsonl'):
+                    write_jsonl(all_questions, f)
+                else:
+                    json.dump(all_questions, f, indent=2)
             
             # Print summary
             logger.info("\nGeneration Summary:")
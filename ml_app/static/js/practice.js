@@ -2,6 +2,15 @@
 let currentQuestion = null;
 let score = 0;
 let questionsAnswered = 0;
+let sessionId = sessionStorage.getItem('practiceSessionId');
+let questionStartedAt = null;
+
+// Prefetched questions, refilled in the background when running low
+const QUEUE_SIZE = 5;
+const REFILL_THRESHOLD = 2;
+let questionQueue = [];
+let deckExhausted = false;
+let pendingRefill = null;
 
 // DOM Elements
 const questionText = document.getElementById('questionText');
@@ -16,18 +25,76 @@ const progressSection = document.getElementById('progressSection');
 
 // Initialize the page
 async function initializePractice() {
+    try {
+        await ensureSession();
+    } catch (error) {
+        showError('Failed to start session: ' + error.message);
+        return;
+    }
     await loadNextQuestion();
     progressSection.classList.remove('hidden');
 }
 
+// Start a practice session unless this tab already has one
+async function ensureSession() {
+    if (sessionId) return;
+    
+    const response = await fetch('/api/practice/start', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({})
+    });
+    if (!response.ok) throw new Error('Failed to start session');
+    
+    const data = await response.json();
+    sessionId = data.sessionId;
+    sessionStorage.setItem('practiceSessionId', sessionId);
+}
+
+// Top up the local question queue with one batched request
+function refillQueue() {
+    if (pendingRefill || deckExhausted) return pendingRefill;
+    
+    pendingRefill = (async () => {
+        try {
+            const wanted = QUEUE_SIZE - questionQueue.length;
+            const response = await fetch(`/api/practice/questions?count=${wanted}`, {
+                headers: { 'X-Session-ID': sessionId }
+            });
+            if (!response.ok) throw new Error('Failed to fetch questions');
+            
+            const questions = await response.json();
+            // A short batch only ends a pass through the deck; the next one
+            // deals unanswered cards again, so only an empty one means done
+            if (questions.length === 0) deckExhausted = true;
+            // Cards still queued or on screen can come round again in a new pass
+            const held = new Set(questionQueue.map(question => question.id));
+            if (currentQuestion) held.add(currentQuestion.id);
+            questionQueue.push(...questions.filter(question => !held.has(question.id)));
+        } finally {
+            pendingRefill = null;
+        }
+    })();
+    return pendingRefill;
+}
+
 // Load a new question
 async function loadNextQuestion() {
     try {
-        const response = await fetch('/api/questions/random');
-        if (!response.ok) throw new Error('Failed to fetch question');
+        if (questionQueue.length === 0) await refillQueue();
+        if (questionQueue.length === 0) {
+            showSuccess('You have answered all available questions!');
+            return;
+        }
         
-        currentQuestion = await response.json();
+        currentQuestion = questionQueue.shift();
         displayQuestion(currentQuestion);
+        questionStartedAt = Date.now();
+        
+        // Fetch ahead so the next question is already here when needed
+        if (questionQueue.length <= REFILL_THRESHOLD) {
+            refillQueue()?.catch(error => console.error('Background refill failed:', error));
+        }
         
         // Reset UI state
         submitButton.classList.remove('hidden');
@@ -75,10 +142,17 @@ async function submitAnswer() {
     }
     
     try {
-        const response = await fetch(`/api/questions/${currentQuestion.id}/check`, {
+        const response = await fetch('/api/practice/answer', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ answer: parseInt(selectedOption.value) })
+            headers: {
+                'Content-Type': 'application/json',
+                'X-Session-ID': sessionId
+            },
+            body: JSON.stringify({
+                questionId: currentQuestion.id,
+                answer: parseInt(selectedOption.value),
+                timeTaken: Math.round((Date.now() - questionStartedAt) / 1000)
+            })
         });
         
         if (!response.ok) throw new Error('Failed to check answer');
@@ -0,0 +1,90 @@
+"""Benchmark: loading a large synthetic question bank.
+
+Creates a fresh, fully migrated database with the production pragmas in
+a temporary directory and loads ``--questions`` synthetic questions spread
+over ``--concepts`` concepts with ``bulk_load_questions``, then times the old row-at-a-time
+path (a lookup and an insert per question, triggers live) on a smaller
+sample for comparison.
+
+    python scripts/bench_bulk_load.py [--questions 1000000] [--row-sample 20000]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ml_app.database.db import PRODUCTION_PRAGMAS  # noqa: E402
+from ml_app.database.migrate import upgrade  # noqa: E402
+from ml_app.database.pool import apply_pragmas  # noqa: E402
+from ml_app.database.setup_db import bulk_load_questions, get_concept_id, letter_to_index  # noqa: E402
+
+
+def synthetic_questions(count, concepts):
+    for i in range(count):
+        yield {
+            'question': f'Synthetic question {i}: which option is number {i % 4}?',
+            'options': [f'Option {c} of {i}' for c in 'ABCD'],
+            'correct': 'ABCD'[i % 4],
+            'explanation': f'Option {i % 4} is right for question {i}.',
+            'difficulty': ('easy', 'medium', 'hard')[i % 3],
+            'concept': f'Concept {i % concepts}',
+        }
+
+
+def fresh_database(directory, name):
+    db = sqlite3.connect(os.path.join(directory, name))
+    db.row_factory = sqlite3.Row
+    apply_pragmas(db, PRODUCTION_PRAGMAS)
+    upgrade(db)
+    return db
+
+
+def row_at_a_time(db, questions):
+    """The loader as it was: one lookup and one insert per question."""
+    concept_map = {}
+    for question in questions:
+        concept_id = get_concept_id(db, question['concept'], concept_map)
+        if db.execute('SELECT id FROM questions WHERE text = ?', (question['question'],)).fetchone():
+            continue
+        db.execute(
+            'INSERT INTO questions (text, options, correct_answer, explanation, difficulty, concept_id) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (question['question'], json.dumps(question['options']), letter_to_index(question['correct']),
+             question['explanation'], question['difficulty'], concept_id)
+        )
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk question loading')
+    parser.add_argument('--questions', type=int, default=1000000)
+    parser.add_argument('--concepts', type=int, default=50)
+    parser.add_argument('--row-sample', type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = fresh_database(directory, 'bulk.db')
+        stats = bulk_load_questions(db, synthetic_questions(args.questions, args.concepts))
+        print(f"bulk_load_questions: {stats}")
+
+        # Re-loading the same bank only reads it: every question is a duplicate
+        stats = bulk_load_questions(db, synthetic_questions(args.questions, args.concepts))
+        print(f"reload (all duplicates): {stats}")
+        db.close()
+
+        db = fresh_database(directory, 'rows.db')
+        start = time.perf_counter()
+        row_at_a_time(db, synthetic_questions(args.row_sample, args.concepts))
+        seconds = time.perf_counter() - start
+        print(f"row at a time: {args.row_sample} questions in {seconds:.2f}s "
+              f"({args.row_sample / seconds:,.0f} rows/sec)")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
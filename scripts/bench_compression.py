@@ -0,0 +1,77 @@
+"""Benchmark: bandwidth and CPU of compressing a concept question listing.
+
+Builds a ``/api/concepts/<id>/questions`` body from the questions in
+data/ml_questions_large.json and reports, per available coding, the
+encoded size and the CPU time of compressing it on every request versus
+serving the body pre-compressed from the cache.
+
+    python scripts/bench_compression.py [--questions 500] [--requests 200]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from werkzeug.datastructures import Accept
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ml_app.compression import Compressor  # noqa: E402
+from ml_app.database.payload_cache import QuestionPayload, json_array  # noqa: E402
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'ml_questions_large.json')
+
+
+def build_listing(count):
+    with open(DATA) as f:
+        questions = json.load(f)
+    fragments = []
+    for i in range(count):
+        question = questions[i % len(questions)]
+        payload = QuestionPayload({
+            'id': i + 1,
+            'text': question['question'],
+            'options': json.dumps(question['options']),
+            'difficulty': 'medium',
+            'hint': '',
+            'explanation': question.get('explanation', ''),
+            'concept_name': question.get('concept'),
+        })
+        fragments.append(payload.listing_json(i % 7, 57.14))
+    return json_array(fragments).encode('utf8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark response compression')
+    parser.add_argument('--questions', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--level', type=int, default=6)
+    args = parser.parse_args()
+
+    body = build_listing(args.questions)
+    compressor = Compressor(level=args.level)
+    print(f"Listing of {args.questions} questions: {len(body):,} bytes, {args.requests} requests")
+
+    for coding, encode in compressor.codecs.items():
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            encoded = encode(body)
+        per_request = (time.perf_counter() - start) / args.requests
+
+        key = ('bench', coding)
+        compressor.cache.put(key, encoded)
+        accept = Accept([(coding, 1)])
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            compressor.cache.get((key[0], compressor.negotiate(accept)))
+        cached = (time.perf_counter() - start) / args.requests
+
+        saved = 1 - len(encoded) / len(body)
+        print(f"  {coding:5} {len(encoded):10,} bytes ({saved:6.1%} less on the wire); "
+              f"per request {per_request * 1e3:7.3f} ms compressing, "
+              f"{cached * 1e6:6.2f} us from cache")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""Benchmark: worker memory with and without the preloaded question bank.
+
+Loads ``--questions`` synthetic questions into a temporary database, then
+for 1, 4 and 16 workers (``--workers``) starts a master that creates the
+app and forks its workers the way gunicorn does, once as today (each
+worker builds its own state lazily) and once with ``preload.prepare_fork``
+run in the master first.  Every worker times its first request, then
+times touching the whole bank through the payload cache, which is sized
+to hold it all, as a long-running worker eventually would.  Workers run
+at the same time, so on a machine with fewer cores than workers the
+timings include waiting for a CPU.  With every worker still alive, the
+master reads their memory from /proc/<pid>/smaps_rollup: RSS and USS
+(private pages) per worker, and the PSS of master and workers together,
+which counts each shared page once.  Linux only.
+
+    python scripts/bench_preload.py [--questions 100000] [--workers 1 4 16]
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ml_app import create_app  # noqa: E402
+from ml_app.database.db import PRODUCTION_PRAGMAS, get_db  # noqa: E402
+from ml_app.database.migrate import upgrade  # noqa: E402
+from ml_app.database.payload_cache import FETCH_CHUNK, get_payloads  # noqa: E402
+from ml_app.database.pool import apply_pragmas  # noqa: E402
+from ml_app.database.preload import prepare_fork  # noqa: E402
+from ml_app.database.setup_db import bulk_load_questions  # noqa: E402
+
+
+def synthetic_questions(count, concepts):
+    for i in range(count):
+        yield {
+            'question': f'Synthetic question {i}: which of these options is number {i % 4}?',
+            'options': [f'Option {c} of question {i}, one of four choices' for c in 'ABCD'],
+            'correct': 'ABCD'[i % 4],
+            'explanation': f'Option {i % 4} is right for question {i}, ' + 'because it is. ' * 12,
+            'difficulty': ('easy', 'medium', 'hard')[i % 3],
+            'concept': f'Concept {i % concepts}',
+        }
+
+
+def build_database(path, questions, concepts):
+    db = sqlite3.connect(path)
+    db.row_factory = sqlite3.Row
+    apply_pragmas(db, PRODUCTION_PRAGMAS)
+    upgrade(db)
+    bulk_load_questions(db, synthetic_questions(questions, concepts))
+    db.close()
+
+
+def memory(pid):
+    """Return the kB fields of a process's smaps_rollup."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields
+
+
+def worker(app, questions, ready, release):
+    """Serve a first request, warm the whole bank, report, then wait to be released."""
+    client = app.test_client()
+    start = time.perf_counter()
+    client.get('/api/questions/random?count=10')
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    with app.app_context():
+        db = get_db()
+        for start_id in range(1, questions + 1, FETCH_CHUNK):
+            get_payloads(db, range(start_id, start_id + FETCH_CHUNK))
+    warm = time.perf_counter() - start
+    os.write(ready, f'{first} {warm}\n'.encode())
+    os.read(release, 1)
+
+
+def master(path, questions, workers, preload, report):
+    """Create the app, fork the workers and report their memory as JSON."""
+    app = create_app({'DATABASE': path, 'QUESTION_PAYLOAD_CACHE_SIZE': questions})
+    logging.disable(logging.WARNING)
+    if preload:
+        prepare_fork(app)
+
+    ready_read, ready_write = os.pipe()
+    release_read, release_write = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            os.close(release_write)
+            try:
+                worker(app, questions, ready_write, release_read)
+            finally:
+                os._exit(0)
+        pids.append(pid)
+    os.close(ready_write)
+    os.close(release_read)
+
+    with os.fdopen(ready_read) as ready:
+        timings = [[float(t) for t in ready.readline().split()] for _ in pids]
+    usage = [memory(pid) for pid in pids]
+    total_pss = memory(os.getpid())['Pss'] + sum(u['Pss'] for u in usage)
+    os.close(release_write)
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    result = {
+        'rss': sum(u['Rss'] for u in usage) / workers,
+        'uss': sum(u['Private_Clean'] + u['Private_Dirty'] for u in usage) / workers,
+        'pss': total_pss,
+        'first': sum(first for first, _ in timings) / workers,
+        'warm': sum(warm for _, warm in timings) / workers,
+    }
+    os.write(report, json.dumps(result).encode())
+
+
+def run(path, questions, workers, preload):
+    """Run one master in a fresh process, so runs do not share state."""
+    report_read, report_write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(report_read)
+        try:
+            master(path, questions, workers, preload, report_write)
+        finally:
+            os._exit(0)
+    os.close(report_write)
+    with os.fdopen(report_read) as report:
+        result = report.read()
+    os.waitpid(pid, 0)
+    return json.loads(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark worker memory with a preloaded question bank')
+    parser.add_argument('--questions', type=int, default=100000)
+    parser.add_argument('--concepts', type=int, default=50)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args()
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        sys.exit('This benchmark reads /proc/<pid>/smaps_rollup and needs Linux 4.14 or later')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bank.db')
+        build_database(path, args.questions, args.concepts)
+        print(f"{args.questions} questions, database {os.path.getsize(path) / 2**20:.1f} MiB")
+        print(f"{'mode':<8} {'workers':>7} {'RSS/worker':>11} {'USS/worker':>11} "
+              f"{'total PSS':>10} {'1st request':>12} {'warm bank':>10}")
+        for workers in args.workers:
+            for preload in (False, True):
+                result = run(path, args.questions, workers, preload)
+                print(f"{'preload' if preload else 'lazy':<8} {workers:>7} "
+                      f"{result['rss'] / 1024:>8.1f} MiB {result['uss'] / 1024:>8.1f} MiB "
+                      f"{result['pss'] / 1024:>7.1f} MiB {result['first'] * 1000:>9.1f} ms "
+                      f"{result['warm']:>8.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Microbenchmark: rows/sec of the row factories on a questions-shaped table.
+
+Compares the old per-row ``dict_factory`` with the ``Row`` class used by
+``get_db``.  Each run fetches every row and reads a few columns by name,
+the way the list endpoints do.
+
+    python scripts/bench_row_factory.py [--rows 200000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ml_app.database.db import Row  # noqa: E402
+
+
+def dict_factory(cursor, row):
+    """The factory get_db used before: a fresh field list and dict per row."""
+    fields = [column[0] for column in cursor.description]
+    return {key: value for key, value in zip(fields, row)}
+
+
+def build_database(rows):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('''
+        CREATE TABLE questions (
+            id INTEGER PRIMARY KEY, text TEXT, options TEXT, correct_answer INTEGER,
+            explanation TEXT, hint TEXT, difficulty TEXT, concept_id INTEGER
+        )
+    ''')
+    options = json.dumps(['Option A', 'Option B', 'Option C', 'Option D'])
+    conn.executemany(
+        'INSERT INTO questions VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        ((i, f'Question {i}?', options, i % 4, 'Because. ' * 10, '', 'medium', i % 16)
+         for i in range(rows))
+    )
+    return conn
+
+
+def run(conn, factory, repeat):
+    conn.row_factory = factory
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = conn.execute('SELECT * FROM questions').fetchall()
+        for row in rows:
+            row['id'], row['text'], row['difficulty'], row.get('hint', '')
+        best = max(best, len(rows) / (time.perf_counter() - start))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SQLite row factories')
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    conn = build_database(args.rows)
+    before = run(conn, dict_factory, args.repeat)
+    after = run(conn, Row, args.repeat)
+
+    print(f"Rows: {args.rows}, best of {args.repeat}")
+    print(f"  dict_factory (before): {before:12,.0f} rows/sec")
+    print(f"  Row (after):           {after:12,.0f} rows/sec  ({after / before:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
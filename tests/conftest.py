@@ -1,7 +1,9 @@
 import os
+import json
 import tempfile
 import pytest
 from ml_app import create_app
+from ml_app.database.content_hash import content_hash
 from ml_app.database.db import get_db, init_db
 
 @pytest.fixture
@@ -25,6 +27,39 @@ def app():
     os.close(db_fd)
     os.unlink(db_path)
 
+@pytest.fixture
+def bank_app(app):
+    """App whose database holds the full schema and a small question bank"""
+    with app.app_context():
+        db = get_db()
+        for concept_name in ('Neural Networks', 'Statistics'):
+            concept_id = db.execute(
+                'INSERT INTO concepts (name, description) VALUES (?, ?)',
+                (concept_name, f'Questions about {concept_name}')
+            ).lastrowid
+            for i in range(10):
+                text = f'{concept_name} question {i}?'
+                options = [f'Option {c}' for c in 'ABCD']
+                db.execute(
+                    'INSERT INTO questions (text, options, correct_answer, explanation, hint, difficulty, '
+                    'content_hash, concept_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (text,
+                     json.dumps(options),
+                     i % 4,
+                     f'Explanation for {concept_name} question {i}',
+                     '',
+                     ('easy', 'medium', 'hard')[i % 3],
+                     content_hash(text, options),
+                     concept_id)
+                )
+        db.commit()
+    return app
+
+@pytest.fixture
+def bank_client(bank_app):
+    """Test client backed by the seeded question bank"""
+    return bank_app.test_client()
+
 @pytest.fixture
 def client(app):
     """Test client for making requests"""
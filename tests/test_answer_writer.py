@@ -0,0 +1,112 @@
+import threading
+import pytest
+from ml_app.database.db import get_db
+from ml_app.database.answer_writer import _STOP, AnswerWriter, AnswerQueueFull
+
+def count_answers(app):
+    with app.app_context():
+        return get_db().execute('SELECT COUNT(*) as n FROM user_answers').fetchone()['n']
+
+def test_sync_answers_are_committed_before_returning(bank_app):
+    """In sync mode an answer is visible as soon as submit returns"""
+    writer = AnswerWriter(bank_app.config['DATABASE'])
+    writer.submit('session-1', 1, 0, True, 12)
+    assert count_answers(bank_app) == 1
+    writer.stop()
+
+def test_concurrent_answers_share_group_commits(bank_app):
+    """Answers from many threads are committed in groups"""
+    writer = AnswerWriter(bank_app.config['DATABASE'], batch_size=16, flush_interval=0.05)
+    commits = []
+    original = writer._commit
+    writer._commit = lambda conn, batch: (commits.append(len(batch)), original(conn, batch))
+    
+    threads = [threading.Thread(target=writer.submit, args=(f'session-{i}', 1 + i % 20, 0, False, 5))
+               for i in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert count_answers(bank_app) == 40
+    assert len(commits) < 40
+    writer.stop()
+
+def test_async_answers_flushed_on_stop(bank_app):
+    """Async answers are committed by flush() and on shutdown"""
+    writer = AnswerWriter(bank_app.config['DATABASE'], durability='async', flush_interval=1.0)
+    for i in range(5):
+        writer.submit('session-1', i + 1, 0, False, 5)
+    writer.flush(timeout=5)
+    assert count_answers(bank_app) == 5
+    
+    writer.submit('session-1', 6, 0, False, 5)
+    writer.stop()
+    assert count_answers(bank_app) == 6
+
+def test_full_queue_pushes_back(bank_app, monkeypatch):
+    """Submitters get AnswerQueueFull once the queue stays full"""
+    writer = AnswerWriter(bank_app.config['DATABASE'], durability='async',
+                          max_queue=1, enqueue_timeout=0.01)
+    monkeypatch.setattr(writer, '_ensure_started', lambda: None)
+    writer.submit('session-1', 1, 0, False, 5)
+    with pytest.raises(AnswerQueueFull):
+        writer.submit('session-1', 2, 0, False, 5)
+
+def test_unknown_durability_mode():
+    """Only the known durability modes are accepted"""
+    with pytest.raises(ValueError):
+        AnswerWriter('unused.sqlite', durability='eventually')
+
+def test_submit_endpoints_record_answers(bank_client, bank_app):
+    """Both submit endpoints record through the writer"""
+    headers = {'X-Session-ID': 'session-1'}
+    response = bank_client.post('/api/questions/1/submit', headers=headers,
+                                json={'answer': 0, 'time_taken': 10})
+    assert response.status_code == 200
+    assert response.json['correct'] is True
+    
+    response = bank_client.post('/api/practice/answer', headers=headers,
+                                json={'questionId': 2, 'answer': 0, 'timeTaken': 10})
+    assert response.status_code == 200
+    assert response.json['correct'] is False
+    assert count_answers(bank_app) == 2
+    
+    response = bank_client.post('/api/practice/answer', headers=headers,
+                                json={'questionId': 2, 'answer': 1, 'timeTaken': 10})
+    assert response.status_code == 400
+
+def test_bad_answer_fails_alone(bank_app):
+    """A record that fails in a group is retried alone; the rest of the group commits"""
+    writer = AnswerWriter(bank_app.config['DATABASE'], durability='async', flush_interval=1.0)
+    for i in range(3):
+        writer.submit('session-1', i + 1, 0, False, 5)
+    writer.submit('session-1', 4, 0, False, 'not a number')
+    writer.submit('session-1', 5, 0, False, 5)
+    writer.flush(timeout=5)
+    assert count_answers(bank_app) == 4
+    writer.stop()
+
+def test_writer_thread_restarts_after_dying(bank_app):
+    """A writer thread that has died is restarted by the next submit"""
+    writer = AnswerWriter(bank_app.config['DATABASE'])
+    writer.submit('session-1', 1, 0, False, 5)
+    writer._queue.put(_STOP)  # ends the thread behind the writer's back
+    writer._thread.join(timeout=5)
+    assert not writer._thread.is_alive()
+
+    writer.submit('session-1', 2, 0, False, 5)
+    assert count_answers(bank_app) == 2
+    writer.stop()
+
+def test_practice_answer_checks_time_taken(bank_client, bank_app):
+    """A non-numeric or negative timeTaken is a 400, not a failed group"""
+    headers = {'X-Session-ID': 'session-1'}
+    for time_taken in ('soon', -1, True, None):
+        response = bank_client.post('/api/practice/answer', headers=headers,
+                                    json={'questionId': 1, 'answer': 0, 'timeTaken': time_taken})
+        assert response.status_code == 400
+    response = bank_client.post('/api/questions/1/submit', headers=headers,
+                                json={'answer': 0, 'time_taken': 'soon'})
+    assert response.status_code == 400
+    assert count_answers(bank_app) == 0
@@ -0,0 +1,106 @@
+import io
+import json
+import tracemalloc
+import pytest
+from ml_app.database.bank_files import bank_shape, export_questions, iter_questions
+from ml_app.database.db import get_db
+from ml_app.database.setup_db import bulk_load_questions
+
+RECORDS = [
+    {'question': f'Question {i}?', 'options': ['A1', 'B1', 'C1', 'D1'], 'correct': 'B',
+     'explanation': f'Because {i}', 'difficulty': 'easy', 'concept': 'Statistics' if i % 2 else 'Optimization'}
+    for i in range(5)
+]
+
+def concepts_document(records):
+    concepts = {}
+    for record in records:
+        entry = concepts.setdefault(record['concept'], {
+            'name': record['concept'], 'description': '', 'questions': []
+        })
+        entry['questions'].append({k: v for k, v in record.items() if k != 'concept'})
+    return json.dumps({'concepts': concepts}, indent=2)
+
+@pytest.mark.parametrize('shape, text', [
+    ('list', json.dumps(RECORDS, indent=2)),
+    ('jsonl', '\n'.join(json.dumps(record) for record in RECORDS) + '\n'),
+    ('concepts', concepts_document(RECORDS)),
+])
+def test_reads_every_shape(tmp_path, shape, text):
+    """Each bank shape is detected and yields the same records, whatever the buffer size"""
+    path = tmp_path / f'bank.{shape}'
+    path.write_text(text)
+
+    assert bank_shape(str(path)) == shape
+    expected = sorted(RECORDS, key=lambda r: r['concept']) if shape == 'concepts' else RECORDS
+    assert list(iter_questions(str(path))) == expected
+    assert list(iter_questions(io.StringIO(text), chunk=5)) == expected
+
+def test_malformed_bank_raises_after_good_records():
+    """A broken record stops the read with ValueError, keeping what came before"""
+    questions = iter_questions(io.StringIO('[{"question": "Fine?"}, {"question": '), chunk=4)
+    assert next(questions) == {'question': 'Fine?'}
+    with pytest.raises(ValueError):
+        next(questions)
+
+def test_reading_memory_is_flat(tmp_path):
+    """Peak memory while reading does not follow the size of the file"""
+    path = tmp_path / 'big.json'
+    with open(path, 'w') as f:
+        f.write('[')
+        f.write(','.join(json.dumps(dict(RECORDS[0], question=f'Question {i}?')) for i in range(20000)))
+        f.write(']')
+
+    tracemalloc.start()
+    count = sum(1 for _ in iter_questions(str(path)))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert count == 20000
+    assert peak < path.stat().st_size / 4
+
+def test_export_round_trips(bank_app, tmp_path):
+    """Exported JSON Lines load back as the same questions"""
+    with bank_app.app_context():
+        db = get_db()
+        out = io.StringIO()
+        assert export_questions(db, out, chunk=3) == 20
+
+        lines = out.getvalue().splitlines()
+        first = json.loads(lines[0])
+        assert first == {
+            'question': 'Neural Networks question 0?',
+            'options': ['Option A', 'Option B', 'Option C', 'Option D'],
+            'correct': 'A',
+            'explanation': 'Explanation for Neural Networks question 0',
+            'difficulty': 'easy',
+            'concept': 'Neural Networks',
+        }
+        stats = bulk_load_questions(db, iter_questions(io.StringIO(out.getvalue())))
+        assert (stats.read, stats.inserted, stats.duplicates) == (20, 0, 20)
+
+def test_exported_fields_survive_import(bank_app, tmp_path):
+    """Every field the export writes, hints included, is read back by an import"""
+    with bank_app.app_context():
+        db = get_db()
+        db.execute("UPDATE questions SET hint = 'Think about ' || text WHERE id % 3 = 0")
+        db.commit()
+        out = io.StringIO()
+        export_questions(db, out)
+        exported = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert sum('hint' in record for record in exported) == 6
+
+        db.execute('DELETE FROM questions')
+        db.commit()
+        bulk_load_questions(db, iter(exported))
+        again = io.StringIO()
+        export_questions(db, again)
+        assert [json.loads(line) for line in again.getvalue().splitlines()] == exported
+
+def test_export_command(bank_app, tmp_path):
+    """flask export-questions writes the bank to a file"""
+    path = tmp_path / 'bank.jsonl'
+    result = bank_app.test_cli_runner().invoke(args=['export-questions', str(path)])
+    assert 'Exported 20 questions' in result.output
+    assert bank_shape(str(path)) == 'jsonl'
+    assert len(list(iter_questions(str(path)))) == 20
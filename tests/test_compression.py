@@ -0,0 +1,48 @@
+import gzip
+import json
+from werkzeug.datastructures import Accept
+from ml_app.compression import Compressor
+from ml_app.database.pool import ConnectionPool
+
+def test_large_listing_is_gzipped(bank_client):
+    """A concept listing above the threshold is sent gzip-encoded on request"""
+    plain = bank_client.get('/api/concepts/1/questions')
+    assert 'Content-Encoding' not in plain.headers
+    assert len(plain.data) >= 1024
+    
+    encoded = bank_client.get('/api/concepts/1/questions', headers={'Accept-Encoding': 'gzip'})
+    assert encoded.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in encoded.headers['Vary']
+    assert len(encoded.data) < len(plain.data)
+    assert json.loads(gzip.decompress(encoded.data)) == plain.json
+    assert encoded.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+
+def test_small_responses_stay_plain(bank_client):
+    """Responses under the threshold are not worth compressing"""
+    response = bank_client.get('/api/questions/1', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+
+def test_encoded_body_served_from_cache(bank_client, monkeypatch):
+    """A repeat request for a tagged response is served pre-compressed, without SQL"""
+    headers = {'Accept-Encoding': 'gzip'}
+    first = bank_client.get('/api/concepts/1/questions', headers=headers)
+    
+    def no_connection(self):
+        raise AssertionError('connection taken for a cached body')
+    monkeypatch.setattr(ConnectionPool, 'acquire', no_connection)
+    
+    again = bank_client.get('/api/concepts/1/questions', headers=headers)
+    assert again.status_code == 200
+    assert again.data == first.data
+    
+    revalidated = bank_client.get('/api/concepts/1/questions',
+                                  headers={**headers, 'If-None-Match': first.headers['ETag']})
+    assert revalidated.status_code == 304
+
+def test_negotiation_respects_quality():
+    """The client's q-values pick the coding; q=0 refuses one"""
+    compressor = Compressor()
+    assert compressor.negotiate(Accept([('gzip', 1)])) == 'gzip'
+    assert compressor.negotiate(Accept([('gzip', 0)])) is None
+    assert compressor.negotiate(Accept([])) is None
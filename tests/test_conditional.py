@@ -0,0 +1,84 @@
+import pytest
+from ml_app.database.db import get_db
+from ml_app.database.pool import ConnectionPool
+
+@pytest.fixture
+def fresh_versions(bank_app):
+    """Read the version counters on every request"""
+    bank_app.extensions['version_clock'].ttl = -1
+    return bank_app
+
+@pytest.mark.parametrize('url', ['/api/concepts/', '/api/concepts/1', '/api/questions/1'])
+def test_catalog_revalidation(bank_client, url):
+    """Catalog responses carry a strong ETag and honour If-None-Match"""
+    response = bank_client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert not etag.startswith('W/')
+    
+    response = bank_client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.data == b''
+
+def test_not_modified_without_sql(bank_client, monkeypatch):
+    """A matching If-None-Match is answered without taking a connection"""
+    etag = bank_client.get('/api/concepts/').headers['ETag']
+    
+    def no_connection(self):
+        raise AssertionError('connection taken for a 304')
+    monkeypatch.setattr(ConnectionPool, 'acquire', no_connection)
+    
+    assert bank_client.get('/api/concepts/', headers={'If-None-Match': etag}).status_code == 304
+
+def test_etag_moves_with_the_catalog(fresh_versions, bank_client):
+    """Concept edits change the concept list's tag; answers only the details'"""
+    listing = bank_client.get('/api/concepts/').headers['ETag']
+    details = bank_client.get('/api/concepts/1').headers['ETag']
+    
+    with fresh_versions.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken) "
+            "VALUES ('s1', 1, 0, 1, 10)"
+        )
+        db.commit()
+    assert bank_client.get('/api/concepts/', headers={'If-None-Match': listing}).status_code == 304
+    assert bank_client.get('/api/concepts/1', headers={'If-None-Match': details}).status_code == 200
+    
+    with fresh_versions.app_context():
+        db = get_db()
+        db.execute("UPDATE concepts SET description = 'Changed' WHERE id = 2")
+        db.commit()
+    response = bank_client.get('/api/concepts/', headers={'If-None-Match': listing})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != listing
+
+def test_built_body_is_tagged_with_its_own_version(bank_app, bank_client):
+    """A body built after a write is not sent under the clock's stale tag"""
+    bank_app.extensions['version_clock'].ttl = 1000
+    stale = bank_client.get('/api/questions/1').headers['ETag']
+    
+    with bank_app.app_context():
+        db = get_db()
+        db.execute("UPDATE questions SET text = 'Edited question text?' WHERE id = 1")
+        db.commit()
+    response = bank_client.get('/api/questions/1')
+    assert response.json['text'] == 'Edited question text?'
+    assert response.headers['ETag'] != stale
+
+def test_body_built_across_a_write_goes_untagged(bank_app, bank_client, monkeypatch):
+    """If the versions move while a body is built, it carries no ETag"""
+    from ml_app.api import questions
+    original = questions.get_payloads
+    
+    def racing_write(catalog, ids):
+        payloads = original(catalog, ids)
+        catalog.execute("UPDATE questions SET hint = 'Raced' WHERE id = 2")
+        catalog.commit()
+        return payloads
+    monkeypatch.setattr(questions, 'get_payloads', racing_write)
+    
+    response = bank_client.get('/api/questions/1')
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
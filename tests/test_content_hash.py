@@ -0,0 +1,51 @@
+import json
+import sqlite3
+from ml_app.database.content_hash import content_hash, hash_collisions, merge_summary
+from ml_app.database.db import Row
+from ml_app.database.migrate import upgrade
+
+def test_content_hash_normalizes_text_and_options():
+    """Case, whitespace and option order do not change the hash"""
+    base = content_hash('What is a tensor?', ['Array', 'Scalar'])
+    assert content_hash('  what IS a\ttensor? ', ['scalar', ' array']) == base
+    assert content_hash('What is a tensor?', ['Array', 'Vector']) != base
+    assert content_hash('What is a matrix?', ['Array', 'Scalar']) != base
+
+def test_duplicates_are_merged(tmp_path):
+    """Existing duplicates are merged into the first copy, answers included; none is left unhashed"""
+    conn = sqlite3.connect(str(tmp_path / 'bank.sqlite'))
+    conn.row_factory = Row
+    upgrade(conn, target=7)
+    conn.executemany(
+        "INSERT INTO questions (text, options, correct_answer, difficulty) VALUES (?, ?, 0, 'easy')",
+        [('What is a tensor?', json.dumps(['Array', 'Scalar'])),
+         ('What is  a TENSOR?', json.dumps(['Scalar', 'Array'])),
+         ('What is a matrix?', json.dumps(['Array', 'Scalar']))]
+    )
+    conn.execute("INSERT INTO sessions (id, user_name) VALUES ('s1', 'Ada')")
+    conn.executemany(
+        "INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken) VALUES ('s1', ?, 0, 1, 5)",
+        [(1,), (2,), (2,)]
+    )
+    conn.commit()
+
+    applied = upgrade(conn)
+
+    rows = conn.execute('SELECT id, content_hash, attempts FROM questions ORDER BY id').fetchall()
+    assert [row['id'] for row in rows] == [1, 3]
+    assert rows[0]['content_hash'] == content_hash('What is a tensor?', ['Array', 'Scalar'])
+    assert rows[1]['content_hash'] is not None
+    assert rows[0]['attempts'] == 3
+    assert conn.execute('SELECT COUNT(*) FROM user_answers WHERE question_id = 1').fetchone()[0] == 3
+    assert conn.execute(
+        "SELECT total_questions FROM session_stats WHERE session_id = 's1'"
+    ).fetchone()[0] == 3
+    assert [(row['question_id'], row['duplicate_of']) for row in hash_collisions(conn)] == [(2, 1)]
+    assert merge_summary(conn, applied).startswith('Merged 1 duplicate')
+
+    with_hash = conn.execute(
+        "INSERT INTO questions (text, options, correct_answer, difficulty, content_hash) "
+        "VALUES ('what is a tensor?', '[]', 0, 'easy', ?) ON CONFLICT (content_hash) DO NOTHING",
+        (rows[0]['content_hash'],)
+    )
+    assert with_hash.rowcount == 0
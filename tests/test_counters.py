@@ -0,0 +1,68 @@
+from ml_app.database.db import get_bank_version, get_db
+from ml_app.database.rollups import repair_counters
+
+def insert_answers(db, answers):
+    db.executemany(
+        'INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken) '
+        'VALUES (?, ?, ?, ?, ?)',
+        [('session-1', question_id, 0, is_correct, time_taken) for question_id, is_correct, time_taken in answers]
+    )
+    db.commit()
+
+def counters(db, table, row_id):
+    row = db.execute(f'SELECT attempts, correct, total_time FROM {table} WHERE id = ?', (row_id,)).fetchone()
+    return tuple(row)
+
+def test_counters_follow_answers(bank_app):
+    """Answers move the question and concept counters, not the bank version"""
+    with bank_app.app_context():
+        db = get_db()
+        version = get_bank_version(db)
+        insert_answers(db, [(1, True, 10), (1, False, 20), (2, True, 30)])
+        
+        assert counters(db, 'questions', 1) == (2, 1, 30)
+        assert counters(db, 'concepts', 1) == (3, 2, 60)
+        assert get_bank_version(db) == version
+        
+        db.execute('DELETE FROM user_answers WHERE question_id = 1 AND is_correct = 0')
+        db.commit()
+        assert counters(db, 'questions', 1) == (1, 1, 10)
+        assert counters(db, 'concepts', 1) == (2, 2, 40)
+
+def test_counters_move_with_question(bank_app):
+    """Moving a question to another concept moves its answers' totals"""
+    with bank_app.app_context():
+        db = get_db()
+        insert_answers(db, [(1, True, 10)])
+        db.execute('UPDATE questions SET concept_id = 2 WHERE id = 1')
+        db.commit()
+        assert counters(db, 'concepts', 1) == (0, 0, 0)
+        assert counters(db, 'concepts', 2) == (1, 1, 10)
+
+def test_repair_counters(bank_app, runner):
+    """The repair recomputes drifted counters from the answer log"""
+    with bank_app.app_context():
+        db = get_db()
+        insert_answers(db, [(3, True, 10), (11, False, 5)])
+        db.execute('UPDATE questions SET attempts = 99 WHERE id = 3')
+        db.execute('UPDATE concepts SET correct = 42')
+        db.commit()
+        
+        assert repair_counters(db) == 1
+        assert counters(db, 'questions', 3) == (1, 1, 10)
+        assert counters(db, 'concepts', 1) == (1, 1, 10)
+        assert counters(db, 'concepts', 2) == (1, 0, 5)
+    
+    assert 'Repaired answer counters of 0 questions' in runner.invoke(args=['repair-counters']).output
+
+def test_concept_details_read_counters(bank_app, bank_client):
+    """Concept details report the counter-based averages"""
+    with bank_app.app_context():
+        insert_answers(get_db(), [(1, True, 10), (2, False, 30), (10, True, 20)])
+    
+    details = bank_client.get('/api/concepts/1').json
+    assert details['stats'] == {'total_questions': 10, 'avg_score': 66.67, 'avg_time': 20.0}
+    assert details['recent_questions'][0] == {
+        'id': 10, 'text': 'Neural Networks question 9?', 'difficulty': 'easy',
+        'attempts': 1, 'success_rate': 100.0
+    }
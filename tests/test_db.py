@@ -1,19 +1,64 @@
 import sqlite3
+import threading
 import pytest
-from ml_app.database.db import get_db
+from ml_app.database.db import get_db, get_pool, effective_settings
+from ml_app.database.pool import ConnectionPool
 import json
 
 def test_get_close_db(app):
-    """Test database connection is created and closed properly"""
+    """Test database connection is pooled and reused across app contexts"""
     with app.app_context():
         db = get_db()
         assert db is get_db()  # Should return same connection
     
-    # Should raise error after context
-    with pytest.raises(sqlite3.ProgrammingError) as e:
-        db.execute('SELECT 1')
+    # The connection goes back to the pool instead of being closed
+    with app.app_context():
+        assert get_db() is db
+        assert db.execute('SELECT 1 as one').fetchone()['one'] == 1
+
+def test_pool_rolls_back_unfinished_work(app):
+    """Uncommitted changes do not leak into the next request"""
+    with app.app_context():
+        db = get_db()
+        db.execute('CREATE TABLE scratch (value INTEGER)')
+        db.commit()
+        db.execute('INSERT INTO scratch (value) VALUES (1)')
+    
+    with app.app_context():
+        assert get_db().execute('SELECT COUNT(*) as n FROM scratch').fetchone()['n'] == 0
+
+def test_pool_is_bounded(tmp_path):
+    """Connections beyond the pool size are closed on release"""
+    pool = ConnectionPool(str(tmp_path / 'pool.sqlite'), max_size=1)
+    first, second = pool.acquire(), pool.acquire()
+    assert first is not second
+    
+    pool.release(first)
+    pool.release(second)
+    assert pool.size == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        second.execute('SELECT 1')
+    
+    # Another thread reuses the pooled connection
+    borrowed = []
+    thread = threading.Thread(target=lambda: borrowed.append(pool.acquire()))
+    thread.start()
+    thread.join()
+    assert borrowed[0] is first
+    pool.release(first)
     
-    assert 'closed' in str(e.value)
+    pool.close_all()
+    assert pool.size == 0
+
+def test_pool_replaces_broken_connection(tmp_path):
+    """A connection failing its health check is replaced"""
+    pool = ConnectionPool(str(tmp_path / 'pool.sqlite'), health_check_interval=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()
+    fresh = pool.acquire()
+    assert fresh is not conn
+    assert fresh.execute('SELECT 1').fetchone() == (1,)
 
 def test_init_db_command(runner, monkeypatch):
     """Test init-db command"""
@@ -141,3 +186,48 @@ def test_get_user_stats(app):
         assert stats['total_questions'] == 2
         assert stats['correct_answers'] == 1
         assert 35 < stats['avg_time'] < 40  # Should be around 37.75
+
+def test_tuning_profile_applied(app):
+    """Pooled connections run with the configured tuning profile"""
+    with app.app_context():
+        settings = effective_settings()
+        assert settings['journal_mode'][1] == 'wal'
+        assert settings['synchronous'][1] == 1
+        assert settings['busy_timeout'][1] == 5000
+        assert settings['temp_store'][1] == 2
+
+def test_unknown_pragma_rejected(tmp_path):
+    """Only known tuning pragmas can be configured"""
+    pool = ConnectionPool(str(tmp_path / 'pool.sqlite'), pragmas={'writable_schema': 1})
+    with pytest.raises(ValueError):
+        pool.acquire()
+
+def test_readers_run_alongside_writer(app):
+    """In WAL mode a reader is not blocked by an open write transaction"""
+    with app.app_context():
+        pool = get_pool()
+        writer, reader = pool.acquire(), pool.acquire()
+        writer.execute('CREATE TABLE scratch (value INTEGER)')
+        writer.commit()
+        
+        writer.execute('INSERT INTO scratch (value) VALUES (1)')
+        assert writer.in_transaction
+        assert reader.execute('SELECT COUNT(*) as n FROM scratch').fetchone()['n'] == 0
+        writer.commit()
+        assert reader.execute('SELECT COUNT(*) as n FROM scratch').fetchone()['n'] == 1
+
+def test_db_settings_command(runner):
+    """db-settings reports the effective pragmas"""
+    result = runner.invoke(args=['db-settings'])
+    assert 'journal_mode = wal' in result.output
+    assert 'configured' not in result.output
+
+def test_row_mapping_access(app):
+    """Rows support key, index, get() and membership access"""
+    with app.app_context():
+        row = get_db().execute("SELECT 1 as id, 'text' as text, NULL as hint").fetchone()
+        assert row['id'] == 1 and row[1] == 'text'
+        assert row.get('hint', '') is None
+        assert row.get('missing', 'default') == 'default'
+        assert 'text' in row and 'missing' not in row
+        assert dict(row) == {'id': 1, 'text': 'text', 'hint': None}
@@ -0,0 +1,133 @@
+import pytest
+from ml_app.database.db import get_db
+from ml_app.database.deck import Deck, deal_question_ids, domain_bits, session_seed
+
+def answer(db, session_id, question_ids):
+    db.executemany(
+        'INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken) '
+        'VALUES (?, ?, 0, 0, 5)',
+        [(session_id, question_id) for question_id in question_ids]
+    )
+    db.commit()
+
+def test_deck_is_a_permutation():
+    """Every position maps to a distinct value of the domain"""
+    deck = Deck(session_seed('dev', 'session-1'), 6)
+    cards = [deck.card(p) for p in range(deck.size)]
+    assert sorted(cards) == list(range(deck.size))
+
+def test_deck_depends_on_seed():
+    """The same seed deals the same order, different seeds do not"""
+    first = Deck(session_seed('dev', 'session-1'), 8)
+    again = Deck(session_seed('dev', 'session-1'), 8)
+    other = Deck(session_seed('dev', 'session-2'), 8)
+    order = [first.card(p) for p in range(first.size)]
+    assert order == [again.card(p) for p in range(again.size)]
+    assert order != [other.card(p) for p in range(other.size)]
+
+def test_domain_bits():
+    """The domain is the smallest even-width space covering the id range"""
+    assert domain_bits(1) == 2
+    assert domain_bits(4) == 2
+    assert domain_bits(5) == 4
+    assert domain_bits(20) == 6
+    with pytest.raises(ValueError):
+        Deck(b'seed', 5)
+
+def test_deal_covers_bank_without_repeats(bank_app):
+    """A session is dealt every question exactly once, then runs dry"""
+    with bank_app.app_context():
+        db = get_db()
+        dealt = deal_question_ids(db, 'session-1', count=7)
+        dealt += deal_question_ids(db, 'session-1', count=100)
+        assert sorted(dealt) == list(range(1, 21))
+        answer(db, 'session-1', dealt)
+        assert deal_question_ids(db, 'session-1') == []
+
+def test_deal_skips_deleted_questions(bank_app):
+    """Gaps in the id space are skipped"""
+    with bank_app.app_context():
+        db = get_db()
+        db.execute('DELETE FROM questions WHERE id IN (3, 7)')
+        db.commit()
+        dealt = deal_question_ids(db, 'session-1', count=100)
+        assert len(dealt) == 18
+        assert 3 not in dealt and 7 not in dealt
+
+def test_practice_question_uses_deck(bank_client):
+    """The practice endpoint walks the session deck"""
+    headers = {'X-Session-ID': 'session-1'}
+    seen = set()
+    for _ in range(20):
+        response = bank_client.get('/api/practice/question', headers=headers)
+        assert response.status_code == 200
+        assert 'correct_answer' not in response.json
+        seen.add(response.json['id'])
+        bank_client.post('/api/practice/answer', headers=headers,
+                         json={'questionId': response.json['id'], 'answer': 0, 'timeTaken': 5})
+    assert len(seen) == 20
+    
+    response = bank_client.get('/api/practice/question', headers=headers)
+    assert response.status_code == 404
+
+def test_practice_questions_batch(bank_client):
+    """A prefetch deals the next questions of the deck without their answers"""
+    headers = {'X-Session-ID': 'session-1'}
+    response = bank_client.get('/api/practice/questions?count=8', headers=headers)
+    assert response.status_code == 200
+    batch = response.json
+    assert len(batch) == 8
+    for question in batch:
+        assert set(question) == {'id', 'text', 'options', 'difficulty', 'concept'}
+    
+    response = bank_client.get('/api/practice/questions?count=50', headers=headers)
+    rest = response.json
+    assert len(rest) == 12
+    assert sorted(q['id'] for q in batch + rest) == list(range(1, 21))
+    for question in batch + rest:
+        bank_client.post('/api/practice/answer', headers=headers,
+                         json={'questionId': question['id'], 'answer': 0, 'timeTaken': 5})
+    
+    response = bank_client.get('/api/practice/questions', headers=headers)
+    assert response.status_code == 200
+    assert response.json == []
+    
+    response = bank_client.get('/api/practice/questions')
+    assert response.status_code == 400
+
+def test_unanswered_cards_are_dealt_again(bank_app):
+    """Cards dealt but never answered come round again in the next pass"""
+    with bank_app.app_context():
+        db = get_db()
+        dealt = deal_question_ids(db, 'session-1', count=20)
+        answer(db, 'session-1', dealt[:15])
+        again = deal_question_ids(db, 'session-1', count=20)
+        assert sorted(again) == sorted(dealt[15:])
+
+def test_questions_added_later_are_dealt(bank_app):
+    """A deck sized for the bank at the start grows to ids added since"""
+    with bank_app.app_context():
+        db = get_db()
+        dealt = deal_question_ids(db, 'session-1', count=20)
+        answer(db, 'session-1', dealt)
+        for i in range(30):
+            db.execute(
+                'INSERT INTO questions (text, options, correct_answer, explanation, difficulty, concept_id) '
+                "VALUES (?, '[\"A\", \"B\", \"C\", \"D\"]', 0, '', 'easy', 1)",
+                (f'Question added later {i}?',)
+            )
+        db.commit()
+        assert sorted(deal_question_ids(db, 'session-1', count=100)) == list(range(21, 51))
+
+def test_practice_question_skips_missing_payloads(bank_client, bank_app, monkeypatch):
+    """A dealt card whose question has no payload is passed over, not reported as the end"""
+    from ml_app.database.payload_cache import PayloadCache
+    original = PayloadCache.get_many
+    monkeypatch.setattr(PayloadCache, 'get_many', lambda self, db, ids: {
+        qid: payload for qid, payload in original(self, db, ids).items() if qid % 2 == 0
+    })
+    headers = {'X-Session-ID': 'session-1'}
+    for _ in range(10):
+        response = bank_client.get('/api/practice/question', headers=headers)
+        assert response.status_code == 200
+        assert response.json['id'] % 2 == 0
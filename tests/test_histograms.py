@@ -0,0 +1,52 @@
+from ml_app.database.db import get_db
+from ml_app.database.histograms import percentiles
+
+BOUNDS = [(0, 0), (0, 1), (1, 2), (2, 4), (4, 8), (8, None)]
+
+def insert_times(app, question_id, times):
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            'INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken) '
+            'VALUES (?, ?, 0, 1, ?)',
+            [('session-1', question_id, t) for t in times]
+        )
+        db.commit()
+
+def test_percentiles_interpolate_within_buckets():
+    """Quantiles land inside their bucket, linearly by rank"""
+    assert percentiles([(3, 10)], BOUNDS, (0.5, 1.0)) == (10, [3.0, 4.0])
+    assert percentiles([(1, 50), (4, 50)], BOUNDS, (0.5, 0.9)) == (100, [1.0, 7.2])
+    assert percentiles([(5, 1)], BOUNDS, (0.5,)) == (1, [8])
+    assert percentiles([], BOUNDS, (0.5,)) == (0, [None])
+
+def test_question_timing(bank_app, bank_client):
+    """Percentiles follow the answers recorded for a question"""
+    insert_times(bank_app, 1, [5] * 90 + [100] * 10)
+    
+    timing = bank_client.get('/api/stats/timing/questions/1').json
+    assert timing['answers'] == 100
+    assert 4 < timing['p50'] <= 5
+    assert 90 < timing['p99'] <= 110
+    
+    concept = bank_client.get('/api/stats/timing/concepts/1').json
+    assert concept['answers'] == 100
+    assert concept['p50'] == timing['p50']
+
+def test_timing_follows_deletes(bank_app, bank_client):
+    """Deleted answers leave the histograms"""
+    insert_times(bank_app, 2, [3, 3000])
+    with bank_app.app_context():
+        db = get_db()
+        db.execute('DELETE FROM user_answers WHERE time_taken = 3000')
+        db.commit()
+    timing = bank_client.get('/api/stats/timing/questions/2').json
+    assert timing['answers'] == 1
+    assert timing['p99'] <= 3
+
+def test_timing_unknown_question(bank_client):
+    """Unknown ids are a 404; known ids without answers report no percentiles"""
+    assert bank_client.get('/api/stats/timing/questions/999').status_code == 404
+    assert bank_client.get('/api/stats/timing/concepts/2').json == {
+        'id': 2, 'answers': 0, 'p50': None, 'p90': None, 'p99': None
+    }
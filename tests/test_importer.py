@@ -0,0 +1,166 @@
+import json
+import os
+from ml_app.database.db import get_bank_version, get_db
+from ml_app.database.importer import import_files
+
+EXPLANATION = 'This explanation is long enough to pass the generator validation rules.'
+
+def question(i, concept='Optimization', **changes):
+    record = {
+        'question': f'Which optimizer fits case {i}?',
+        'options': ['SGD', 'Adam', 'RMSprop', 'Adagrad'],
+        'correct': 'ABCD'[i % 4],
+        'explanation': EXPLANATION,
+        'difficulty': 'medium',
+        'concept': concept,
+    }
+    record.update(changes)
+    return record
+
+def write_bank(path, records, jsonl=False):
+    with open(path, 'w') as f:
+        if jsonl:
+            f.writelines(json.dumps(record) + '\n' for record in records)
+        else:
+            json.dump(records, f)
+    return str(path)
+
+def test_import_files_reports_each_file(bank_app, tmp_path):
+    """Rows from every file reach the database; rejections are counted per file and reason"""
+    first = write_bank(tmp_path / 'first.json', [question(i) for i in range(30)] + [
+        question(100, question='Too short?'),
+        question(101, correct='E'),
+    ])
+    second = write_bank(tmp_path / 'second.jsonl', [question(i, concept='Statistics') for i in range(25, 40)] + [
+        question(102, difficulty='impossible'),
+    ], jsonl=True)
+
+    with bank_app.app_context():
+        db = get_db()
+        version = get_bank_version(db)
+        reports = import_files(db, [first, second], workers=2, batch_size=7)
+
+        assert [report.path for report in reports] == [first, second]
+        assert (reports[0].read, reports[0].rejected) == (32, 2)
+        assert reports[0].rejections == {'Question is too short': 1, 'Invalid correct answer': 1}
+        assert (reports[1].read, reports[1].rejected) == (16, 1)
+        # Five questions are in both files; whichever is written first gets them
+        assert reports[0].inserted + reports[0].duplicates == 30
+        assert reports[1].inserted + reports[1].duplicates == 15
+        assert reports[0].inserted + reports[1].inserted == 40
+        assert db.execute('SELECT COUNT(*) FROM questions').fetchone()[0] == 60
+        assert get_bank_version(db) > version
+
+def test_import_keeps_rows_before_a_parse_error(bank_app, tmp_path):
+    """A truncated file reports its error and still imports what came before it"""
+    path = tmp_path / 'broken.json'
+    path.write_text(json.dumps([question(0), question(1)])[:-40])
+
+    with bank_app.app_context():
+        [report] = import_files(get_db(), [str(path)], workers=1)
+        assert report.inserted == 1
+        assert report.error
+
+def test_import_command(bank_app, tmp_path):
+    """flask import-questions prints a line per file and a total"""
+    path = write_bank(tmp_path / 'bank.json', [question(i) for i in range(5)])
+    result = bank_app.test_cli_runner().invoke(args=['import-questions', '--workers', '1', path])
+    assert f'{path}: read 5, inserted 5' in result.output
+    assert 'Imported 5 new questions of 5 read (0 rejected) from 1 files' in result.output
+
+def test_reimport_skips_unchanged_files(bank_app, tmp_path):
+    """Files the manifest knows are skipped by stat, then by content hash"""
+    path = write_bank(tmp_path / 'bank.json', [question(i) for i in range(5)])
+    with bank_app.app_context():
+        db = get_db()
+        import_files(db, [path], workers=1)
+
+        [report] = import_files(db, [path], workers=1)
+        assert report.unchanged and report.read == 0
+
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+        [report] = import_files(db, [path], workers=1)
+        assert report.unchanged and report.read == 0
+        assert db.execute('SELECT mtime FROM import_files').fetchone()[0] == stat.st_mtime + 10
+
+def test_reimport_applies_only_the_diff(bank_app, tmp_path):
+    """Added, edited and dropped questions of a changed file are applied"""
+    path = tmp_path / 'bank.json'
+    write_bank(path, [question(i) for i in range(5)])
+    with bank_app.app_context():
+        db = get_db()
+        import_files(db, [str(path)], workers=1)
+        answered = db.execute('SELECT id FROM questions WHERE text = ?', (question(4)['question'],)).fetchone()[0]
+        db.execute(
+            'INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken) '
+            "VALUES ('session-1', ?, 0, 1, 10)", (answered,)
+        )
+        db.commit()
+
+        write_bank(path, [
+            question(0),
+            question(1, explanation=EXPLANATION + ' Edited.', concept='Statistics'),
+            question(2),
+            question(5),
+        ])
+        [report] = import_files(db, [str(path)], workers=1)
+
+        assert (report.read, report.inserted, report.updated, report.removed) == (4, 1, 1, 1)
+        edited = db.execute(
+            'SELECT q.explanation, c.name FROM questions q JOIN concepts c ON c.id = q.concept_id WHERE q.text = ?',
+            (question(1)['question'],)
+        ).fetchone()
+        assert tuple(edited) == (EXPLANATION + ' Edited.', 'Statistics')
+        texts = {row[0] for row in db.execute('SELECT text FROM questions')}
+        assert question(3)['question'] not in texts
+        assert question(4)['question'] in texts  # answered, so kept
+        assert question(5)['question'] in texts
+        assert db.execute('SELECT questions FROM import_files').fetchone()[0] == 4
+
+def test_reimport_writes_reordered_options(bank_app, tmp_path):
+    """Reordered options and wording edits are written along with the new answer letter"""
+    path = tmp_path / 'bank.json'
+    write_bank(path, [question(0, options=['Tanh', 'ReLU', 'Sigmoid', 'Softmax'], correct='A')])
+    with bank_app.app_context():
+        db = get_db()
+        import_files(db, [str(path)], workers=1)
+
+        edited = question(0, question='Which  optimizer fits CASE 0?',
+                          options=['ReLU', 'Tanh', 'Sigmoid', 'Softmax'], correct='B')
+        write_bank(path, [edited])
+        [report] = import_files(db, [str(path)], workers=1)
+
+        assert (report.inserted, report.updated) == (0, 1)
+        row = db.execute('SELECT text, options, correct_answer FROM questions WHERE content_hash IS NOT NULL '
+                         'ORDER BY id DESC LIMIT 1').fetchone()
+        options = json.loads(row['options'])
+        assert row['text'] == edited['question']
+        assert options == edited['options']
+        assert options[row['correct_answer']] == 'Tanh'
+
+def test_reimport_writes_hints(bank_app, tmp_path):
+    """Hints are imported, and a changed hint is updated on re-import"""
+    path = tmp_path / 'bank.json'
+    write_bank(path, [question(0, hint='Think momentum.')])
+    with bank_app.app_context():
+        db = get_db()
+        import_files(db, [str(path)], workers=1)
+        query = 'SELECT hint FROM questions WHERE text = ?'
+        assert db.execute(query, (question(0)['question'],)).fetchone()[0] == 'Think momentum.'
+
+        write_bank(path, [question(0, hint='Think adaptive rates.')])
+        [report] = import_files(db, [str(path)], workers=1)
+        assert report.updated == 1
+        assert db.execute(query, (question(0)['question'],)).fetchone()[0] == 'Think adaptive rates.'
+
+def test_import_real_bank_with_lettered_answers(bank_app):
+    """data/ml_questions.json writes answers as 'B) option text'; all of them import"""
+    path = os.path.join(os.path.dirname(__file__), '..', 'data', 'ml_questions.json')
+    with bank_app.app_context():
+        db = get_db()
+        [report] = import_files(db, [path], workers=1)
+        assert report.error is None
+        assert (report.read, report.rejected) == (510, 0)
+        assert report.inserted + report.duplicates == 510
+        assert db.execute('SELECT COUNT(*) FROM questions').fetchone()[0] == 20 + report.inserted
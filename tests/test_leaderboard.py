@@ -0,0 +1,94 @@
+from datetime import datetime, timezone
+from ml_app.database.db import get_db
+from ml_app.database.leaderboard import current_period
+
+def play(app, user_name, session_id, results, timestamp=None):
+    """Record a session of ``user_name`` with the given correct/wrong results"""
+    with app.app_context():
+        db = get_db()
+        db.execute('INSERT INTO sessions (id, user_name) VALUES (?, ?)', (session_id, user_name))
+        for question_id, is_correct in enumerate(results, start=1):
+            db.execute(
+                'INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken, timestamp) '
+                'VALUES (?, ?, 0, ?, 10, COALESCE(?, CURRENT_TIMESTAMP))',
+                (session_id, question_id, is_correct, timestamp)
+            )
+        db.commit()
+
+def test_top_entries_and_ties(bank_app, bank_client):
+    """Users are ranked by correct answers across sessions; ties share a rank, faster first"""
+    play(bank_app, 'Ada', 'a1', [1, 1, 0])
+    play(bank_app, 'Ada', 'a2', [1])
+    play(bank_app, 'Bob', 'b1', [1, 1, 1])
+    play(bank_app, 'Cy', 'c1', [1, 0, 0])
+    play(bank_app, 'Anonymous', 'x1', [1, 1, 1, 1])
+    
+    board = bank_client.get('/api/leaderboard/?window=all&by=user').json
+    assert [(e['rank'], e['id'], e['score']) for e in board['entries']] == [
+        (1, 'Bob', 3), (1, 'Ada', 3), (3, 'Cy', 1)
+    ]
+    
+    sessions = bank_client.get('/api/leaderboard/?window=all&by=session&limit=2').json
+    assert [e['id'] for e in sessions['entries']] == ['x1', 'b1']
+
+def test_my_rank(bank_app, bank_client):
+    """A session sees its own rank and that of its user"""
+    play(bank_app, 'Ada', 'a1', [1, 0])
+    play(bank_app, 'Bob', 'b1', [1, 1])
+    play(bank_app, 'Cy', 'c1', [1, 1, 1])
+    
+    me = bank_client.get('/api/leaderboard/me?by=session', headers={'X-Session-ID': 'a1'}).json
+    assert (me['rank'], me['score'], me['entries']) == (3, 1, 3)
+    
+    me = bank_client.get('/api/leaderboard/me?by=user&window=day', headers={'X-Session-ID': 'b1'}).json
+    assert (me['id'], me['rank'], me['period']) == ('Bob', 2, current_period('day'))
+    
+    assert bank_client.get('/api/leaderboard/me', headers={'X-Session-ID': 'nobody'}).status_code == 404
+
+def test_windows_keep_their_periods(bank_app, bank_client):
+    """Older answers count all time but not in today's or this week's board"""
+    play(bank_app, 'Old', 'o1', [1, 1, 1, 1], timestamp='2020-01-01 12:00:00')
+    play(bank_app, 'New', 'n1', [1])
+    
+    assert [e['id'] for e in bank_client.get('/api/leaderboard/?window=all').json['entries']] == ['Old', 'New']
+    assert [e['id'] for e in bank_client.get('/api/leaderboard/?window=week').json['entries']] == ['New']
+    old_day = bank_client.get('/api/leaderboard/?window=day&period=2020-01-01').json
+    assert [e['id'] for e in old_day['entries']] == ['Old']
+
+def test_deleted_answers_leave_the_board(bank_app, bank_client):
+    """Resetting progress takes the answers' points back"""
+    play(bank_app, 'Ada', 'a1', [1, 1])
+    play(bank_app, 'Bob', 'b1', [1])
+    with bank_app.app_context():
+        db = get_db()
+        db.execute("DELETE FROM user_answers WHERE session_id = 'a1'")
+        db.commit()
+    
+    entries = bank_client.get('/api/leaderboard/?by=user').json['entries']
+    assert [(e['id'], e['score']) for e in entries] == [('Bob', 1)]
+    me = bank_client.get('/api/leaderboard/me?by=user', headers={'X-Session-ID': 'b1'}).json
+    assert me['rank'] == 1
+
+def test_periods_match_the_triggers():
+    """Python and SQLite agree on the week key"""
+    assert current_period('week', datetime(2024, 1, 3, tzinfo=timezone.utc)) == '2024-W01'
+    assert current_period('all') == ''
+
+def test_bad_board(bank_client):
+    assert bank_client.get('/api/leaderboard/?window=month').status_code == 400
+
+def test_weeks_run_across_new_year(bank_app, bank_client):
+    """A week that spans New Year is one board, keyed the same in Python and SQLite"""
+    play(bank_app, 'Mon', 'm1', [1], timestamp='2024-12-30 09:00:00')
+    play(bank_app, 'Sun', 's1', [1, 1], timestamp='2025-01-05 21:00:00')
+    play(bank_app, 'Next', 'n1', [1], timestamp='2025-01-06 09:00:00')
+    
+    period = current_period('week', datetime(2025, 1, 1, tzinfo=timezone.utc))
+    assert period == '2025-W01'
+    board = bank_client.get(f'/api/leaderboard/?window=week&period={period}&by=user').json
+    assert [e['id'] for e in board['entries']] == ['Sun', 'Mon']
+    
+    assert current_period('week', datetime(2021, 1, 1, tzinfo=timezone.utc)) == '2020-W53'
+    play(bank_app, 'Late', 'l1', [1], timestamp='2021-01-01 12:00:00')
+    board = bank_client.get('/api/leaderboard/?window=week&period=2020-W53&by=user').json
+    assert [e['id'] for e in board['entries']] == ['Late']
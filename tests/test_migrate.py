@@ -0,0 +1,125 @@
+import sqlite3
+from ml_app.database.db import Row
+from ml_app.database.migrate import available_migrations, schema_version, split_statements, upgrade
+
+# The tables of a database created before migrations existed
+LEGACY_SCHEMA = '''
+CREATE TABLE concepts (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE, description TEXT);
+CREATE TABLE questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT NOT NULL, options TEXT NOT NULL,
+    correct_answer INTEGER NOT NULL, explanation TEXT, hint TEXT,
+    difficulty TEXT CHECK(difficulty IN ('easy', 'medium', 'hard')) NOT NULL, concept_id INTEGER
+);
+CREATE TABLE sessions (
+    id TEXT PRIMARY KEY, user_name TEXT NOT NULL,
+    start_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, end_time TIMESTAMP
+);
+CREATE TABLE user_answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, question_id INTEGER NOT NULL,
+    answer INTEGER NOT NULL, is_correct BOOLEAN NOT NULL, time_taken INTEGER NOT NULL,
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE question_feedback (id INTEGER PRIMARY KEY AUTOINCREMENT, question_id INTEGER NOT NULL, feedback TEXT NOT NULL);
+CREATE INDEX idx_user_answers_session ON user_answers(session_id);
+CREATE INDEX idx_user_answers_question ON user_answers(question_id);
+CREATE INDEX idx_questions_concept ON questions(concept_id);
+'''
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = Row
+    return conn
+
+def index_names(conn):
+    return {row['name'] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+def test_upgrade_fresh_database(tmp_path):
+    """A new database gets every migration, and a second run is a no-op"""
+    conn = connect(str(tmp_path / 'fresh.sqlite'))
+    latest = available_migrations()[-1][0]
+    
+    applied = upgrade(conn)
+    assert [version for version, _ in applied] == [version for version, _, _ in available_migrations()]
+    assert schema_version(conn) == latest
+    assert upgrade(conn) == []
+    assert {
+        'idx_user_answers_session_question', 'idx_user_answers_timestamp',
+        'idx_user_answers_question_correct', 'idx_questions_concept_difficulty',
+    } <= index_names(conn)
+
+def test_upgrade_legacy_database_keeps_data(tmp_path):
+    """A pre-migration database is upgraded in place and its summaries filled"""
+    conn = connect(str(tmp_path / 'legacy.sqlite'))
+    conn.executescript(LEGACY_SCHEMA)
+    conn.execute("INSERT INTO concepts (name) VALUES ('Statistics')")
+    conn.execute("INSERT INTO questions (text, options, correct_answer, difficulty, concept_id) "
+                 "VALUES ('Q?', '[]', 0, 'easy', 1)")
+    conn.execute("INSERT INTO sessions (id, user_name) VALUES ('s1', 'Ada')")
+    conn.executemany(
+        "INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken) VALUES (?, ?, ?, ?, ?)",
+        [('s1', 1, 0, True, 10), ('s1', 1, 1, False, 20)]
+    )
+    conn.commit()
+    
+    upgrade(conn)
+    
+    assert conn.execute('SELECT COUNT(*) FROM user_answers').fetchone()[0] == 2
+    stats = conn.execute("SELECT * FROM session_stats WHERE session_id = 's1'").fetchone()
+    assert (stats['total_questions'], stats['correct_answers'], stats['total_time']) == (2, 1, 30)
+    assert conn.execute('SELECT SUM(answers) FROM daily_concept_stats').fetchone()[0] == 2
+    # The single-column indexes are replaced by their composite successors
+    assert 'idx_user_answers_session' not in index_names(conn)
+    
+    # From here on the triggers keep the summaries current
+    conn.execute("INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken) "
+                 "VALUES ('s1', 1, 0, 1, 5)")
+    conn.commit()
+    stats = conn.execute("SELECT total_questions FROM session_stats WHERE session_id = 's1'").fetchone()
+    assert stats['total_questions'] == 3
+
+def test_upgrade_stops_at_target(tmp_path):
+    """Upgrading to a target leaves later migrations pending"""
+    conn = connect(str(tmp_path / 'target.sqlite'))
+    assert upgrade(conn, target=1) == [(1, 'baseline')]
+    assert schema_version(conn) == 1
+
+def test_split_statements_keeps_triggers_whole():
+    """Semicolons inside trigger bodies do not split the statement"""
+    statements = split_statements('''
+        -- comment
+        CREATE TABLE t (x);
+        CREATE TRIGGER tr AFTER INSERT ON t
+        BEGIN
+            UPDATE t SET x = 1;
+            UPDATE t SET x = 2;
+        END;
+    ''')
+    assert len(statements) == 2
+    assert statements[1].endswith('END;')
+
+def test_db_upgrade_command(runner):
+    """The CLI reports the schema version"""
+    result = runner.invoke(args=['db-upgrade'])
+    assert f'schema version {available_migrations()[-1][0]}' in result.output
+
+def test_weekly_boards_rekeyed_to_iso_weeks(tmp_path):
+    """Weekly scores recorded under the old keys move to ISO weeks"""
+    conn = connect(str(tmp_path / 'weeks.sqlite'))
+    upgrade(conn, target=10)
+    conn.execute("INSERT INTO sessions (id, user_name) VALUES ('s1', 'Ada')")
+    conn.executemany(
+        'INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken, timestamp) '
+        "VALUES ('s1', ?, 0, 1, 5, ?)",
+        [(1, '2024-12-31 10:00:00'), (2, '2025-01-02 10:00:00')]
+    )
+    conn.commit()
+    
+    upgrade(conn)
+    rows = conn.execute(
+        "SELECT period, score FROM leaderboard WHERE span = 'week' AND entity = 'user'"
+    ).fetchall()
+    assert [tuple(row) for row in rows] == [('2025-W01', 2)]
+    counts = conn.execute(
+        "SELECT period, score, entries FROM leaderboard_score_counts WHERE span = 'week' AND entity = 'user'"
+    ).fetchall()
+    assert [tuple(row) for row in counts] == [('2025-W01', 2, 1)]
@@ -0,0 +1,39 @@
+import json
+
+def test_concept_questions_keyset_pages(bank_client):
+    """Walking next_after cursors visits every question of the concept once"""
+    seen, after = [], 0
+    while after is not None:
+        page = bank_client.get(f'/api/concepts/2/questions?after={after}&limit=4').json
+        seen.extend(q['id'] for q in page['questions'])
+        after = page['next_after']
+    assert seen == list(range(11, 21))
+
+def test_concept_questions_page_shape(bank_client):
+    """A page carries the listing fields and the next cursor"""
+    page = bank_client.get('/api/concepts/1/questions?limit=3').json
+    assert [q['id'] for q in page['questions']] == [1, 2, 3]
+    assert page['next_after'] == 3
+    assert set(page['questions'][0]) == {'id', 'text', 'options', 'difficulty', 'hint', 'attempts', 'success_rate'}
+    
+    last = bank_client.get('/api/concepts/1/questions?after=8&limit=3').json
+    assert [q['id'] for q in last['questions']] == [9, 10]
+    assert last['next_after'] is None
+
+def test_streamed_listing_matches_whole(bank_client):
+    """The streamed listing is the same JSON array as the built one"""
+    whole = bank_client.get('/api/concepts/1/questions')
+    streamed = bank_client.get('/api/concepts/1/questions?stream=1')
+    assert streamed.is_streamed
+    assert json.loads(streamed.get_data()) == whole.json
+    assert [q['id'] for q in whole.json] == list(range(1, 11))
+
+def test_concepts_keyset_and_stream(bank_client):
+    """The concept list pages and streams the same way"""
+    page = bank_client.get('/api/concepts/?limit=1').json
+    assert [c['name'] for c in page['concepts']] == ['Neural Networks']
+    assert page['next_after'] == 1
+    
+    streamed = json.loads(bank_client.get('/api/concepts/?stream=1').get_data())
+    assert [c['question_count'] for c in streamed] == [10, 10]
+    assert streamed == bank_client.get('/api/concepts/').json
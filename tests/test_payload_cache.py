@@ -0,0 +1,46 @@
+import json
+from ml_app.database.db import get_db
+from ml_app.database.payload_cache import get_payloads
+
+def test_payloads_render_public_fields(bank_app):
+    """Cached fragments render the same fields the endpoints used to build"""
+    with bank_app.app_context():
+        payload = get_payloads(get_db(), [3])[3]
+        question = json.loads(payload.to_json())
+        assert question == {
+            'id': 3,
+            'text': 'Neural Networks question 2?',
+            'options': ['Option A', 'Option B', 'Option C', 'Option D'],
+            'difficulty': 'hard',
+            'hint': '',
+            'explanation': 'Explanation for Neural Networks question 2',
+            'concepts': ['Neural Networks']
+        }
+        practice = json.loads(payload.practice_json())
+        assert set(practice) == {'id', 'text', 'options', 'difficulty', 'concept'}
+        listing = json.loads(payload.listing_json(4, 75.0))
+        assert listing['attempts'] == 4 and listing['success_rate'] == 75.0
+        assert 'explanation' not in listing
+
+def test_payloads_skip_missing_and_follow_edits(bank_app):
+    """Missing ids are left out and edits drop stale fragments"""
+    with bank_app.app_context():
+        db = get_db()
+        assert set(get_payloads(db, [1, 2, 999])) == {1, 2}
+        
+        db.execute("UPDATE questions SET text = 'Edited?' WHERE id = 1")
+        db.commit()
+        assert json.loads(get_payloads(db, [1])[1].to_json())['text'] == 'Edited?'
+
+def test_question_endpoint_served_from_cache(bank_client):
+    """The question endpoints return the cached payloads"""
+    response = bank_client.get('/api/questions/12')
+    assert response.status_code == 200
+    assert response.json['concepts'] == ['Statistics']
+    assert response.json['options'][0] == 'Option A'
+    
+    assert bank_client.get('/api/questions/999').status_code == 404
+    
+    response = bank_client.get('/api/concepts/2/questions')
+    assert [q['id'] for q in response.json] == list(range(11, 21))
+    assert response.json[0]['attempts'] == 0
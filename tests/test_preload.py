@@ -0,0 +1,54 @@
+import json
+from ml_app.database.db import get_db
+from ml_app.database.payload_cache import PayloadCache
+from ml_app.database.preload import preload
+from ml_app.database.question_index import get_question_index
+
+def test_preloaded_bank_matches_the_database(bank_app):
+    """Payloads and index arrays from the preloaded bank equal the lazily built ones"""
+    bank = preload(bank_app)
+    assert len(bank) == 20
+
+    with bank_app.app_context():
+        db = get_db()
+        lazy = PayloadCache(100).get_many(db, list(range(1, 22)))
+        assert len(lazy) == 20
+        for question_id, payload in lazy.items():
+            assert bank.payload(question_id).to_json() == payload.to_json()
+        assert bank.payload(21) is None
+
+        index = get_question_index(db)
+        assert list(index.ids()) == list(range(1, 21))
+        assert list(index.ids(2)) == list(range(11, 21))
+
+def test_endpoints_serve_from_preloaded_bank(bank_app):
+    """Requests use the preloaded bank without filling the payload cache"""
+    preload(bank_app)
+    client = bank_app.test_client()
+    response = client.get('/api/questions/3')
+    assert response.get_json()['text'] == 'Neural Networks question 2?'
+    assert len(client.get('/api/questions/random?count=5').get_json()) == 5
+    assert len(bank_app.extensions['payload_cache']) == 0
+
+def test_bank_change_falls_back_to_database(bank_app):
+    """Once the bank version moves, the preloaded bank is no longer used"""
+    preload(bank_app)
+    with bank_app.app_context():
+        db = get_db()
+        new_id = db.execute(
+            'INSERT INTO questions (text, options, correct_answer, explanation, difficulty, concept_id) '
+            "VALUES ('A brand new question?', ?, 0, '', 'easy', 1)",
+            (json.dumps(['A', 'B', 'C', 'D']),)
+        ).lastrowid
+        db.commit()
+        assert new_id in get_question_index(db).ids(1)
+
+    response = bank_app.test_client().get(f'/api/questions/{new_id}')
+    assert response.get_json()['text'] == 'A brand new question?'
+    assert len(bank_app.extensions['payload_cache']) == 1
+
+def test_preload_without_database(app):
+    """An uninitialized database is reported, not raised"""
+    with app.app_context():
+        get_db().execute('DROP TABLE questions')
+    assert preload(app) is None
@@ -0,0 +1,58 @@
+from ml_app.database.db import get_db
+
+def answer(client, session_id, question_id, answer, time_taken=10):
+    return client.post('/api/practice/answer', headers={'X-Session-ID': session_id},
+                       json={'questionId': question_id, 'answer': answer, 'timeTaken': time_taken})
+
+def test_progress_reads_session_summaries(bank_client):
+    """Progress reflects the answers of the calling session only"""
+    session_id = bank_client.post('/api/practice/start', json={'userName': 'Ada'}).json['sessionId']
+    other_id = bank_client.post('/api/practice/start', json={'userName': 'Bob'}).json['sessionId']
+    
+    # Question n has correct answer (n - 1) % 4
+    answer(bank_client, session_id, 1, 0, 10)   # correct, Neural Networks, easy
+    answer(bank_client, session_id, 2, 0, 20)   # wrong, Neural Networks, medium
+    answer(bank_client, session_id, 12, 1, 30)  # correct, Statistics, medium
+    answer(bank_client, other_id, 3, 0, 5)
+    
+    response = bank_client.get('/api/practice/progress', headers={'X-Session-ID': session_id})
+    assert response.status_code == 200
+    progress = response.json
+    assert progress['overall'] == {
+        'totalQuestions': 3, 'correctAnswers': 2, 'accuracy': 66.67, 'averageTime': 20.0
+    }
+    assert progress['byConcept'] == [
+        {'concept': 'Neural Networks', 'attempted': 2, 'correct': 1, 'accuracy': 50.0},
+        {'concept': 'Statistics', 'attempted': 1, 'correct': 1, 'accuracy': 100.0},
+    ]
+    assert progress['byDifficulty'] == [
+        {'difficulty': 'easy', 'attempted': 1, 'correct': 1, 'accuracy': 100.0},
+        {'difficulty': 'medium', 'attempted': 2, 'correct': 1, 'accuracy': 50.0},
+    ]
+    assert {row['sessionId'] for row in progress['sessionHistory']} == {session_id, other_id}
+
+def test_progress_for_new_session(bank_client):
+    """A session without answers reports empty progress"""
+    response = bank_client.get('/api/practice/progress', headers={'X-Session-ID': 'nobody'})
+    assert response.json['overall']['totalQuestions'] == 0
+    assert response.json['byConcept'] == []
+
+def test_summaries_follow_deleted_answers(bank_app):
+    """Deleting answers (e.g. a concept progress reset) updates the summaries"""
+    with bank_app.app_context():
+        db = get_db()
+        for question_id in (1, 2, 11):
+            db.execute(
+                'INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken) '
+                'VALUES (?, ?, ?, ?, ?)',
+                ('session-1', question_id, 0, question_id == 1, 10)
+            )
+        db.execute("DELETE FROM user_answers WHERE session_id = 'session-1' AND question_id IN (1, 2)")
+        db.commit()
+        
+        stats = db.execute("SELECT * FROM session_stats WHERE session_id = 'session-1'").fetchone()
+        assert (stats['total_questions'], stats['correct_answers'], stats['total_time']) == (1, 0, 10)
+        concept = db.execute(
+            "SELECT attempted, correct FROM session_concept_stats WHERE session_id = 'session-1' AND concept_id = 1"
+        ).fetchone()
+        assert (concept['attempted'], concept['correct']) == (0, 0)
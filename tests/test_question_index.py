@@ -0,0 +1,61 @@
+import json
+from ml_app.database.db import get_db, get_bank_version
+from ml_app.database.question_index import get_question_index
+
+def test_index_groups_ids_by_concept(bank_app):
+    """Each concept gets its own sorted id array"""
+    with bank_app.app_context():
+        index = get_question_index(get_db())
+        assert list(index.ids(1)) == list(range(1, 11))
+        assert list(index.ids(2)) == list(range(11, 21))
+        assert len(index.ids()) == 20
+        assert len(index.ids(99)) == 0
+        assert index.contains(1, 5)
+        assert not index.contains(1, 15)
+
+def test_index_follows_bank_version(bank_app):
+    """Changing the bank bumps its version and rebuilds the index"""
+    with bank_app.app_context():
+        db = get_db()
+        index = get_question_index(db)
+        version = get_bank_version(db)
+        
+        db.execute(
+            'INSERT INTO questions (text, options, correct_answer, difficulty, concept_id) '
+            'VALUES (?, ?, ?, ?, ?)',
+            ('A new question?', json.dumps(['A', 'B', 'C', 'D']), 0, 'easy', 1)
+        )
+        db.execute('DELETE FROM questions WHERE id = 2')
+        db.commit()
+        assert get_bank_version(db) == version + 2
+        
+        index = get_question_index(db)
+        assert 21 in index.ids(1)
+        assert 2 not in index.ids(1)
+
+def test_sample_excludes_answered(bank_app):
+    """Sampling never returns excluded or foreign ids"""
+    with bank_app.app_context():
+        index = get_question_index(get_db())
+        for count in (1, 3, 8):
+            picked = index.sample(1, count, exclude={1, 2, 15})
+            assert len(picked) == count
+            assert len(set(picked)) == count
+            assert all(3 <= qid <= 10 for qid in picked)
+        assert sorted(index.sample(1, 50, exclude={1, 2})) == list(range(3, 11))
+
+def test_random_questions_endpoint(bank_client):
+    """Random questions come from the requested concept and skip answered ones"""
+    headers = {'X-Session-ID': 'session-1'}
+    for qid in range(1, 9):
+        bank_client.post(f'/api/questions/{qid}/submit', headers=headers,
+                         json={'answer': 0, 'time_taken': 5})
+    
+    response = bank_client.get('/api/questions/random?concept_id=1&count=5', headers=headers)
+    assert response.status_code == 200
+    assert sorted(q['id'] for q in response.json) == [9, 10]
+    assert response.json[0]['concepts'] == ['Neural Networks']
+    
+    response = bank_client.get('/api/questions/random?concept_id=2&count=3', headers=headers)
+    assert len(response.json) == 3
+    assert all(11 <= q['id'] <= 20 for q in response.json)
@@ -0,0 +1,81 @@
+import json
+import pytest
+from ml_app.database.db import get_db
+from ml_app.database.replica import CatalogReplica, get_catalog_db
+from ml_app.database.versions import VersionClock
+
+@pytest.fixture
+def replica_app(bank_app):
+    """Bank app reading its catalog from an in-memory replica, versions re-read every request"""
+    bank_app.extensions['catalog_replica'] = CatalogReplica(bank_app.config['DATABASE'])
+    bank_app.extensions['version_clock'] = VersionClock(0)
+    return bank_app
+
+def add_question(db, text):
+    db.execute(
+        'INSERT INTO questions (text, options, correct_answer, explanation, difficulty, concept_id) '
+        "VALUES (?, ?, 0, '', 'easy', 1)",
+        (text, json.dumps(['A', 'B', 'C', 'D']))
+    )
+    db.commit()
+
+def test_catalog_reads_go_to_memory(replica_app):
+    """The catalog connection is an in-memory copy of questions and concepts only"""
+    with replica_app.app_context():
+        catalog = get_catalog_db()
+        assert catalog is not get_db()
+        assert catalog.execute('PRAGMA database_list').fetchone()['file'] == ''
+        assert catalog.execute('SELECT COUNT(*) FROM questions').fetchone()[0] == 20
+        assert catalog.execute('SELECT COUNT(*) FROM concepts').fetchone()[0] == 2
+        tables = {row[0] for row in catalog.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )}
+        assert tables == {'questions', 'concepts', 'bank_version'}
+
+def test_replica_has_the_catalog_indexes(replica_app):
+    """Every index the file has on the catalog tables is in the replica, and no trigger is"""
+    query = ("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+             "AND tbl_name IN ('questions', 'concepts', 'bank_version')")
+    with replica_app.app_context():
+        on_disk = {row[0] for row in get_db().execute(query)}
+        catalog = get_catalog_db()
+        assert on_disk
+        assert {row[0] for row in catalog.execute(query)} == on_disk
+        assert catalog.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'").fetchone()[0] == 0
+
+def test_replica_follows_bank_version(replica_app):
+    """Bank edits rebuild the replica; answers leave it alone"""
+    with replica_app.app_context():
+        replica = replica_app.extensions['catalog_replica']
+        get_catalog_db()
+        version = replica.version
+
+        db = get_db()
+        db.execute(
+            'INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken) '
+            "VALUES ('session-1', 1, 0, 1, 5)"
+        )
+        db.commit()
+        get_catalog_db()
+        assert replica.version == version
+
+        add_question(db, 'A brand new question?')
+        catalog = get_catalog_db()
+        assert replica.version > version
+        assert catalog.execute(
+            "SELECT COUNT(*) FROM questions WHERE text = 'A brand new question?'"
+        ).fetchone()[0] == 1
+
+def test_endpoints_serve_from_replica(replica_app):
+    """Question and concept endpoints work against the replica"""
+    client = replica_app.test_client()
+    response = client.get('/api/questions/3')
+    assert response.status_code == 200
+    assert response.get_json()['text'] == 'Neural Networks question 2?'
+    assert len(client.get('/api/concepts/').get_json()) == 2
+
+def test_without_replica_catalog_is_the_database(bank_app):
+    """With the replica off, catalog reads use the request connection"""
+    with bank_app.app_context():
+        assert 'catalog_replica' not in bank_app.extensions
+        assert get_catalog_db() is get_db()
@@ -0,0 +1,62 @@
+from ml_app.database.db import get_db
+from ml_app.database.rollups import backfill_rollups
+
+def insert_answer(db, question_id, is_correct, time_taken, timestamp):
+    db.execute(
+        'INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken, timestamp) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        ('session-1', question_id, 0, is_correct, time_taken, timestamp)
+    )
+
+def seed_answers(db):
+    insert_answer(db, 1, True, 10, '2024-01-01 09:00:00')
+    insert_answer(db, 2, False, 20, '2024-01-01 23:59:59')
+    insert_answer(db, 11, True, 30, '2024-01-02 08:00:00')
+    insert_answer(db, 12, True, 40, '2024-01-02 09:00:00')
+    db.commit()
+
+def test_progress_reads_daily_rollups(bank_app, bank_client):
+    """Progress is served per day from the trigger-maintained rollups"""
+    with bank_app.app_context():
+        seed_answers(get_db())
+    
+    response = bank_client.get('/api/stats/progress')
+    assert response.status_code == 200
+    assert response.json == {'dates': ['2024-01-01', '2024-01-02'], 'scores': [50.0, 100.0]}
+    
+    response = bank_client.get('/api/stats/progress?concept_id=1')
+    assert response.json == {'dates': ['2024-01-01'], 'scores': [50.0]}
+
+def test_rollups_follow_deleted_answers(bank_app):
+    """Deleting answers takes them back out of the rollups"""
+    with bank_app.app_context():
+        db = get_db()
+        seed_answers(db)
+        db.execute('DELETE FROM user_answers WHERE question_id = 2')
+        db.commit()
+        
+        day = db.execute("SELECT * FROM daily_stats WHERE day = '2024-01-01'").fetchone()
+        assert (day['answers'], day['correct'], day['total_time']) == (1, 1, 10)
+
+def test_backfill_matches_triggers(bank_app):
+    """A backfill rebuilds exactly what the triggers maintained"""
+    with bank_app.app_context():
+        db = get_db()
+        seed_answers(db)
+        maintained = [tuple(row) for row in db.execute('SELECT * FROM daily_concept_stats ORDER BY concept_id, day')]
+        
+        # Simulate answers recorded before the rollups existed
+        db.execute('DELETE FROM daily_stats')
+        db.execute('DELETE FROM daily_concept_stats')
+        db.commit()
+        
+        assert backfill_rollups(db, chunk=3) == 4
+        assert [tuple(row) for row in db.execute('SELECT * FROM daily_concept_stats ORDER BY concept_id, day')] == maintained
+        totals = db.execute('SELECT SUM(answers) AS answers, SUM(total_time) AS time FROM daily_stats').fetchone()
+        assert (totals['answers'], totals['time']) == (4, 100)
+
+def test_backfill_command(bank_app, runner):
+    """The CLI rebuilds the rollups and reports the answers counted"""
+    with bank_app.app_context():
+        seed_answers(get_db())
+    assert 'Rebuilt daily rollups from 4 answers' in runner.invoke(args=['backfill-rollups']).output
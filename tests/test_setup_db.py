@@ -0,0 +1,83 @@
+from ml_app.database.db import get_bank_version, get_db
+from ml_app.database.setup_db import bulk_load_questions
+
+def record(text, concept='Neural Networks', correct='A', **extra):
+    question = {
+        'question': text,
+        'options': ['Option A', 'Option B', 'Option C', 'Option D'],
+        'correct': correct,
+        'explanation': f'Because {text}',
+        'concept': concept,
+    }
+    question.update(extra)
+    return question
+
+def schema(db):
+    return db.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE tbl_name = 'questions' ORDER BY name"
+    ).fetchall()
+
+def test_bulk_load_skips_duplicates_and_creates_concepts(bank_app):
+    """Questions with a known content hash are skipped, new concepts created once"""
+    with bank_app.app_context():
+        db = get_db()
+        stats = bulk_load_questions(db, [
+            record('Neural Networks question 0?'),
+            record('What is a tensor?', concept='Linear Algebra', correct='C', difficulty='hard'),
+            record('What is a matrix?', concept='Linear Algebra'),
+            record('what is  a Matrix?', concept='Linear Algebra'),
+        ], batch_size=2)
+
+        assert (stats.read, stats.inserted, stats.duplicates, stats.rejected) == (4, 2, 2, 0)
+        concepts = db.execute("SELECT id FROM concepts WHERE name = 'Linear Algebra'").fetchall()
+        assert len(concepts) == 1
+        row = db.execute("SELECT * FROM questions WHERE text = 'What is a tensor?'").fetchone()
+        assert (row['correct_answer'], row['difficulty'], row['concept_id']) == (2, 'hard', concepts[0]['id'])
+
+def test_bulk_load_rejects_invalid_records(bank_app):
+    """Records the schema would refuse are counted, not inserted"""
+    with bank_app.app_context():
+        db = get_db()
+        stats = bulk_load_questions(db, [
+            {'options': ['A', 'B'], 'correct': 'A'},
+            record('Bad letter?', correct='F'),
+            record('Bad difficulty?', difficulty='impossible'),
+            record('Fine?'),
+        ])
+        assert (stats.inserted, stats.rejected) == (1, 3)
+
+def test_bulk_load_restores_deferred_schema(bank_app):
+    """Triggers and indexes come back, and the bank version moves once"""
+    with bank_app.app_context():
+        db = get_db()
+        before = schema(db)
+        version = get_bank_version(db)
+
+        stats = bulk_load_questions(db, [record(f'Question {i}?') for i in range(50)], batch_size=7)
+
+        assert stats.inserted == 50
+        assert schema(db) == before
+        assert get_bank_version(db) == version + 1
+
+        db.execute("UPDATE questions SET text = 'Renamed?' WHERE id = 1")
+        db.commit()
+        assert get_bank_version(db) == version + 2
+
+def test_bulk_load_rolls_back_on_error(bank_app):
+    """A failing load leaves neither rows nor a missing trigger behind"""
+    with bank_app.app_context():
+        db = get_db()
+        before = schema(db)
+        count = db.execute('SELECT COUNT(*) FROM questions').fetchone()[0]
+
+        def questions():
+            yield record('First?')
+            raise RuntimeError('read failed')
+
+        try:
+            bulk_load_questions(db, questions(), batch_size=1)
+        except RuntimeError:
+            pass
+
+        assert schema(db) == before
+        assert db.execute('SELECT COUNT(*) FROM questions').fetchone()[0] == count
@@ -0,0 +1,80 @@
+from ml_app.database.db import get_db
+from ml_app.database.stats_snapshot import StatsSnapshotService
+
+def insert_answers(app, answers):
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            'INSERT INTO user_answers (session_id, question_id, answer, is_correct, time_taken) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [('session-1', question_id, 0, is_correct, 60) for question_id, is_correct in answers]
+        )
+        db.commit()
+
+def test_stats_served_from_snapshot(bank_app, bank_client):
+    """Overview and concept stats come from one versioned snapshot"""
+    insert_answers(bank_app, [(1, True), (2, False), (11, True)])
+    
+    overview = bank_client.get('/api/stats/overview')
+    assert overview.status_code == 200
+    assert overview.json['totalQuestions'] == 3
+    assert overview.json['averageScore'] == 66.67
+    assert overview.json['totalTime'] == 3
+    version = overview.json['snapshot']['version']
+    assert overview.headers['X-Stats-Version'] == str(version)
+    
+    concepts = bank_client.get('/api/stats/concepts')
+    assert concepts.json['concepts'] == ['Neural Networks', 'Statistics']
+    assert concepts.json['scores'] == [50.0, 100.0]
+    assert concepts.json['snapshot']['version'] == version
+
+def test_snapshot_honours_staleness_bound(bank_app, bank_client):
+    """A fresh snapshot is reused; a stale one is recomputed with a new version"""
+    service = bank_app.extensions['stats_snapshot']
+    service.interval = 3600  # keep the background refresh out of the way
+    insert_answers(bank_app, [(1, True)])
+    first = bank_client.get('/api/stats/overview').json
+    
+    insert_answers(bank_app, [(2, True)])
+    assert bank_client.get('/api/stats/overview').json == first
+    
+    service.max_age = 0
+    second = bank_client.get('/api/stats/overview').json
+    assert second['totalQuestions'] == 2
+    assert second['snapshot']['version'] == first['snapshot']['version'] + 1
+
+def test_version_only_moves_with_the_numbers(bank_app):
+    """Recomputing unchanged numbers keeps the version"""
+    service = StatsSnapshotService(bank_app.config['DATABASE'], interval=3600)
+    first = service.refresh()
+    assert service.refresh().version == first.version
+    
+    insert_answers(bank_app, [(1, True)])
+    assert service.refresh().version == first.version + 1
+    assert service.refresh(max_age=3600).overview == (1, 1, 60)
+
+def test_refresh_thread_survives_and_restarts(bank_app):
+    """An unexpected refresh error is logged, not fatal; a dead thread is restarted"""
+    service = StatsSnapshotService(bank_app.config['DATABASE'], interval=0.01)
+    refresh, calls = service.refresh, []
+
+    def failing_refresh(max_age=None):
+        calls.append(max_age)
+        if len(calls) == 1:
+            raise ValueError('Unexpected')
+        return refresh(max_age)
+
+    service.refresh = failing_refresh
+    service._ensure_started()
+    thread = service._thread
+    for _ in range(500):
+        if len(calls) > 2:
+            break
+        thread.join(0.01)
+    assert len(calls) > 2 and thread.is_alive()
+
+    service._stopping.set()  # ends the thread behind the service's back
+    thread.join(timeout=5)
+    assert service.current().version >= 1
+    assert service._thread is not thread and service._thread.is_alive()
+    service.stop()